@@ -85,179 +85,85 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
-from typing import Dict, List
-from pydantic import BaseModel, Field
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from firecrawl import FirecrawlApp
+import uuid
+from concurrent.futures import as_completed
+from datetime import datetime
+from agent_pool import get_default_agent_pool
+from comparison import METRICS, ComparisonTable
+from extract_jobs import get_default_extract_jobs
+from geocoder import get_default_geocoder
+from alerts_worker import SAVED_SEARCHES_PATH
+from property_store import AMENITIES, SORT_ORDERS, PropertyFilters, get_default_property_store
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import base64
+from assets import AI_LOGO_MAX_PX, DEVELOPER_MAX_PX, LOGO_MAX_PX, image_bytes, image_data_uri
+import streamlit.components.v1 as components
+from lazy_imports import folium, folium_plugins, warm_up
+from map_layers import get_default_map_layers, heat_points
+from tracing import TRACER, start_metrics_server
 
 ## Use Streamlit secrets for API keys (for Streamlit Cloud deployment)
 # Remove dotenv loading
 
-class PropertyData(BaseModel):
-    """Schema for property data extraction"""
-    building_name: str = Field(description="Name of the building/property", alias="Building_name")
-    property_type: str = Field(description="Type of property (commercial, residential, etc)", alias="Property_type")
-    location_address: str = Field(description="Complete address of the property")
-    price: str = Field(description="Price of the property", alias="Price")
-    description: str = Field(description="Detailed description of the property", alias="Description")
-
-class PropertiesResponse(BaseModel):
-    """Schema for multiple properties response"""
-    properties: List[PropertyData] = Field(description="List of property details")
-
-class LocationData(BaseModel):
-    """Schema for location price trends"""
-    location: str
-    price_per_sqft: float
-    percent_increase: float
-    rental_yield: float
-
-class LocationsResponse(BaseModel):
-    """Schema for multiple locations response"""
-    locations: List[LocationData] = Field(description="List of location data points")
-
-class FirecrawlResponse(BaseModel):
-    """Schema for Firecrawl API response"""
-    success: bool
-    data: Dict
-    status: str
-    expiresAt: str
-
-class PropertyFindingAgent:
-    """Agent responsible for finding properties and providing recommendations"""
-    
-    def __init__(self, firecrawl_api_key: str, openai_api_key: str, model_id: str = "gpt-3.5-turbo"):
-        self.agent = Agent(
-            model=OpenAIChat(id=model_id, api_key=openai_api_key),
-            markdown=True,
-            description="I am a real estate expert who helps find and analyze properties based on user preferences."
-        )
-        self.firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
-
-    def find_properties(
-        self,
-        city: str,
-        max_price: float,
-        property_category: str = "Residential",
-        property_type: str = "Flat"
-    ) -> str:
-        """Find and analyze properties based on user preferences (optimized for low token usage)"""
-        formatted_location = city.lower().strip()
-        # Validate city input
-        if not city or not formatted_location or len(formatted_location) < 2:
-            return "No valid city name provided. Please enter a valid city name."
-        urls = [
-            f"https://www.squareyards.com/sale/property-for-sale-in-{formatted_location}/*",
-            f"https://www.99acres.com/property-in-{formatted_location}-ffid/*",
-            f"https://housing.com/in/buy/{formatted_location}/{formatted_location}",
-        ]
-        # Remove URLs if city is empty or contains invalid characters
-        urls = [url for url in urls if city and formatted_location and '*' not in city and formatted_location.isalpha()]
-        if not urls:
-            return "No valid property listing URLs found for this city. Please check the city name or try a different one."
-        property_type_prompt = "Flats" if property_type == "Flat" else "Individual Houses"
-        try:
-            raw_response = self.firecrawl.extract(
-                urls=urls,
-                prompt=f"Extract up to 5 {property_category} {property_type_prompt} in {city} under {max_price} crores. Return only essential details: name, location, price, key features. Format as a list.",
-                schema=PropertiesResponse.model_json_schema()
-            )
-            print("Raw Firecrawl Response:", raw_response)
-            if isinstance(raw_response, dict) and raw_response.get('success'):
-                properties = raw_response['data'].get('properties', [])
-            else:
-                properties = []
-            print("Properties:", properties)
-            # Short, focused analysis prompt
-            analysis = self.agent.run(
-                f"""Analyze these properties for a buyer:
-Properties: {properties}
-1. List 3-5 best matches with name, location, price, and 1-2 key features each.
-2. Which is best value and why?
-3. Top 2 recommendations for investment.
-4. One negotiation tip for each.
-Keep response short and structured."""
-            )
-            print("AI Analysis:", analysis.content)
-            return analysis.content
-        except Exception as e:
-            if "No valid URLs found to scrape" in str(e):
-                return "No valid property listings found for this city. Please check the city name or try a different one."
-            print("Error in find_properties:", e)
-            return f"Error: {str(e)}"
-
-    def get_location_trends(self, city: str) -> str:
-        """Get price trends for different localities in the city (optimized for low token usage)"""
-        try:
-            raw_response = self.firecrawl.extract(
-                urls=[f"https://www.99acres.com/property-rates-and-price-trends-in-{city.lower()}-prffid/*"],
-                prompt="Extract price trends for up to 5 key localities in the city. Return only: name, price per sqft, percent increase, rental yield.",
-                schema=LocationsResponse.model_json_schema()
-            )
-            print("Raw Firecrawl Location Response:", raw_response)
-            if isinstance(raw_response, dict) and raw_response.get('success'):
-                locations = raw_response['data'].get('locations', [])
-            else:
-                locations = []
-            print("Locations:", locations)
-            analysis = self.agent.run(
-                f"""Summarize price trends for these locations in {city}:
-Locations: {locations}
-1. List 3-5 locations with price per sqft and percent increase.
-2. Which is best for investment and why?
-3. One tip for investors.
-Keep response short."""
-            )
-            print("AI Location Analysis:", analysis.content)
-            return analysis.content
-        except Exception as e:
-            print("Error in get_location_trends:", e)
-            return f"Error: {str(e)}"
-
 def create_property_agent():
-    """Create PropertyFindingAgent with API keys from session state"""
-    if 'property_agent' not in st.session_state:
-        st.session_state.property_agent = PropertyFindingAgent(
-            firecrawl_api_key=st.session_state.firecrawl_key,
-            openai_api_key=st.session_state.openai_key,
-            model_id=st.session_state.model_id
-        )
+    """Attach the shared PropertyFindingAgent for the API keys and model in session state"""
+    # Agents and their clients are pooled per process, so sessions with the same keys share one
+    st.session_state.property_agent = get_default_agent_pool().get(
+        firecrawl_api_key=st.session_state.firecrawl_key,
+        openai_api_key=st.session_state.openai_key,
+        model_id=st.session_state.model_id
+    )
 
 def main():
+    # Start importing the mapping stack in the background; it is first needed after a search
+    warm_up(folium, folium_plugins)
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
     # --- Personalized Property Alerts (Sidebar) ---
     st.sidebar.markdown("<h2 style='color:#ff512f;'>🔔 Property Alerts</h2>", unsafe_allow_html=True)
     alert_email = st.sidebar.text_input("Email for Alerts", help="Enter your email to get property alerts")
     if st.sidebar.button("Save Search & Get Alerts"):
-        with open("saved_searches.txt", "a") as f:
-            f.write(f"{alert_email},{city},{property_category},{property_type},{max_price}\n")
-        st.sidebar.success("Your search criteria has been saved! You'll get alerts when new properties match.")
+        # The search inputs are rendered further down, so read their values from session state
+        saved_city = st.session_state.get("search_city", "").replace(",", " ").strip()
+        if not alert_email or not saved_city:
+            st.sidebar.error("⚠️ Please enter your email and a city to save this search.")
+        else:
+            with open(SAVED_SEARCHES_PATH, "a") as f:
+                f.write(f"{alert_email},{saved_city},{st.session_state.get('search_category', 'Residential')},{st.session_state.get('search_type', 'Flat')},{st.session_state.get('search_max_price', 5.0)}\n")
+            st.sidebar.success("Your search criteria has been saved! You'll get alerts when new properties match.")
     st.sidebar.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
     st.sidebar.markdown("<h3 style='color:#dd2476;'>🎛️ Advanced Filters</h3>", unsafe_allow_html=True)
     min_price = st.sidebar.number_input("Min Price (Crores)", min_value=0.0, max_value=100.0, value=0.0, step=0.1)
     max_age = st.sidebar.slider("Max Property Age (years)", min_value=0, max_value=50, value=20)
-    amenities = st.sidebar.multiselect("Amenities", ["Gym", "Pool", "Parking", "Security", "Garden", "Lift", "Clubhouse"])
+    amenities = st.sidebar.multiselect("Amenities", AMENITIES)
     builder_reputation = st.sidebar.selectbox("Builder Reputation", ["Any", "Top Rated", "Established", "Newcomer"])
-    sort_by = st.sidebar.selectbox("Sort By", ["Price: Low to High", "Price: High to Low", "Newest", "Best Amenities"])
+    sort_by = st.sidebar.selectbox("Sort By", list(SORT_ORDERS))
+    filters = PropertyFilters(min_price=min_price, amenities=amenities, sort_by=sort_by)
     st.sidebar.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
     # --- Property Comparison Dashboard ---
     st.markdown("<h2 style='color:#ff512f;'>🏆 Property Comparison Dashboard</h2>", unsafe_allow_html=True)
-    import re
-    def extract_properties_for_comparison(text):
-        pattern = r"-?\s*Name: ([^\n]+)\s*Location: ([^\n]+)\s*Price: ([^\n]+)"
-        matches = re.findall(pattern, text)
-        return matches
-    properties_list = extract_properties_for_comparison(st.session_state.get('property_results', ''))
-    if not properties_list:
-        properties_list = extract_properties_for_comparison(''.join([str(x) for x in st.session_state.values() if isinstance(x, str)]))
-    if properties_list:
-        prop_names = [f"{name} ({location})" for name, location, price in properties_list]
-        selected = st.multiselect("Select properties to compare", prop_names)
-        compare_data = []
+    # Listings are parsed once when a search returns; reruns only sort and derive columns
+    comparison = st.session_state.setdefault("comparison", ComparisonTable())
+    if len(comparison):
+        labels = comparison.labels()
+        selected = st.multiselect("Select properties to compare (all when none are selected)", list(labels), format_func=labels.get)
+        sort_col, order_col = st.columns([3, 1])
+        compare_by = sort_col.selectbox("Sort by", list(METRICS), index=list(METRICS).index("price_per_sqft"), format_func=METRICS.get)
+        descending = order_col.checkbox("Highest first", value=compare_by in ("area_sqft", "rental_yield", "percent_increase", "monthly_rent"))
+        compared = comparison.compare(selected, sort_by=compare_by, ascending=not descending)
+        highlights = comparison.highlights(compared)
+        for column, pick in zip(st.columns(len(highlights) or 1), highlights):
+            column.metric(pick["label"], pick["value"])
+            column.caption(pick["name"])
+        st.dataframe(comparison.display(compared), use_container_width=True, hide_index=True)
+        if st.button("Clear comparison"):
+            comparison.remove(selected or list(labels))
+            st.rerun()
+    else:
+        st.info("No properties available for comparison yet.")
+    # --- End Comparison Dashboard ---
     # --- Saved Favorites & Shortlist ---
     if 'favorites' not in st.session_state:
         st.session_state.favorites = []
@@ -270,38 +176,42 @@ def main():
             st.sidebar.download_button("Export Shortlist (CSV)", data='\n'.join([f"{f['Name']},{f['Location']},{f['Price']}" for f in st.session_state.favorites]), file_name="shortlist.csv")
         else:
             st.sidebar.info("No favorites yet. Star properties to save them!")
-        for idx, prop in enumerate(properties_list):
-            name, location, price = prop
-            if f"{name} ({location})" in selected:
-                compare_data.append({"Name": name, "Location": location, "Price": price})
-        if compare_data:
-            st.dataframe(compare_data)
+    # --- Matching Listings (filters answered from the local property store) ---
+    last_search = st.session_state.get('last_search')
+    if last_search:
+        st.markdown("<h2 style='color:#ff512f;'>📋 Matching Listings</h2>", unsafe_allow_html=True)
+        matches = get_default_property_store().query(
+            last_search['city'],
+            last_search['property_category'],
+            last_search['property_type'],
+            max_price=last_search['max_price'],
+            min_price=filters.min_price,
+            amenities=filters.amenities,
+            sort_by=filters.sort_by
+        )
+        if matches:
+            st.dataframe([{"Name": p.building_name, "Location": p.location_address, "Price": p.price} for p in matches], use_container_width=True)
         else:
-            st.info("Select properties above to compare.")
-    else:
-        st.info("No properties available for comparison yet.")
-    # --- End Comparison Dashboard ---
+            st.info("No stored listings match the selected filters.")
     # ...existing code...
 
     # Get API keys from Streamlit secrets
     firecrawl_key = st.secrets.get("FIRECRAWL_API_KEY", "")
     openai_key = st.secrets.get("OPENAI_API_KEY", "")
     default_model = st.secrets.get("OPENAI_MODEL_ID", "gpt-3.5-turbo")
+    if firecrawl_key and openai_key:
+        st.session_state.firecrawl_key = firecrawl_key
+        st.session_state.openai_key = openai_key
+        st.session_state.model_id = default_model
+        create_property_agent()
 
     # --- Sidebar Logo with Unique Style and Animation ---
-    logo_path = os.path.join(os.path.dirname(__file__), "Logo.png")
-    ai_logo_path = os.path.join(os.path.dirname(__file__), "AI.png")
-    encoded_logo = None
-    encoded_ai_logo = None
-    if os.path.exists(logo_path):
-        with open(logo_path, "rb") as image_file:
-            encoded_logo = base64.b64encode(image_file.read()).decode()
-    if os.path.exists(ai_logo_path):
-        with open(ai_logo_path, "rb") as image_file:
-            encoded_ai_logo = base64.b64encode(image_file.read()).decode()
+    # Resized and encoded once per process, not on every rerun
+    logo_uri = image_data_uri("Logo.png", LOGO_MAX_PX)
+    ai_logo_uri = image_data_uri("AI.png", AI_LOGO_MAX_PX)
 
     with st.sidebar:
-        if encoded_logo:
+        if logo_uri:
             st.markdown(
                 f"""
                 <style>
@@ -327,12 +237,12 @@ def main():
                 }}
                 </style>
                 <div class='sidebar-logo'>
-                    <img class='colorful-animated-logo' src='data:image/png;base64,{encoded_logo}' alt='Logo' style='width:150px;height:150px;'>
+                    <img class='colorful-animated-logo' src='{logo_uri}' alt='Logo' style='width:150px;height:150px;'>
                     <div style='color:#00c6ff;font-size:1.1em;font-family:sans-serif;font-weight:bold;text-shadow:0 1px 6px #ffd200;margin-top:8px;'>Visualization Saathi</div>
                 </div>
                 <!-- Second logo below the first -->
                 <div class='sidebar-AI' style='margin-top:0;'>
-                    {f"<img src='data:image/png;base64,{encoded_ai_logo}' alt='AI' style='width:210px;height:220px;border-radius:30%;box-shadow:0 2px 12px #00c6ff;border:2px solid #ffd200;margin-bottom:8px;background:#232526;object-fit:cover;'>" if encoded_ai_logo else "<div style='color:#ff4b4b;'>AI.png not found</div>"}
+                    {f"<img src='{ai_logo_uri}' alt='AI' style='width:210px;height:220px;border-radius:30%;box-shadow:0 2px 12px #00c6ff;border:2px solid #ffd200;margin-bottom:8px;background:#232526;object-fit:cover;'>" if ai_logo_uri else "<div style='color:#ff4b4b;'>AI.png not found</div>"}
                     <div style='color:#00c6ff;font-size:1.1em;font-family:sans-serif;font-weight:bold;text-shadow:0 1px 6px #ffd200;margin-top:8px;'></div>
                 </div>
                 """,
@@ -340,9 +250,9 @@ def main():
             )
             # Developer info and image below the logos
             st.markdown("<div style='text-align:center;font-size:1.1em;margin-top:10px;'>👨👨‍💻<b>Developer:</b> Abhishek💖Yadav</div>", unsafe_allow_html=True)
-            developer_path = os.path.join(os.path.dirname(__file__), "pic.jpg")
-            if os.path.exists(developer_path):
-                st.image(developer_path, caption="Abhishek Yadav", use_container_width=True)
+            developer_image = image_bytes("pic.jpg", DEVELOPER_MAX_PX)
+            if developer_image:
+                st.image(developer_image, caption="Abhishek Yadav", use_container_width=True)
             else:
                 st.warning("pic.jpg file not found. Please check the file path.")
         else:
@@ -372,12 +282,14 @@ def main():
         city = st.text_input(
             "🏙️ City",
             placeholder="Enter city name (e.g., Bangalore)",
-            help="Enter the city where you want to search for properties"
+            help="Enter the city where you want to search for properties",
+            key="search_city"
         )
         property_category = st.selectbox(
             "🏢 Property Category",
             options=["Residential", "Commercial"],
-            help="Select the type of property you're interested in"
+            help="Select the type of property you're interested in",
+            key="search_category"
         )
     with col2:
         max_price = st.number_input(
@@ -386,14 +298,28 @@ def main():
             max_value=100.0,
             value=5.0,
             step=0.1,
-            help="Enter your maximum budget in Crores"
+            help="Enter your maximum budget in Crores",
+            key="search_max_price"
         )
         property_type = st.selectbox(
             "🏠 Property Type",
             options=["Flat", "Individual House"],
-            help="Select the specific type of property"
+            help="Select the specific type of property",
+            key="search_type"
         )
     st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
+    # Extract jobs are owned by this session and these inputs: changing the inputs stops
+    # polling the previous search's jobs, and a session that goes away lets its lease lapse.
+    # While a search is running its jobs stay alive regardless; reruns only renew the lease
+    # for late jobs that finish after the search returned
+    extract_jobs = get_default_extract_jobs()
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    search_owner = f"{session_id}:{city.strip().lower()}:{property_category}:{property_type}:{max_price}"
+    previous_owner = st.session_state.get("search_owner")
+    if previous_owner and previous_owner != search_owner:
+        extract_jobs.release(previous_owner)
+    st.session_state.search_owner = search_owner
+    extract_jobs.touch(search_owner)
     if st.button("🔍 Start Search", use_container_width=True):
         if 'property_agent' not in st.session_state:
             st.error("⚠️ Please enter your API keys in the sidebar first!")
@@ -402,100 +328,106 @@ def main():
             st.error("⚠️ Please enter a city name!")
             return
         try:
-            with st.spinner("🔍 Searching for properties..."):
-                property_results = st.session_state.property_agent.find_properties(
+            geocoder = get_default_geocoder()
+            running_jobs = extract_jobs.job_ids(search_owner)
+            if running_jobs:
+                st.caption(f"Resuming {len(running_jobs)} extraction job(s) already in progress for this search")
+            with st.spinner("🔍 Searching for properties and analyzing location trends..."):
+                # Property search and trend analysis run concurrently; each section
+                # is rendered into its own container as soon as its result arrives
+                futures = st.session_state.property_agent.search(
                     city=city,
                     max_price=max_price,
                     property_category=property_category,
-                    property_type=property_type
+                    property_type=property_type,
+                    filters=filters,
+                    stream=True,
+                    owner=search_owner
                 )
-                st.session_state.property_results = property_results
-                st.success("✅ Property search completed!")
-                st.markdown("<h2 style='color:#dd2476;'>🏘️ Property Recommendations</h2>", unsafe_allow_html=True)
-                st.markdown(f"<div style='background:rgba(30,30,40,0.85);border-radius:12px;padding:18px;margin-bottom:12px;'>{property_results}</div>", unsafe_allow_html=True)
-                # --- Interactive Map Visualization ---
-                import folium
-                from streamlit_folium import st_folium
-                import re
-                st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
-                st.markdown("<h3 style='color:#ff512f;'>🗺️ Interactive Property Map</h3>", unsafe_allow_html=True)
-                def extract_properties(text):
-                    pattern = r"-?\s*Name: ([^\n]+)\s*Location: ([^\n]+)\s*Price: ([^\n]+)"
-                    matches = re.findall(pattern, text)
-                    return matches
-                properties = extract_properties(property_results)
-                import requests
-                def geocode(address):
-                    try:
-                        url = f"https://nominatim.openstreetmap.org/search?format=json&q={address}"
-                        resp = requests.get(url)
-                        data = resp.json()
-                        if data:
-                            return float(data[0]['lat']), float(data[0]['lon'])
-                    except:
-                        return None, None
-                    return None, None
-                city_lat, city_lon = geocode(city)
-                m = folium.Map(location=[city_lat or 20.5937, city_lon or 78.9629], zoom_start=12, tiles="CartoDB dark_matter")
-                for name, location, price in properties:
-                    lat, lon = geocode(location)
-                    if lat and lon:
-                        folium.Marker(
-                            location=[lat, lon],
-                            popup=f"<b>{name}</b><br>{location}<br>Price: {price}",
-                            tooltip=name,
-                            icon=folium.Icon(color="pink", icon="home", prefix="fa")
-                        ).add_to(m)
-                st_folium(m, width=700, height=500)
-                # --- End Map Visualization ---
-                st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
-                with st.spinner("📊 Analyzing location trends..."):
-                    location_trends = st.session_state.property_agent.get_location_trends(city)
-                    st.success("✅ Location analysis completed!")
-                    with st.expander("📈 Location Trends Analysis of the city"):
-                        st.markdown(location_trends)
+                st.session_state.last_search = {
+                    "city": city,
+                    "property_category": property_category,
+                    "property_type": property_type,
+                    "max_price": max_price
+                }
+                sections = {future: name for name, future in futures.items()}
+                property_section = st.container()
+                trends_section = st.container()
+                city_lat, city_lon = geocoder.geocode(city)
+                trend_locations = []
+                for future in as_completed(sections):
+                    if sections[future] == "properties":
+                        with property_section:
+                            analysis_stream = future.result()
+                            st.markdown("<h2 style='color:#dd2476;'>🏘️ Property Recommendations</h2>", unsafe_allow_html=True)
+                            # Write the analysis incrementally as tokens arrive
+                            analysis_box = st.empty()
+                            for _ in analysis_stream:
+                                analysis_box.markdown(f"<div style='background:rgba(30,30,40,0.85);border-radius:12px;padding:18px;margin-bottom:12px;'>{analysis_stream.text}</div>", unsafe_allow_html=True)
+                            property_results = analysis_stream.result()
+                            st.session_state.property_results = property_results
+                            comparison.add(city, property_results.data.properties, trend_locations)
+                            st.success("✅ Property search completed!")
+                            if property_results.degraded_sources:
+                                st.caption(f"⚠️ {', '.join(property_results.degraded_sources)} did not respond in time; showing their last known listings")
+                            if analysis_stream.time_to_first_token is not None:
+                                timings = f"First insight in {analysis_stream.time_to_first_token:.1f}s"
+                                if analysis_stream.time_to_first_model_token is not None:
+                                    timings += f", AI analysis started at {analysis_stream.time_to_first_model_token:.1f}s"
+                                st.caption(f"{timings}, full analysis in {analysis_stream.total_time:.1f}s")
+                            # --- Interactive Map Visualization ---
+                            st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
+                            st.markdown("<h3 style='color:#ff512f;'>🗺️ Interactive Property Map</h3>", unsafe_allow_html=True)
+                            properties = property_results.data.properties
+                            coordinates = geocoder.geocode_many(p.location_address for p in properties)
+                            # Maps are cached by content, so repeat searches reuse the rendered HTML
+                            map_html = get_default_map_layers().property_map((city_lat, city_lon), properties, coordinates)
+                            with TRACER.span("map_render", map="properties", markers=len(properties)):
+                                components.html(map_html, width=700, height=500)
+                            # --- End Map Visualization ---
+                    else:
+                        with trends_section:
+                            st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
+                            trends_stream = future.result()
+                            with st.expander("📈 Location Trends Analysis of the city"):
+                                st.write_stream(trends_stream)
+                            location_trends = trends_stream.result()
+                            trend_locations = location_trends.data.locations
+                            comparison.update_localities(city, trend_locations)
+                            st.success("✅ Location analysis completed!")
+                            if location_trends.snapshot_at:
+                                as_of = datetime.fromtimestamp(location_trends.snapshot_at).strftime("%d %b %Y")
+                                if location_trends.stale:
+                                    st.caption(f"Locality trends as of {as_of}; they may be outdated and are being refreshed for your next search")
+                                else:
+                                    st.caption(f"Locality trends as of {as_of}")
 
-                # --- Interactive Location Heatmap ---
-                st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
-                st.markdown("<h3 style='color:#dd2476;'>🔥 Location Price & Yield Heatmap</h3>", unsafe_allow_html=True)
-                import re
-                import folium
-                from streamlit_folium import st_folium
-                import pandas as pd
-                pattern = r"-?\s*Location: ([^\n]+)\s*Price per sqft: ([\d.]+)\s*Percent increase: ([\d.]+)%\s*Rental yield: ([\d.]+)%"
-                matches = re.findall(pattern, location_trends)
-                heat_data = []
-                for loc, price, inc, yield_ in matches:
-                    import requests
-                    try:
-                        url = f"https://nominatim.openstreetmap.org/search?format=json&q={loc} {city}"
-                        resp = requests.get(url)
-                        data = resp.json()
-                        if data:
-                            lat, lon = float(data[0]['lat']), float(data[0]['lon'])
-                            heat_data.append({"Location": loc, "lat": lat, "lon": lon, "Price": float(price), "Increase": float(inc), "Yield": float(yield_)})
-                    except:
-                        continue
-                if heat_data:
-                    m_heat = folium.Map(location=[city_lat or 20.5937, city_lon or 78.9629], zoom_start=12, tiles="CartoDB dark_matter")
-                    from folium.plugins import HeatMap
-                    heat_points = [[d["lat"], d["lon"], d["Price"]] for d in heat_data]
-                    HeatMap(heat_points, radius=18, blur=12, min_opacity=0.5, max_zoom=1).add_to(m_heat)
-                    for d in heat_data:
-                        folium.CircleMarker(
-                            location=[d["lat"], d["lon"]],
-                            radius=8,
-                            color="#dd2476",
-                            fill=True,
-                            fill_color="#ff512f",
-                            popup=f"{d['Location']}<br>Price/sqft: ₹{d['Price']}<br>Yield: {d['Yield']}%",
-                        ).add_to(m_heat)
-                    st_folium(m_heat, width=700, height=500)
-                    st.caption("Color intensity shows price per sqft. Pink circles show rental yield.")
-                else:
-                    st.info("No location trend data available for heatmap.")
+                            # --- Interactive Location Heatmap ---
+                            st.markdown("<hr class='stDivider'>", unsafe_allow_html=True)
+                            st.markdown("<h3 style='color:#dd2476;'>🔥 Location Price & Yield Heatmap</h3>", unsafe_allow_html=True)
+                            locations = location_trends.data.locations
+                            coordinates = geocoder.geocode_many(f"{l.location} {city}" for l in locations)
+                            heat_data = heat_points(city, locations, coordinates)
+                            if heat_data:
+                                heat_html = get_default_map_layers().heatmap((city_lat, city_lon), heat_data)
+                                with TRACER.span("map_render", map="heatmap", markers=len(heat_data)):
+                                    components.html(heat_html, width=700, height=500)
+                                st.caption("Color intensity shows price per sqft. Pink circles show rental yield.")
+                            else:
+                                st.info("No location trend data available for heatmap.")
         except Exception as e:
             st.error(f"❌ An error occurred: {str(e)}")
 
+    # --- Debug Panel: per-stage latency, token usage and cache hit rates ---
+    with st.expander("🛠️ Debug: Pipeline Timings"):
+        stages = TRACER.stage_summary()
+        if stages:
+            st.dataframe(stages, use_container_width=True)
+            st.dataframe(TRACER.token_usage(), use_container_width=True)
+            st.json(TRACER.cache_stats())
+            st.dataframe(TRACER.recent_spans(20), use_container_width=True)
+        else:
+            st.info("No searches traced yet.")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+from property_agent import PropertyFindingAgent
+from tracing import TRACER
+
+DEFAULT_AGENT_IDLE_SECONDS = float(os.getenv("AGENT_POOL_IDLE_SECONDS", str(30 * 60)))
+DEFAULT_AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_MAX_AGENTS", "32"))
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+PoolKey = Tuple[str, str, str]
+
+def _fingerprint(secret: str) -> str:
+    # Keys are only compared, so keep digests rather than the raw secrets
+    return hashlib.sha256((secret or "").encode()).hexdigest()
+
+class AgentPool:
+    """Thread-safe pool of PropertyFindingAgents shared by every session, keyed by model id and API keys.
+
+    Agents unused for idle_seconds are dropped on the next lookup, and the
+    least recently used agent is dropped when the pool is full.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: float = DEFAULT_AGENT_IDLE_SECONDS,
+        max_agents: int = DEFAULT_AGENT_POOL_SIZE,
+        **agent_kwargs: Any
+    ):
+        self.idle_seconds = idle_seconds
+        self.max_agents = max_agents
+        # Extra PropertyFindingAgent arguments (caches, endpoints) used for every agent
+        self.agent_kwargs = agent_kwargs
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._agents: "OrderedDict[PoolKey, Tuple[PropertyFindingAgent, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, firecrawl_api_key: str, openai_api_key: str, model_id: str = "gpt-3.5-turbo") -> PropertyFindingAgent:
+        """Return the shared agent for these keys and model, creating it on first use"""
+        key = (_fingerprint(firecrawl_api_key), _fingerprint(openai_api_key), model_id)
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            entry = self._agents.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._agents[key] = (entry[0], time.monotonic())
+                self._agents.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+            # Built under the lock so concurrent script runs never create duplicates
+            agent = PropertyFindingAgent(
+                firecrawl_api_key=firecrawl_api_key,
+                openai_api_key=openai_api_key,
+                model_id=model_id,
+                **self.agent_kwargs
+            )
+            self._agents[key] = (agent, time.monotonic())
+            while len(self._agents) > self.max_agents:
+                self._agents.popitem(last=False)
+                self.evictions += 1
+            return agent
+
+    def _evict_idle(self, now: float) -> None:
+        # Entries are in last-used order, so stop at the first one still in use
+        while self._agents:
+            key, (_, last_used) = next(iter(self._agents.items()))
+            if now - last_used <= self.idle_seconds:
+                break
+            del self._agents[key]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size and hit/miss/eviction counters"""
+        with self._lock:
+            size = len(self._agents)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+def get_default_agent_pool() -> AgentPool:
+    """Return the process-wide agent pool shared by every session"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = AgentPool()
+            TRACER.register_stats("agent_pool", _default_pool.stats)
+        return _default_pool
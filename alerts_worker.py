@@ -0,0 +1,265 @@
+"""Background worker that turns saved searches into property alerts.
+
+Saved searches from the Streamlit sidebar are grouped by (city, category,
+type) so a single Firecrawl extract serves every subscriber in the group.
+Each crawl is diffed against the previous snapshot of the group, and new
+listings and listings whose price changed are sent to the sink when they
+are within a subscriber's budget.
+
+Usage:
+    python alerts_worker.py --once
+    python alerts_worker.py --interval 3600 --sink smtp
+"""
+import argparse
+import json
+import os
+import smtplib
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from crawl_state import listing_key
+from extract_cache import DEFAULT_CACHE_DIR
+from pricing import crores_to_rupees, parse_price
+from property_agent import PropertyData, PropertyFindingAgent
+
+# Shared with App.py, which appends to it; resolved next to this module so the worker finds it from any directory
+SAVED_SEARCHES_PATH = os.getenv(
+    "SAVED_SEARCHES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_searches.txt")
+)
+DEFAULT_SNAPSHOT_PATH = os.path.join(DEFAULT_CACHE_DIR, "alert_snapshots.json")
+
+GroupKey = Tuple[str, str, str]
+
+class SavedSearch(BaseModel):
+    """Search criteria saved from the sidebar alerts form"""
+    email: str
+    city: str
+    property_category: str
+    property_type: str
+    max_price: float
+
+    @property
+    def group_key(self) -> GroupKey:
+        return (" ".join(self.city.lower().split()), self.property_category, self.property_type)
+
+def load_saved_searches(path: str = SAVED_SEARCHES_PATH) -> List[SavedSearch]:
+    """Read saved searches, skipping blank or malformed lines"""
+    if not os.path.exists(path):
+        return []
+    searches = []
+    with open(path) as f:
+        for line in f:
+            parts = [part.strip() for part in line.strip().split(",")]
+            if len(parts) != 5 or not parts[0] or not parts[1]:
+                continue
+            try:
+                searches.append(SavedSearch(
+                    email=parts[0], city=parts[1], property_category=parts[2],
+                    property_type=parts[3], max_price=float(parts[4])
+                ))
+            except ValueError:
+                print("Skipping malformed saved search:", line.strip())
+    return searches
+
+def group_searches(searches: List[SavedSearch]) -> Dict[GroupKey, List[SavedSearch]]:
+    """Group subscribers sharing a city, category and type so they share one crawl"""
+    groups: Dict[GroupKey, List[SavedSearch]] = defaultdict(list)
+    seen = set()
+    for search in searches:
+        # The same subscriber saving the same search twice gets one alert
+        identity = (search.email.lower(), search.group_key, search.max_price)
+        if identity not in seen:
+            seen.add(identity)
+            groups[search.group_key].append(search)
+    return dict(groups)
+
+def listing_id(listing: PropertyData) -> str:
+    """Stable id for a listing across crawls: its building and address, so a price change keeps the id"""
+    return listing_key(listing)
+
+class SnapshotStore:
+    """Last seen price of every listing id in each group's previous crawls, kept in a JSON file"""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._snapshots: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                # Snapshots written before prices were tracked are id lists keyed differently; they are re-baselined
+                self._snapshots = {k: v for k, v in json.load(f).items() if isinstance(v, dict)}
+
+    def _key(self, group: GroupKey) -> str:
+        return "|".join(group)
+
+    def get(self, group: GroupKey) -> Optional[Dict[str, str]]:
+        prices = self._snapshots.get(self._key(group))
+        return dict(prices) if prices is not None else None
+
+    def put(self, group: GroupKey, prices: Dict[str, str]) -> None:
+        self._snapshots[self._key(group)] = dict(sorted(prices.items()))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._snapshots, f)
+        os.replace(tmp_path, self.path)
+
+class PriceChange(BaseModel):
+    """A listing seen before whose price changed since"""
+    listing: PropertyData
+    previous_price: str
+
+class AlertSink(ABC):
+    """Destination for alerts; subclasses decide how subscribers are notified"""
+
+    @abstractmethod
+    def send(self, search: SavedSearch, listings: List[PropertyData], price_changes: Sequence[PriceChange] = ()) -> None:
+        """Notify the subscriber of new listings and of price changes on listings seen before"""
+
+class FileAlertSink(AlertSink):
+    """Append alerts as JSON lines to a local file"""
+
+    def __init__(self, path: str = "alerts.jsonl"):
+        self.path = path
+
+    def send(self, search: SavedSearch, listings: List[PropertyData], price_changes: Sequence[PriceChange] = ()) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps({
+                "sent_at": time.time(),
+                "search": search.model_dump(),
+                "listings": [listing.model_dump() for listing in listings],
+                "price_changes": [change.model_dump() for change in price_changes],
+            }) + "\n")
+
+class SmtpAlertSink(AlertSink):
+    """Email alerts over SMTP; pass smtp_factory to substitute a stub server in tests"""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        sender: str = "alerts@ai-real-estate-agent.local",
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        smtp_factory: Callable[[str, int], smtplib.SMTP] = smtplib.SMTP
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.smtp_factory = smtp_factory
+
+    def send(self, search: SavedSearch, listings: List[PropertyData], price_changes: Sequence[PriceChange] = ()) -> None:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = search.email
+        if listings:
+            message["Subject"] = f"{len(listings)} new {search.property_type} listing(s) in {search.city}"
+        else:
+            message["Subject"] = f"Price changes on {len(price_changes)} {search.property_type} listing(s) in {search.city}"
+        lines = [f"- {l.building_name}, {l.location_address}: {l.price}" for l in listings]
+        if price_changes:
+            lines += ["", "Price changes:"] + [
+                f"- {c.listing.building_name}, {c.listing.location_address}: {c.previous_price} -> {c.listing.price}"
+                for c in price_changes
+            ]
+        message.set_content("\n".join(lines))
+        with self.smtp_factory(self.host, self.port) as smtp:
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(message)
+
+def within_budget(listing: PropertyData, max_price: float) -> bool:
+    price = parse_price(listing.price)
+    # Listings without a parseable price are still worth a look
+    return price is None or price <= crores_to_rupees(max_price)
+
+def run_once(
+    agent: PropertyFindingAgent,
+    sink: AlertSink,
+    searches_path: str = SAVED_SEARCHES_PATH,
+    snapshots: Optional[SnapshotStore] = None
+) -> int:
+    """Crawl every saved-search group once and send alerts for new listings and price changes.
+
+    The first crawl of a group only records a baseline snapshot, so new
+    subscribers are not flooded with every existing listing. Returns the
+    number of alerts sent.
+    """
+    snapshots = snapshots or SnapshotStore()
+    alerts_sent = 0
+    for group, subscribers in group_searches(load_saved_searches(searches_path)).items():
+        city, property_category, property_type = group
+        budget = max(s.max_price for s in subscribers)
+        try:
+            listings = agent.crawl_properties(city, budget, property_category, property_type)
+        except Exception as e:
+            print(f"Error crawling {group}:", e)
+            continue
+        if not listings:
+            continue
+        current = {listing_id(l): l for l in listings}
+        previous = snapshots.get(group)
+        snapshots.put(group, {**(previous or {}), **{lid: l.price for lid, l in current.items()}})
+        if previous is None:
+            continue
+        new_listings = [l for lid, l in current.items() if lid not in previous]
+        price_changes = [
+            PriceChange(listing=l, previous_price=previous[lid])
+            for lid, l in current.items()
+            if lid in previous and parse_price(previous[lid]) != parse_price(l.price)
+        ]
+        for subscriber in subscribers:
+            matches = [l for l in new_listings if within_budget(l, subscriber.max_price)]
+            changes = [c for c in price_changes if within_budget(c.listing, subscriber.max_price)]
+            if matches or changes:
+                try:
+                    sink.send(subscriber, matches, changes)
+                    alerts_sent += 1
+                except Exception as e:
+                    print(f"Error sending alert to {subscriber.email}:", e)
+    snapshots.save()
+    return alerts_sent
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Send property alerts for saved searches")
+    parser.add_argument("--searches", default=SAVED_SEARCHES_PATH, help="Saved searches file")
+    parser.add_argument("--snapshots", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot file used for diffing")
+    parser.add_argument("--sink", choices=["file", "smtp"], default="file")
+    parser.add_argument("--alerts-file", default="alerts.jsonl", help="Output file for the file sink")
+    parser.add_argument("--interval", type=float, default=3600, help="Seconds between runs")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+
+    agent = PropertyFindingAgent(
+        firecrawl_api_key=os.getenv("FIRECRAWL_API_KEY", ""),
+        openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+        model_id=os.getenv("OPENAI_MODEL_ID", "gpt-3.5-turbo")
+    )
+    if args.sink == "smtp":
+        sink: AlertSink = SmtpAlertSink(
+            host=os.getenv("SMTP_HOST", "localhost"),
+            port=int(os.getenv("SMTP_PORT", "25")),
+            sender=os.getenv("SMTP_SENDER", "alerts@ai-real-estate-agent.local"),
+            username=os.getenv("SMTP_USERNAME"),
+            password=os.getenv("SMTP_PASSWORD")
+        )
+    else:
+        sink = FileAlertSink(args.alerts_file)
+    snapshots = SnapshotStore(args.snapshots)
+    while True:
+        sent = run_once(agent, sink, args.searches, snapshots)
+        print(f"Sent {sent} alert(s)")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional
+from extract_cache import DEFAULT_CACHE_DIR
+from pricing import parse_price
+
+DEFAULT_ANALYSIS_CACHE_PATH = os.getenv(
+    "ANALYSIS_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "llm_analysis.sqlite3")
+)
+DEFAULT_ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(24 * 3600)))
+DEFAULT_ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1000"))
+# Max differing SimHash bits for a near-duplicate hit; 0 only serves exact matches
+DEFAULT_NEAR_DUPLICATE_BITS = int(os.getenv("ANALYSIS_CACHE_NEAR_DUPLICATE_BITS", "0"))
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+class AnalysisKey(NamedTuple):
+    """Where an analysis is cached: the model/prompt scope, the exact payload digest and its SimHash"""
+    scope: str
+    digest: str
+    simhash: int
+
+def _round(value: float) -> float:
+    # Three significant digits, so re-scraped prices per sqft or yields that barely moved compare equal
+    return float(f"{value:.3g}")
+
+def _canonical_value(field: str, value: Any) -> Any:
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return _round(float(value))
+    if isinstance(value, str):
+        if field == "price":
+            rupees = parse_price(value)
+            if rupees is not None:
+                return _round(rupees)
+        return " ".join(value.lower().split())
+    return value
+
+def canonicalize_records(records: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Order-independent form of the prompt records: normalized text, prices in rupees, rounded numbers"""
+    canonical = [
+        {field: _canonical_value(field, value) for field, value in sorted(record.items())}
+        for record in records
+    ]
+    return sorted(canonical, key=lambda r: json.dumps(r, sort_keys=True, default=str))
+
+def simhash(records: List[Dict[str, Any]]) -> int:
+    """64-bit SimHash over the field=value and word tokens of canonical records"""
+    weights = [0] * 64
+    for record in records:
+        for field, value in record.items():
+            tokens = [f"{field}={value}"]
+            if isinstance(value, str):
+                tokens += value.split()
+            for token in tokens:
+                h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+                for bit in range(64):
+                    weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def make_analysis_key(
+    model_id: str,
+    prompt_version: str,
+    records: Iterable[Mapping[str, Any]],
+    context: Optional[Mapping[str, Any]] = None
+) -> AnalysisKey:
+    """Build the cache key for an analysis of records with a given model and prompt template version"""
+    canonical = canonicalize_records(records)
+    scope = hashlib.sha256(json.dumps(
+        {"model": model_id, "prompt": prompt_version, "context": {k: _canonical_value(k, v) for k, v in (context or {}).items()}},
+        sort_keys=True, default=str
+    ).encode()).hexdigest()
+    digest = hashlib.sha256((scope + json.dumps(canonical, sort_keys=True, default=str)).encode()).hexdigest()
+    return AnalysisKey(scope, digest, simhash(canonical))
+
+class AnalysisCache:
+    """SQLite-backed TTL cache for LLM analyses with LRU eviction and optional near-duplicate matching"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_ANALYSIS_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_ANALYSIS_CACHE_TTL,
+        max_entries: int = DEFAULT_ANALYSIS_CACHE_SIZE,
+        near_duplicate_bits: int = DEFAULT_NEAR_DUPLICATE_BITS
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.near_duplicate_bits = near_duplicate_bits
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS analysis_cache (
+                    digest TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    simhash TEXT NOT NULL,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_scope ON analysis_cache (scope)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_access ON analysis_cache (last_access)")
+
+    def get(self, key: AnalysisKey) -> Optional[str]:
+        """Return the cached analysis for key (or, if enabled, for a near-duplicate payload)"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT digest, analysis FROM analysis_cache WHERE digest = ? AND created_at >= ?",
+                (key.digest, now - self.ttl_seconds)
+            ).fetchone()
+            near = False
+            if row is None and self.near_duplicate_bits > 0:
+                # Candidates share the model, prompt version and context, so this scan stays small
+                candidates = self._conn.execute(
+                    "SELECT digest, analysis, simhash FROM analysis_cache WHERE scope = ? AND created_at >= ?",
+                    (key.scope, now - self.ttl_seconds)
+                ).fetchall()
+                distances = [(bin(int(c[2], 16) ^ key.simhash).count("1"), c) for c in candidates]
+                distances = [d for d in distances if d[0] <= self.near_duplicate_bits]
+                if distances:
+                    row, near = min(distances, key=lambda d: d[0])[1][:2], True
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE analysis_cache SET last_access = ? WHERE digest = ?", (now, row[0]))
+            if near:
+                self.near_hits += 1
+            else:
+                self.hits += 1
+            return row[1]
+
+    def set(self, key: AnalysisKey, analysis: str) -> None:
+        """Store an analysis and evict expired and least recently used entries"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key.digest, key.scope, f"{key.simhash:016x}", analysis, now, now)
+            )
+            self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                """DELETE FROM analysis_cache WHERE digest IN (
+                    SELECT digest FROM analysis_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        """Remove every cached analysis"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return exact/near-duplicate hit and miss counters and the current number of entries"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        total = self.hits + self.near_hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / total if total else 0.0,
+            "entries": size,
+        }
+
+def get_default_analysis_cache() -> AnalysisCache:
+    """Return the process-wide analysis cache shared by every agent"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache()
+        return _default_cache
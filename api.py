@@ -0,0 +1,333 @@
+"""Headless REST API around PropertyFindingAgent for other internal tools.
+
+Handlers are async; the blocking Firecrawl/OpenAI work runs on a bounded
+worker pool, and a streamed search keeps its slot until the stream ends.
+Batches run on a separate, smaller pool with a longer timeout. Requests
+beyond a pool's queue limit are rejected with 429 and a Retry-After
+header, and requests that take longer than the timeout get a 504. An
+invalid city gets a 400 and a search whose listings, trends or analysis
+could not be fetched gets a 502. Every node is stateless apart from its
+local caches, so instances can sit behind any load balancer that checks
+/health.
+
+Usage:
+    python api.py --host 0.0.0.0 --port 8000
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Endpoints:
+    GET  /health                   pool occupancy, for load balancer checks
+    GET  /stats                    per-stage timings and cache hit rates
+    POST /search                   {"city", "max_price", "property_category", "property_type", "filters"}
+    POST /search?stream=true       the same, streaming the analysis as plain text
+    GET  /trends?city=pune         locality price trends and their analysis
+    POST /batch                    {"queries": [...], "include_trends": false}
+
+The Firecrawl and OpenAI keys come from the environment and can be
+overridden per request with the X-Firecrawl-Key and X-OpenAI-Key headers;
+the X-Model-Id header overrides OPENAI_MODEL_ID the same way.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+from agent_pool import get_default_agent_pool
+from batch_search import DEFAULT_BATCH_WORKERS, BatchQuery, run_batch
+from property_agent import PropertyFindingAgent, SearchInputError
+from property_store import PropertyFilters
+from tracing import TRACER
+
+load_dotenv()
+
+DEFAULT_API_WORKERS = int(os.getenv("API_WORKERS", "8"))
+# Requests allowed to wait for a worker before new ones are turned away with 429
+DEFAULT_API_MAX_PENDING = int(os.getenv("API_MAX_PENDING", "32"))
+DEFAULT_API_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT_SECONDS", "120"))
+DEFAULT_API_BATCH_MAX_QUERIES = int(os.getenv("API_BATCH_MAX_QUERIES", "50"))
+# Batches run many searches each, so they get their own pool and a timeout sized for whole batches
+DEFAULT_API_BATCH_WORKERS = int(os.getenv("API_BATCH_WORKERS", "2"))
+DEFAULT_API_BATCH_MAX_PENDING = int(os.getenv("API_BATCH_MAX_PENDING", "2"))
+DEFAULT_API_BATCH_TIMEOUT = float(os.getenv("API_BATCH_TIMEOUT_SECONDS", "900"))
+
+class Overloaded(Exception):
+    """Raised when the worker pool's queue is full"""
+
+class RequestTimeout(Exception):
+    """Raised when a call outlives its request's timeout"""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"Request took longer than {seconds:g}s")
+        self.seconds = seconds
+
+class WorkerPool:
+    """Bounded thread pool for the blocking agent calls.
+
+    A slot is held from submission until the call finishes, even when the
+    request that started it has already timed out, so a slow upstream
+    fills the queue and sheds load instead of piling up threads.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_API_WORKERS, max_pending: int = DEFAULT_API_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self.timeouts = 0
+        self._in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-worker")
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self._submit(fn, args, kwargs, hold=False)
+
+    def _submit(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], hold: bool) -> Future:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise Overloaded()
+            self._in_flight += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        # A held slot outlives a successful call and is given back through releaser()
+        future.add_done_callback(self._release_failed if hold else self._release)
+        return future
+
+    def _release(self, _: Optional[Future] = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _release_failed(self, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self._release()
+
+    def _release_succeeded(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self._release()
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: float = DEFAULT_API_TIMEOUT,
+        hold: bool = False,
+        **kwargs: Any
+    ) -> Any:
+        """Run fn on the pool and await its result; raises Overloaded or RequestTimeout.
+
+        With hold=True the slot stays taken after fn returns successfully,
+        until the function returned by releaser() is called.
+        """
+        future = self._submit(fn, args, kwargs, hold)
+        try:
+            # shield: a timed-out call keeps running (and holding its slot) instead of being cancelled mid-request
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            if hold:
+                # Nobody will release the result of a call that finishes after its request gave up
+                future.add_done_callback(self._release_succeeded)
+            raise RequestTimeout(timeout)
+
+    def releaser(self) -> Callable[[], None]:
+        """Release a slot held by run(hold=True); calling the returned function more than once is harmless"""
+        released = threading.Event()
+
+        def release() -> None:
+            if not released.is_set():
+                released.set()
+                self._release()
+        return release
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of calls in flight and how many requests were rejected or timed out"""
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "in_flight": in_flight,
+            "capacity": self.max_workers + self.max_pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+class HeldStreamingResponse(StreamingResponse):
+    """StreamingResponse that gives back a held worker slot however the response ends.
+
+    The release wraps the whole response rather than the body, so a client
+    that disconnects before the first chunk does not leak the slot.
+    """
+
+    def __init__(self, content: Any, release: Callable[[], None], **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+class SearchRequest(BaseModel):
+    """Body of POST /search; max_price is in crores"""
+    city: str
+    max_price: float
+    property_category: str = "Residential"
+    property_type: str = "Flat"
+    filters: Optional[PropertyFilters] = None
+
+class BatchRequest(BaseModel):
+    """Body of POST /batch"""
+    queries: List[BatchQuery] = Field(min_length=1)
+    include_trends: bool = False
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+def _frame_records(df) -> List[Dict[str, Any]]:
+    # to_json turns NaN into null, which the plain json encoder would not
+    return json.loads(df.to_json(orient="records")) if not df.empty else []
+
+def create_app(
+    workers: Optional[WorkerPool] = None,
+    agent_factory: Optional[Callable[[Request], PropertyFindingAgent]] = None,
+    timeout: float = DEFAULT_API_TIMEOUT,
+    batch_max_queries: int = DEFAULT_API_BATCH_MAX_QUERIES,
+    batch_workers: Optional[WorkerPool] = None,
+    batch_timeout: float = DEFAULT_API_BATCH_TIMEOUT
+) -> Starlette:
+    """Build the ASGI app; agent_factory picks the agent for a request (the shared agent pool by default)"""
+    workers = workers or WorkerPool()
+    batch_workers = batch_workers or WorkerPool(DEFAULT_API_BATCH_WORKERS, DEFAULT_API_BATCH_MAX_PENDING)
+    TRACER.register_stats("api_workers", workers.stats)
+    TRACER.register_stats("api_batch_workers", batch_workers.stats)
+
+    def pooled_agent(request: Request) -> PropertyFindingAgent:
+        return get_default_agent_pool().get(
+            request.headers.get("x-firecrawl-key") or os.getenv("FIRECRAWL_API_KEY", ""),
+            request.headers.get("x-openai-key") or os.getenv("OPENAI_API_KEY", ""),
+            request.headers.get("x-model-id") or os.getenv("OPENAI_MODEL_ID", "gpt-3.5-turbo")
+        )
+
+    agent_factory = agent_factory or pooled_agent
+
+    def validated(method: str) -> Callable[..., Any]:
+        # The agent reports bad input inside its result; checking first lets SearchInputError become a 400
+        def run(agent: PropertyFindingAgent, city: str, *args: Any) -> Any:
+            agent.listing_urls(city)
+            return getattr(agent, method)(city, *args)
+        return run
+
+    def failed(result: Any) -> Optional[Response]:
+        # Listings, trends or the analysis could not be fetched from the upstream services
+        return _error(502, f"Search failed: {result.error}") if result.error else None
+
+    async def call(
+        request: Request,
+        fn: Callable[..., Any],
+        *args: Any,
+        pool: Optional[WorkerPool] = None,
+        limit: Optional[float] = None,
+        hold: bool = False
+    ) -> Any:
+        # The agent is looked up on the worker too, since building one creates the SDK clients
+        return await (pool or workers).run(
+            lambda: fn(agent_factory(request), *args), timeout=limit or timeout, hold=hold
+        )
+
+    def handle_errors(endpoint: Callable[[Request], Any]) -> Callable[[Request], Any]:
+        async def wrapper(request: Request) -> Response:
+            try:
+                return await endpoint(request)
+            except Overloaded:
+                return _error(429, "Too many requests in progress, retry shortly", {"Retry-After": "5"})
+            except RequestTimeout as e:
+                return _error(504, str(e))
+            except ValidationError as e:
+                return JSONResponse({"error": "Invalid request", "details": json.loads(e.json())}, status_code=422)
+            except json.JSONDecodeError:
+                return _error(400, "Request body must be JSON")
+            except SearchInputError as e:
+                return _error(400, str(e))
+            except Exception as e:
+                print("Error in API request:", e)
+                return _error(500, f"Error: {str(e)}")
+        return wrapper
+
+    async def health(request: Request) -> Response:
+        stats = workers.stats()
+        # 503 while the queue is full, so load balancers route new searches to other nodes
+        busy = stats["in_flight"] >= stats["capacity"]
+        return JSONResponse({"status": "busy" if busy else "ok", **stats}, status_code=503 if busy else 200)
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse({"stages": TRACER.stage_summary(), "caches": TRACER.cache_stats()})
+
+    @handle_errors
+    async def search(request: Request) -> Response:
+        query = SearchRequest.model_validate(await request.json())
+        args = (query.city, query.max_price, query.property_category, query.property_type, query.filters)
+        if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+            stream = await call(request, validated("find_properties_stream"), *args, hold=True)
+            release = workers.releaser()
+            if stream.metadata.get("error"):
+                release()
+                return failed(stream.result())
+            # The analysis is still being generated while it streams, so its slot is
+            # held until the last chunk is sent or the client goes away
+            return HeldStreamingResponse(iter(stream), release, media_type="text/plain; charset=utf-8")
+        result = await call(request, validated("find_properties"), *args)
+        return failed(result) or JSONResponse(result.model_dump())
+
+    @handle_errors
+    async def trends(request: Request) -> Response:
+        city = request.query_params.get("city", "").strip()
+        if not city:
+            return _error(400, "Query parameter 'city' is required")
+        result = await call(request, validated("get_location_trends"), city)
+        return failed(result) or JSONResponse(result.model_dump())
+
+    @handle_errors
+    async def batch(request: Request) -> Response:
+        body = BatchRequest.model_validate(await request.json())
+        if len(body.queries) > batch_max_queries:
+            return _error(413, f"At most {batch_max_queries} queries per batch")
+        result = await call(
+            request,
+            lambda agent: run_batch(agent, body.queries, max_workers=DEFAULT_BATCH_WORKERS, include_trends=body.include_trends),
+            pool=batch_workers,
+            limit=batch_timeout
+        )
+        return JSONResponse({
+            "listings": _frame_records(result.listings),
+            "trends": _frame_records(result.trends),
+            "errors": result.errors,
+        })
+
+    return Starlette(routes=[
+        Route("/health", health),
+        Route("/stats", stats),
+        Route("/search", search, methods=["POST"]),
+        Route("/trends", trends),
+        Route("/batch", batch, methods=["POST"]),
+    ])
+
+app = create_app()
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the property search REST API")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import base64
+import io
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+from PIL import Image
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Longest edge of the resized assets: twice the largest on-page size for high-DPI screens
+LOGO_MAX_PX = 300
+AI_LOGO_MAX_PX = 440
+DEVELOPER_MAX_PX = 600
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+@lru_cache(maxsize=16)
+def _compressed(path: str, max_px: int, mtime: float) -> Tuple[bytes, str]:
+    image = Image.open(path)
+    image.thumbnail((max_px, max_px), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if image.mode in ("RGBA", "LA", "P"):
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue(), "image/png"
+    image.convert("RGB").save(buffer, format="JPEG", quality=85, optimize=True, progressive=True)
+    return buffer.getvalue(), "image/jpeg"
+
+def image_bytes(name: str, max_px: int) -> Optional[bytes]:
+    """Resized, compressed bytes of an asset, computed once per process and file version"""
+    path = os.path.join(ASSET_DIR, name)
+    mtime = _mtime(path)
+    if mtime is None:
+        return None
+    return _compressed(path, max_px, mtime)[0]
+
+@lru_cache(maxsize=16)
+def _data_uri(path: str, max_px: int, mtime: float) -> str:
+    data, mime = _compressed(path, max_px, mtime)
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+def image_data_uri(name: str, max_px: int) -> Optional[str]:
+    """Inline data URI for a resized asset, or None if the file is missing"""
+    path = os.path.join(ASSET_DIR, name)
+    mtime = _mtime(path)
+    if mtime is None:
+        return None
+    return _data_uri(path, max_px, mtime)
@@ -0,0 +1,193 @@
+"""Multi-city batch search for scanning many cities in one run.
+
+Queries that share a listing URL set (same city, category and type) are
+served by a single Firecrawl extract crawled at the largest budget in the
+group, and each query then reads its own budget back from the property
+store. Extracts run with bounded concurrency over one pooled HTTP session.
+Unlike interactive searches, a batch waits for slow sources (up to
+BATCH_SOURCE_DEADLINE_SECONDS); sources that still miss it or fail are
+listed in the errors, and their queries use the last known listings.
+
+Usage:
+    python batch_search.py queries.csv -o results.parquet
+    python batch_search.py queries.csv -o results.csv --workers 4 --trends
+
+The queries file is a CSV (or JSON lines) with the columns city, max_price
+(crores) and optionally property_category and property_type.
+"""
+import argparse
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+import pandas as pd
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, ValidationError
+from extract_jobs import DEFAULT_JOB_TIMEOUT
+from http_pool import make_session
+from listing_dedup import dedup_listings
+from property_agent import LocationData, PropertyData, PropertyFindingAgent, SearchInputError
+from ranking import rank_properties
+
+DEFAULT_BATCH_WORKERS = 8
+# Nobody is waiting interactively, so a batch waits for sources as long as their extract jobs may run
+DEFAULT_BATCH_SOURCE_DEADLINE = float(os.getenv("BATCH_SOURCE_DEADLINE_SECONDS", str(DEFAULT_JOB_TIMEOUT)))
+
+CrawlKey = Tuple[Tuple[str, ...], str, str]
+
+class BatchQuery(BaseModel):
+    """One row of a batch: a city and budget (crores) with the listing filters"""
+    city: str
+    max_price: float
+    property_category: str = "Residential"
+    property_type: str = "Flat"
+
+class BatchResult(BaseModel):
+    """Ranked listings and locality trends of a batch, plus per-query errors"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    listings: pd.DataFrame
+    trends: pd.DataFrame
+    errors: Dict[str, str]
+
+def load_queries(path: str) -> List[BatchQuery]:
+    """Read batch queries from a CSV or JSON lines file, skipping invalid rows"""
+    df = pd.read_json(path, lines=True) if path.endswith((".jsonl", ".json")) else pd.read_csv(path)
+    queries = []
+    for row in df.dropna(how="all").to_dict("records"):
+        try:
+            queries.append(BatchQuery.model_validate({k: v for k, v in row.items() if pd.notna(v)}))
+        except ValidationError as e:
+            print("Skipping invalid batch query:", row, e)
+    return queries
+
+def _label(query: BatchQuery) -> str:
+    return f"{query.city} / {query.property_category} / {query.property_type} / {query.max_price} Cr"
+
+def run_batch(
+    agent: PropertyFindingAgent,
+    queries: List[BatchQuery],
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    include_trends: bool = False,
+    source_deadline_seconds: float = DEFAULT_BATCH_SOURCE_DEADLINE
+) -> BatchResult:
+    """Crawl, store and rank the listings for every query with at most max_workers extracts in flight"""
+    errors: Dict[str, str] = {}
+    # Queries without results; the others may still carry a warning in errors
+    failed: Set[str] = set()
+    groups: Dict[CrawlKey, List[BatchQuery]] = defaultdict(list)
+    for query in queries:
+        try:
+            urls = tuple(agent.listing_urls(query.city))
+        except SearchInputError as e:
+            errors[_label(query)] = str(e)
+            failed.add(_label(query))
+            continue
+        groups[(urls, query.property_category, query.property_type)].append(query)
+    cities = sorted({group[0].city.lower().strip() for group in groups.values()})
+    print(f"Batch: {len(queries)} queries, {len(groups)} listing extracts, {len(cities) if include_trends else 0} trend extracts")
+
+    def crawl(group: List[BatchQuery]) -> None:
+        budget = max(q.max_price for q in group)
+        first = group[0]
+        try:
+            if agent.property_store.is_fresh(first.city, first.property_category, first.property_type, budget):
+                return
+            _, sources = agent.crawl_listing_sources(
+                first.city, budget, first.property_category, first.property_type, deadline_seconds=source_deadline_seconds
+            )
+        except Exception as e:
+            print("Error in batch crawl:", e)
+            for query in group:
+                errors[_label(query)] = f"Error: {str(e)}"
+                failed.add(_label(query))
+            return
+        degraded = [f"{source} ({status})" for source, status in sources.items() if status in ("late", "failed")]
+        if degraded:
+            for query in group:
+                errors[_label(query)] = f"Incomplete: {', '.join(degraded)} served from the last known listings"
+
+    def trends(city: str) -> Tuple[str, List[LocationData]]:
+        try:
+            return city, agent.fetch_locations(city).locations
+        except Exception as e:
+            print("Error in batch trends:", e)
+            return city, []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-search") as executor:
+        trend_futures = [executor.submit(trends, city) for city in cities] if include_trends else []
+        list(executor.map(crawl, groups.values()))
+        locations = dict(f.result() for f in trend_futures)
+
+    frames = []
+    for group in groups.values():
+        for query in group:
+            if _label(query) in failed:
+                continue
+            stored = agent.property_store.query(
+                query.city, query.property_category, query.property_type, max_price=query.max_price
+            )
+            properties = dedup_listings([
+                PropertyData(
+                    building_name=p.building_name,
+                    property_type=p.listing_type,
+                    location_address=p.location_address,
+                    price=p.price,
+                    description=p.description,
+                    sources=p.sources
+                )
+                for p in stored
+            ], query.city, agent.geocoder.lookup)
+            ranked = rank_properties(properties, query.max_price, locations=locations.get(query.city.lower().strip()))
+            frames.append(ranked.assign(
+                city=query.city,
+                property_category=query.property_category,
+                property_type=query.property_type,
+                max_price=query.max_price
+            ))
+    listings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if not listings.empty:
+        leading = ["city", "property_category", "property_type", "max_price"]
+        listings = listings[leading + [c for c in listings.columns if c not in leading]]
+    trends_df = pd.DataFrame([
+        {"city": city, **loc.model_dump()} for city, locs in locations.items() for loc in locs
+    ])
+    return BatchResult(listings=listings, trends=trends_df, errors=errors)
+
+def write_results(df: pd.DataFrame, path: str) -> None:
+    """Write a result frame as Parquet (needs pyarrow) or CSV, chosen by the file extension"""
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def _trends_path(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}_trends{ext}"
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Search many cities in one batch")
+    parser.add_argument("queries", help="CSV or JSON lines file with city, max_price, property_category, property_type")
+    parser.add_argument("-o", "--output", default="batch_results.csv", help="Output file (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS, help="Concurrent Firecrawl extracts")
+    parser.add_argument("--trends", action="store_true", help="Also extract locality trends, written next to the output")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.queries)
+    agent = PropertyFindingAgent(
+        firecrawl_api_key=os.getenv("FIRECRAWL_API_KEY", ""),
+        openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+        model_id=os.getenv("OPENAI_MODEL_ID", "gpt-3.5-turbo"),
+        http_session=make_session(args.workers)
+    )
+    result = run_batch(agent, queries, max_workers=args.workers, include_trends=args.trends)
+    write_results(result.listings, args.output)
+    print(f"Wrote {len(result.listings)} listing(s) to {args.output}")
+    if args.trends:
+        write_results(result.trends, _trends_path(args.output))
+        print(f"Wrote {len(result.trends)} locality trend(s) to {_trends_path(args.output)}")
+    for label, error in result.errors.items():
+        print(f"{label}: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Offline latency and throughput benchmark for the property search pipeline.
+
+Runs PropertyFindingAgent.search plus the map geocoding against the local
+stand-ins in fake_services.py, so no network access or API keys are needed.
+
+Scenarios:
+    single      sequential searches, each against empty caches
+    concurrent  several users searching at once against shared caches
+    cache       the same searches with cold caches, then again warm
+
+Usage:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --scenario concurrent --users 16 --firecrawl-latency 2
+    python -m benchmarks.bench_search --json bench.json --max-p95 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from analysis_cache import AnalysisCache
+from benchmarks.fake_services import FakeServices, Latency
+from crawl_state import CrawlState
+from extract_cache import ExtractCache
+from extract_jobs import ExtractJobManager
+from geocoder import Geocoder
+from property_agent import PropertyFindingAgent
+from property_store import PropertyStore
+from tracing import TRACER
+from trend_snapshots import TrendSnapshotStore
+
+CITIES = ["pune", "mumbai", "bangalore", "hyderabad", "chennai", "delhi", "kolkata", "ahmedabad"]
+
+class Pipeline:
+    """One agent and geocoder wired to the stand-ins, with their own in-memory caches"""
+
+    def __init__(self, services: FakeServices, stream: bool, geocode_interval: float):
+        self.stream = stream
+        self.geocoder = Geocoder(cache_path=":memory:", base_url=services.nominatim_url, min_interval=geocode_interval)
+        self.agent = PropertyFindingAgent(
+            firecrawl_api_key="fc-bench",
+            openai_api_key="sk-bench",
+            extract_cache=ExtractCache(":memory:"),
+            extract_jobs=ExtractJobManager(":memory:"),
+            property_store=PropertyStore(":memory:"),
+            analysis_cache=AnalysisCache(":memory:"),
+            crawl_state=CrawlState(":memory:"),
+            trend_snapshots=TrendSnapshotStore(":memory:"),
+            firecrawl_api_url=services.firecrawl_url,
+            openai_base_url=services.openai_url,
+            geocoder=self.geocoder
+        )
+
+    def search(self, city: str) -> Dict[str, float]:
+        """Run one search the way the app does and return its timings in seconds"""
+        started = time.perf_counter()
+        futures = self.agent.search(city, 1.5, "Residential", "Flat", stream=self.stream)
+        results = {name: future.result() for name, future in futures.items()}
+        timings: Dict[str, float] = {}
+        if self.stream:
+            streams, results = results, {name: stream.result() for name, stream in results.items()}
+            # ttft is when the templated facts appear, model_ttft when the model's own analysis starts
+            for name, attr in (("ttft", "time_to_first_token"), ("model_ttft", "time_to_first_model_token")):
+                first_tokens = [getattr(s, attr) for s in streams.values() if getattr(s, attr) is not None]
+                if first_tokens:
+                    timings[name] = min(first_tokens)
+        self.geocoder.geocode_many(p.location_address for p in results["properties"].data.properties)
+        timings["latency"] = time.perf_counter() - started
+        return timings
+
+def summarize(name: str, samples: List[Dict[str, float]], wall: float) -> Dict[str, object]:
+    latencies = np.array([s["latency"] for s in samples])
+    summary: Dict[str, object] = {
+        "scenario": name,
+        "searches": len(samples),
+        "p50": round(float(np.percentile(latencies, 50)), 3),
+        "p95": round(float(np.percentile(latencies, 95)), 3),
+        "mean": round(float(latencies.mean()), 3),
+        "throughput": round(len(samples) / wall, 3) if wall else 0.0,
+    }
+    for name in ("ttft", "model_ttft"):
+        ttft = [s[name] for s in samples if name in s]
+        if ttft:
+            summary[f"{name}_p50"] = round(float(np.percentile(ttft, 50)), 3)
+            summary[f"{name}_p95"] = round(float(np.percentile(ttft, 95)), 3)
+    return summary
+
+def timed(name: str, run: Callable[[], List[Dict[str, float]]]) -> Dict[str, object]:
+    started = time.perf_counter()
+    samples = run()
+    return summarize(name, samples, time.perf_counter() - started)
+
+def run_single(make_pipeline: Callable[[], Pipeline], args) -> List[Dict[str, object]]:
+    # A fresh pipeline per search so every run pays for the extracts
+    return [timed("single", lambda: [make_pipeline().search(CITIES[i % len(CITIES)]) for i in range(args.searches)])]
+
+def run_concurrent(make_pipeline: Callable[[], Pipeline], args) -> List[Dict[str, object]]:
+    pipeline = make_pipeline()
+
+    def user(index: int) -> List[Dict[str, float]]:
+        return [pipeline.search(CITIES[(index + i) % len(CITIES)]) for i in range(args.searches)]
+
+    def run() -> List[Dict[str, float]]:
+        with ThreadPoolExecutor(max_workers=args.users) as executor:
+            return [sample for samples in executor.map(user, range(args.users)) for sample in samples]
+    return [timed(f"concurrent_{args.users}_users", run)]
+
+def run_cache(make_pipeline: Callable[[], Pipeline], args) -> List[Dict[str, object]]:
+    pipeline = make_pipeline()
+    cities = [CITIES[i % len(CITIES)] for i in range(args.searches)]
+    cold = timed("cache_cold", lambda: [pipeline.search(city) for city in cities])
+    warm = timed("cache_warm", lambda: [pipeline.search(city) for city in cities])
+    return [cold, warm]
+
+SCENARIOS = {"single": run_single, "concurrent": run_concurrent, "cache": run_cache}
+
+def print_table(results: List[Dict[str, object]]) -> None:
+    print(f"{'scenario':<24}{'searches':>9}{'p50 s':>9}{'p95 s':>9}{'mean s':>9}{'ttft p50':>10}{'model ttft':>12}{'req/s':>9}")
+    for r in results:
+        ttft = f"{r['ttft_p50']:.3f}" if "ttft_p50" in r else "-"
+        model_ttft = f"{r['model_ttft_p50']:.3f}" if "model_ttft_p50" in r else "-"
+        print(
+            f"{r['scenario']:<24}{r['searches']:>9}{r['p50']:>9.3f}{r['p95']:>9.3f}{r['mean']:>9.3f}"
+            f"{ttft:>10}{model_ttft:>12}{r['throughput']:>9.2f}"
+        )
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the property search pipeline against local API stand-ins")
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--searches", type=int, default=5, help="Searches per scenario (per user for concurrent)")
+    parser.add_argument("--users", type=int, default=8, help="Simultaneous users in the concurrent scenario")
+    parser.add_argument("--stream", action="store_true", help="Stream the analyses and report the time to the first token and to the model's first token")
+    parser.add_argument("--firecrawl-latency", type=float, default=0.5, help="Seconds per extract")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Seconds before the first completion byte")
+    parser.add_argument("--nominatim-latency", type=float, default=0.05, help="Seconds per geocode")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency jitter as a fraction of the base latency")
+    parser.add_argument("--geocode-interval", type=float, default=0.0,
+                        help="Geocoder rate limit; the live Nominatim policy is 1.0")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--max-p95", type=float, help="Exit non-zero if any scenario's p95 exceeds this many seconds")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's own log output")
+    args = parser.parse_args(argv)
+
+    services = FakeServices(
+        firecrawl_latency=Latency(args.firecrawl_latency, args.jitter),
+        openai_latency=Latency(args.openai_latency, args.jitter),
+        nominatim_latency=Latency(args.nominatim_latency, args.jitter)
+    )
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results: List[Dict[str, object]] = []
+    with services, open(os.devnull, "w") as devnull:
+        make_pipeline = lambda: Pipeline(services, args.stream, args.geocode_interval)
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull):
+            for name in scenarios:
+                results += SCENARIOS[name](make_pipeline, args)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "results": results,
+                "requests": dict(services.requests),
+                "stages": TRACER.stage_summary(),
+                "config": vars(args),
+            }, f, indent=2)
+    if args.max_p95 is not None:
+        slow = [r["scenario"] for r in results if r["p95"] > args.max_p95]
+        if slow:
+            print(f"p95 above {args.max_p95}s in: {', '.join(slow)}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
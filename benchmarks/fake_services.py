@@ -0,0 +1,266 @@
+"""Local stand-ins for the Firecrawl extract, OpenAI chat and Nominatim APIs.
+
+Responses are replayed from the recorded fixtures in benchmarks/fixtures and
+delayed by a configurable latency, so the search pipeline can be measured
+end to end without network access or API keys.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(name: str) -> Any:
+    path = os.path.join(FIXTURE_DIR, name)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f) if name.endswith(".json") else f.read()
+
+class Latency:
+    """Injected response delay: a base time with +/- jitter as a fraction of it"""
+
+    def __init__(self, seconds: float = 0.0, jitter: float = 0.1):
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def sample(self, rng: random.Random) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return max(0.0, self.seconds * rng.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def sleep(self, rng: random.Random) -> None:
+        seconds = self.sample(rng)
+        if seconds > 0:
+            time.sleep(seconds)
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that ignores clients hanging up mid-response, so benchmark output stays clean"""
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients time out, cancel extract polls and close streams early; only real errors get a traceback
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+class FakeServices:
+    """Serves all three stand-in APIs from one local HTTP server on a background thread.
+
+    Usage:
+        with FakeServices(firecrawl_latency=Latency(2.0)) as services:
+            agent = PropertyFindingAgent("fc-key", "sk-key",
+                firecrawl_api_url=services.firecrawl_url, openai_base_url=services.openai_url)
+    """
+
+    def __init__(
+        self,
+        firecrawl_latency: Optional[Latency] = None,
+        openai_latency: Optional[Latency] = None,
+        nominatim_latency: Optional[Latency] = None,
+        stream_chunk_delay: float = 0.01,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.firecrawl_latency = firecrawl_latency or Latency()
+        self.openai_latency = openai_latency or Latency()
+        self.nominatim_latency = nominatim_latency or Latency()
+        # Delay between streamed chat completion chunks
+        self.stream_chunk_delay = stream_chunk_delay
+        self.requests: Counter = Counter()
+        self._properties = load_fixture("firecrawl_properties.json")
+        self._locations = load_fixture("firecrawl_locations.json")
+        self._analysis = load_fixture("openai_analysis.md")
+        self._places = load_fixture("nominatim_search.json")
+        self._rng = random.Random(seed)
+        # Extract jobs by id: when they finish and what they return
+        self._extract_jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._server = QuietHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def firecrawl_url(self) -> str:
+        return self.base_url
+
+    @property
+    def openai_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def nominatim_url(self) -> str:
+        return f"{self.base_url}/search"
+
+    def start(self) -> "FakeServices":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread = None
+
+    def __enter__(self) -> "FakeServices":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _delay(self, latency: Latency) -> None:
+        with self._lock:
+            rng = random.Random(self._rng.random())
+        latency.sleep(rng)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.requests[name] += 1
+
+    def extract_response(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Start an extract job for the fixture matching the requested schema; it completes after the latency"""
+        self._count("firecrawl_extract")
+        wants_locations = "locations" in ((body.get("schema") or {}).get("properties") or {})
+        with self._lock:
+            job_id = f"extract-{len(self._extract_jobs) + 1}"
+            self._extract_jobs[job_id] = {
+                "done_at": time.time() + self.firecrawl_latency.sample(random.Random(self._rng.random())),
+                "data": self._locations if wants_locations else self._properties,
+            }
+        return {"success": True, "id": job_id, "status": "processing"}
+
+    def extract_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of an extract job, or None for an unknown id"""
+        self._count("firecrawl_extract_status")
+        with self._lock:
+            job = self._extract_jobs.get(job_id)
+        if job is None:
+            return None
+        if time.time() < job["done_at"]:
+            return {"success": True, "id": job_id, "status": "processing"}
+        return {
+            "success": True,
+            "id": job_id,
+            "status": "completed",
+            "data": job["data"],
+            "expiresAt": "2099-01-01T00:00:00Z",
+        }
+
+    def chat_usage(self, body: Dict[str, Any]) -> Dict[str, int]:
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages") or [])
+        # Roughly four characters per token, close enough for cost tracing
+        prompt_tokens, completion_tokens = prompt_chars // 4, len(self._analysis) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def chat_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._count("openai_chat")
+        self._delay(self.openai_latency)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self._analysis},
+                "finish_reason": "stop",
+            }],
+            "usage": self.chat_usage(body),
+        }
+
+    def chat_completion_chunks(self, body: Dict[str, Any]):
+        """Server-sent chunks of a streamed completion; the latency applies before the first one"""
+        self._count("openai_chat")
+        self._delay(self.openai_latency)
+        base = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model", "gpt-3.5-turbo")}
+        words = self._analysis.split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == len(words) - 1 else word + " "
+            yield {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            if self.stream_chunk_delay:
+                time.sleep(self.stream_chunk_delay)
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": self.chat_usage(body)}
+
+    def search_places(self, query: str) -> Any:
+        self._count("nominatim_search")
+        self._delay(self.nominatim_latency)
+        return self._places
+
+    def _handler_class(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _send_json(self, payload: Any, status: int = 200) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_events(self, events) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event in events:
+                    self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                path = self.path.split("?")[0]
+                if path == "/v2/extract":
+                    self._send_json(services.extract_response(self._read_json()))
+                elif path.endswith("/chat/completions"):
+                    body = self._read_json()
+                    if body.get("stream"):
+                        self._send_events(services.chat_completion_chunks(body))
+                    else:
+                        self._send_json(services.chat_completion(body))
+                else:
+                    self._send_json({"error": f"Unknown endpoint {path}"}, status=404)
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                if path == "/search":
+                    self._send_json(services.search_places(query))
+                elif path.startswith("/v2/extract/"):
+                    status = services.extract_status(path.rsplit("/", 1)[1])
+                    if status is None:
+                        self._send_json({"success": False, "error": "Extract job not found"}, status=404)
+                    else:
+                        self._send_json(status)
+                else:
+                    self._send_json({"error": f"Unknown endpoint {path}"}, status=404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
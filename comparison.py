@@ -0,0 +1,122 @@
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from crawl_state import listing_key
+from pricing import CRORE, parse_areas, parse_prices
+from ranking import locality_values
+
+# Column dtypes of the comparison table: text is Arrow-backed, figures are float64 with NaN when unknown
+SCHEMA = {
+    "key": "string[pyarrow]",
+    "city": "string[pyarrow]",
+    "building_name": "string[pyarrow]",
+    "location_address": "string[pyarrow]",
+    "price": "string[pyarrow]",
+    "sources": "string[pyarrow]",
+    "price_rupees": "float64",
+    "area_sqft": "float64",
+    "price_per_sqft": "float64",
+    "locality_price_per_sqft": "float64",
+    "rental_yield": "float64",
+    "percent_increase": "float64",
+}
+
+# Sortable metrics and their labels, in the order shown
+METRICS = {
+    "price_rupees": "Price (₹)",
+    "area_sqft": "Area (sq ft)",
+    "price_per_sqft": "Price / sq ft (₹)",
+    "vs_locality_pct": "vs Locality (%)",
+    "rental_yield": "Rental Yield (%)",
+    "percent_increase": "Locality Growth (%)",
+    "monthly_rent": "Est. Monthly Rent (₹)",
+}
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in SCHEMA.items()})
+
+class ComparisonTable:
+    """Listings under comparison as one typed, columnar DataFrame indexed by listing key.
+
+    Prices and areas are parsed once, when a listing is added, so the table
+    can live in session state and every rerun only sorts and derives columns,
+    vectorized over all rows, however many listings are shortlisted.
+    """
+
+    def __init__(self):
+        self.frame = _empty().set_index("key")
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def add(self, city: str, properties: Sequence[Any], locations: Optional[Sequence[Any]] = None) -> int:
+        """Add PropertyData listings not already in the table; returns how many were added"""
+        keys = [listing_key(p) for p in properties]
+        new = [(k, p) for k, p in dict(zip(keys, properties)).items() if k not in self.frame.index]
+        if not new:
+            return 0
+        rows = pd.DataFrame({
+            "key": [k for k, _ in new],
+            "city": " ".join(city.lower().split()),
+            "building_name": [p.building_name for _, p in new],
+            "location_address": [p.location_address for _, p in new],
+            "price": [p.price for _, p in new],
+            "sources": [", ".join(getattr(p, "sources", None) or []) for _, p in new],
+        })
+        rows["price_rupees"] = parse_prices(rows["price"]).to_numpy()
+        rows["area_sqft"] = parse_areas(p.description for _, p in new).to_numpy()
+        rows["price_per_sqft"] = rows["price_rupees"] / rows["area_sqft"]
+        for column in ("locality_price_per_sqft", "rental_yield", "percent_increase"):
+            rows[column] = np.nan
+        rows = rows.astype(SCHEMA).set_index("key")
+        self.frame = pd.concat([self.frame, rows]) if len(self.frame) else rows
+        if locations:
+            self.update_localities(city, locations)
+        return len(rows)
+
+    def update_localities(self, city: str, locations: Sequence[Any]) -> None:
+        """Fill in locality price per sqft, yield and growth of the city's listings from LocationData trends"""
+        in_city = self.frame["city"] == " ".join(city.lower().split())
+        if not in_city.any() or not locations:
+            return
+        addresses = self.frame.loc[in_city, "location_address"].astype(object).fillna("")
+        for field, column in (("price_per_sqft", "locality_price_per_sqft"), ("rental_yield", "rental_yield"), ("percent_increase", "percent_increase")):
+            found = locality_values(addresses, locations, field)
+            self.frame.loc[in_city, column] = found.fillna(self.frame.loc[in_city, column])
+
+    def remove(self, keys: Sequence[str]) -> None:
+        self.frame = self.frame.drop(index=list(keys), errors="ignore")
+
+    def labels(self) -> Dict[str, str]:
+        """Display label of every listing by key"""
+        return dict(zip(self.frame.index, self.frame["building_name"] + " (" + self.frame["location_address"] + ")"))
+
+    def compare(self, keys: Optional[Sequence[str]] = None, sort_by: str = "price_per_sqft", ascending: bool = True) -> pd.DataFrame:
+        """The chosen listings (all by default) with derived metrics, sorted by a METRICS column; unknowns sort last"""
+        df = self.frame if not keys else self.frame.loc[self.frame.index.intersection(list(keys))]
+        df = df.assign(
+            vs_locality_pct=(df["price_per_sqft"] / df["locality_price_per_sqft"] - 1) * 100,
+            monthly_rent=df["price_rupees"] * df["rental_yield"] / 100 / 12,
+        )
+        return df.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+
+    def highlights(self, compared: pd.DataFrame) -> List[Dict[str, str]]:
+        """The standout listing for each headline metric of a compare() result"""
+        picks = [
+            ("Lowest price", "price_rupees", "idxmin", lambda v: f"₹{v / CRORE:.2f} Cr"),
+            ("Best price / sq ft", "price_per_sqft", "idxmin", lambda v: f"₹{v:,.0f}"),
+            ("Largest", "area_sqft", "idxmax", lambda v: f"{v:,.0f} sq ft"),
+            ("Highest yield", "rental_yield", "idxmax", lambda v: f"{v:.1f}%"),
+        ]
+        found = []
+        for label, column, pick, fmt in picks:
+            values = compared[column].dropna()
+            if not values.empty:
+                key = getattr(values, pick)()
+                found.append({"label": label, "name": compared.at[key, "building_name"], "value": fmt(values[key])})
+        return found
+
+    def display(self, compared: pd.DataFrame) -> pd.DataFrame:
+        """A compare() result with readable column names and rounded figures, for st.dataframe"""
+        columns = {"building_name": "Name", "location_address": "Location", "price": "Listed Price", **METRICS, "sources": "Sources"}
+        return compared[list(columns)].round(1).rename(columns=columns).reset_index(drop=True)
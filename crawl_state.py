@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+from pydantic import BaseModel
+from extract_cache import DEFAULT_CACHE_DIR
+from pricing import crores_to_rupees
+
+DEFAULT_CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", os.path.join(DEFAULT_CACHE_DIR, "crawl_state.sqlite3"))
+# A source is re-extracted after this long, doubled for each crawl that found nothing new, up to the max
+DEFAULT_RECRAWL_SECONDS = float(os.getenv("CRAWL_RECRAWL_SECONDS", "3600"))
+DEFAULT_MAX_RECRAWL_SECONDS = float(os.getenv("CRAWL_MAX_RECRAWL_SECONDS", str(24 * 3600)))
+# Listings missing from every extract of their source for this long are treated as delisted
+DEFAULT_LISTING_TTL_SECONDS = float(os.getenv("CRAWL_LISTING_TTL_SECONDS", str(3 * 24 * 3600)))
+
+_default_state = None
+_default_state_lock = threading.Lock()
+
+def _normalize(value: str) -> str:
+    return " ".join((value or "").lower().split())
+
+def listing_key(listing: Any) -> str:
+    """Identity of a listing within a source: its building and address"""
+    return hashlib.sha1(f"{_normalize(listing.building_name)}|{_normalize(listing.location_address)}".encode()).hexdigest()
+
+def listing_hash(listing: Any) -> str:
+    """Hash of the listing's content, so price or description changes are detected"""
+    fields = (listing.building_name, listing.property_type, listing.location_address, listing.price, listing.description)
+    return hashlib.sha1("|".join(_normalize(f) for f in fields).encode()).hexdigest()
+
+class CrawlDelta(BaseModel):
+    """What one extract of a source changed relative to the known listings"""
+    source: str
+    new: List[str] = []
+    changed: List[str] = []
+    unchanged: int = 0
+    removed: int = 0
+
+    @property
+    def modified(self) -> bool:
+        return bool(self.new or self.changed)
+
+class CrawlState:
+    """SQLite record of the listings last seen per source, city, category and type.
+
+    Sources whose extracts keep returning the same listings are re-crawled at
+    a growing interval and served from the known set in between; only new or
+    changed listings are passed on to the property store. Listings that no
+    extract has returned for listing_ttl_seconds are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CRAWL_STATE_PATH,
+        recrawl_seconds: float = DEFAULT_RECRAWL_SECONDS,
+        max_recrawl_seconds: float = DEFAULT_MAX_RECRAWL_SECONDS,
+        listing_ttl_seconds: float = DEFAULT_LISTING_TTL_SECONDS
+    ):
+        self.path = path
+        self.recrawl_seconds = recrawl_seconds
+        self.max_recrawl_seconds = max_recrawl_seconds
+        self.listing_ttl_seconds = listing_ttl_seconds
+        self.skipped = 0
+        self.crawled = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS crawl_sources (
+                    source TEXT NOT NULL,
+                    city TEXT NOT NULL,
+                    property_category TEXT NOT NULL,
+                    property_type TEXT NOT NULL,
+                    max_price_rupees REAL NOT NULL,
+                    crawled_at REAL NOT NULL,
+                    next_crawl_at REAL NOT NULL,
+                    unchanged_runs INTEGER NOT NULL,
+                    PRIMARY KEY (source, city, property_category, property_type)
+                );
+                CREATE TABLE IF NOT EXISTS crawl_listings (
+                    source TEXT NOT NULL,
+                    city TEXT NOT NULL,
+                    property_category TEXT NOT NULL,
+                    property_type TEXT NOT NULL,
+                    listing_key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    PRIMARY KEY (source, city, property_category, property_type, listing_key)
+                );
+                """
+            )
+
+    def due(self, source: str, city: str, property_category: str, property_type: str, max_price: float) -> bool:
+        """Whether the source must be extracted again for this search"""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT max_price_rupees, next_crawl_at FROM crawl_sources
+                WHERE source = ? AND city = ? AND property_category = ? AND property_type = ?""",
+                (source, _normalize(city), property_category, property_type)
+            ).fetchone()
+        due = (
+            row is None
+            or time.time() >= row["next_crawl_at"]
+            or row["max_price_rupees"] < crores_to_rupees(max_price)
+        )
+        with self._lock:
+            if due:
+                self.crawled += 1
+            else:
+                self.skipped += 1
+        return due
+
+    def known(self, source: str, city: str, property_category: str, property_type: str) -> List[Dict[str, Any]]:
+        """Records of every listing seen on the source within the TTL, most recently seen first"""
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT record FROM crawl_listings
+                WHERE source = ? AND city = ? AND property_category = ? AND property_type = ? AND last_seen >= ?
+                ORDER BY last_seen DESC""",
+                (source, _normalize(city), property_category, property_type, time.time() - self.listing_ttl_seconds)
+            ).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+    def merge(
+        self,
+        source: str,
+        city: str,
+        property_category: str,
+        property_type: str,
+        max_price: float,
+        listings: Sequence[Any]
+    ) -> CrawlDelta:
+        """Merge a fresh extract of the source into the known set, drop expired listings and schedule its next crawl"""
+        now = time.time()
+        city_key = _normalize(city)
+        delta = CrawlDelta(source=source)
+        with self._lock, self._conn:
+            known = {
+                row["listing_key"]: row["content_hash"]
+                for row in self._conn.execute(
+                    """SELECT listing_key, content_hash FROM crawl_listings
+                    WHERE source = ? AND city = ? AND property_category = ? AND property_type = ?""",
+                    (source, city_key, property_category, property_type)
+                )
+            }
+            for listing in listings:
+                key, content = listing_key(listing), listing_hash(listing)
+                if key not in known:
+                    delta.new.append(key)
+                elif known[key] != content:
+                    delta.changed.append(key)
+                else:
+                    delta.unchanged += 1
+                known[key] = content
+                self._conn.execute(
+                    """INSERT INTO crawl_listings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (source, city, property_category, property_type, listing_key)
+                    DO UPDATE SET content_hash = excluded.content_hash, record = excluded.record, last_seen = excluded.last_seen""",
+                    (source, city_key, property_category, property_type, key, content,
+                     json.dumps(listing.model_dump()), now, now)
+                )
+            delta.removed = self._conn.execute(
+                """DELETE FROM crawl_listings
+                WHERE source = ? AND city = ? AND property_category = ? AND property_type = ? AND last_seen < ?""",
+                (source, city_key, property_category, property_type, now - self.listing_ttl_seconds)
+            ).rowcount
+            row = self._conn.execute(
+                """SELECT max_price_rupees, unchanged_runs FROM crawl_sources
+                WHERE source = ? AND city = ? AND property_category = ? AND property_type = ?""",
+                (source, city_key, property_category, property_type)
+            ).fetchone()
+            unchanged_runs = 0 if row is None or delta.modified else row["unchanged_runs"] + 1
+            budget = max(crores_to_rupees(max_price), row["max_price_rupees"] if row is not None else 0.0)
+            interval = min(self.recrawl_seconds * 2 ** unchanged_runs, self.max_recrawl_seconds)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawl_sources VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, city_key, property_category, property_type, budget, now, now + interval, unchanged_runs)
+            )
+        return delta
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many source crawls were skipped because the source is stable"""
+        total = self.crawled + self.skipped
+        return {"crawled": self.crawled, "skipped": self.skipped, "skip_rate": self.skipped / total if total else 0.0}
+
+def get_default_crawl_state() -> CrawlState:
+    """Return the process-wide crawl state shared by every agent"""
+    global _default_state
+    with _default_state_lock:
+        if _default_state is None:
+            _default_state = CrawlState()
+        return _default_state
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_EXTRACT_CACHE_PATH = os.getenv(
+    "FIRECRAWL_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "firecrawl_extract.sqlite3")
+)
+DEFAULT_EXTRACT_CACHE_TTL = float(os.getenv("FIRECRAWL_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_EXTRACT_CACHE_SIZE = int(os.getenv("FIRECRAWL_CACHE_MAX_ENTRIES", "500"))
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def make_extract_key(urls: List[str], prompt: str, schema: Dict[str, Any]) -> str:
+    """Build a stable cache key from the normalized URL list, prompt and schema hash"""
+    normalized_urls = sorted({url.strip() for url in urls if url and url.strip()})
+    normalized_prompt = " ".join(prompt.split())
+    schema_hash = hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+    payload = json.dumps({"urls": normalized_urls, "prompt": normalized_prompt, "schema": schema_hash}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ExtractCache:
+    """SQLite-backed TTL cache for Firecrawl extract responses with LRU eviction"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_EXTRACT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_EXTRACT_CACHE_TTL,
+        max_entries: int = DEFAULT_EXTRACT_CACHE_SIZE
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by every Streamlit script thread, guarded by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS extract_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extract_cache_access ON extract_cache (last_access)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM extract_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM extract_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE extract_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response and evict the least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extract_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(response, default=str), now, now)
+            )
+            self._conn.execute("DELETE FROM extract_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                """DELETE FROM extract_cache WHERE key IN (
+                    SELECT key FROM extract_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM extract_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current number of entries"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM extract_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": size,
+        }
+
+def get_default_extract_cache() -> ExtractCache:
+    """Return the process-wide extract cache shared by every agent"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ExtractCache()
+        return _default_cache
@@ -0,0 +1,412 @@
+import asyncio
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from extract_cache import DEFAULT_CACHE_DIR, make_extract_key
+from tracing import TRACER
+
+DEFAULT_EXTRACT_JOBS_PATH = os.getenv("EXTRACT_JOBS_PATH", os.path.join(DEFAULT_CACHE_DIR, "extract_jobs.sqlite3"))
+# Bounds on the wait between status polls; the wait grows by EXTRACT_POLL_BACKOFF after each poll
+DEFAULT_POLL_MIN_SECONDS = float(os.getenv("EXTRACT_POLL_MIN_SECONDS", "0.25"))
+DEFAULT_POLL_INITIAL_SECONDS = float(os.getenv("EXTRACT_POLL_INITIAL_SECONDS", "1"))
+DEFAULT_POLL_MAX_SECONDS = float(os.getenv("EXTRACT_POLL_MAX_SECONDS", "10"))
+DEFAULT_POLL_BACKOFF = float(os.getenv("EXTRACT_POLL_BACKOFF", "1.5"))
+# A job still processing after this long is given up on (and can be resumed later)
+DEFAULT_JOB_TIMEOUT = float(os.getenv("EXTRACT_JOB_TIMEOUT_SECONDS", "600"))
+# Jobs started less than this long ago are resumed by id instead of being submitted (and paid for) again
+DEFAULT_RESUME_SECONDS = float(os.getenv("EXTRACT_JOB_RESUME_SECONDS", "1800"))
+# An owned job is abandoned once none of its owners has been waiting on it or seen for this long;
+# it defaults to the job timeout so a late job can finish for the owner's next search
+DEFAULT_LEASE_SECONDS = float(os.getenv("EXTRACT_JOB_LEASE_SECONDS", str(DEFAULT_JOB_TIMEOUT)))
+# Consecutive failed status polls before a job is reported as failed
+MAX_POLL_ERRORS = 3
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+_current_owner: contextvars.ContextVar = contextvars.ContextVar("extract_job_owner", default=None)
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+JobKey = Tuple[str, str]
+
+def _payload(response: Any) -> Dict[str, Any]:
+    # Newer SDKs return response models instead of plain dicts
+    return response.model_dump() if hasattr(response, "model_dump") else dict(response or {})
+
+class ExtractJob:
+    """One Firecrawl extract job and the owners waiting on it"""
+
+    def __init__(self, app: Any, urls: List[str], prompt: str, schema: Dict[str, Any], job_id: Optional[str] = None):
+        self.app = app
+        self.urls = urls
+        self.prompt = prompt
+        self.schema = schema
+        self.job_id = job_id
+        self.resumed = job_id is not None
+        self.status = "pending"
+        self.polls = 0
+        self.last_wait = 0.0
+        self.owners: Set[str] = set()
+        # Callers without an owner (batch runs, the API, the snapshot job) keep the job alive until it ends
+        self.pinned = False
+        self.future: Future = Future()
+        self.task: Optional[Future] = None
+
+class ExtractJobManager:
+    """Submits Firecrawl extract jobs and polls them on one background event loop.
+
+    Callers get a Future of the completed payload instead of blocking a
+    thread per extract. Polling starts after the expected job duration (a
+    moving average of recent jobs) and backs off from there. Identical
+    requests share one job, and job ids are persisted per request so a
+    rerun or a restarted process resumes the running job instead of paying
+    for a new one.
+
+    Jobs started inside owned_by(owner) stop being polled once release(owner)
+    is called, or once no thread is inside owned_by(owner) any more and the
+    owner's lease has lapsed since. Firecrawl has no endpoint to cancel
+    an extract, so the job itself runs to completion on their side; its id
+    stays stored, and the next search with the same request picks it up.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_EXTRACT_JOBS_PATH,
+        poll_min_seconds: float = DEFAULT_POLL_MIN_SECONDS,
+        poll_initial_seconds: float = DEFAULT_POLL_INITIAL_SECONDS,
+        poll_max_seconds: float = DEFAULT_POLL_MAX_SECONDS,
+        poll_backoff: float = DEFAULT_POLL_BACKOFF,
+        timeout_seconds: float = DEFAULT_JOB_TIMEOUT,
+        resume_seconds: float = DEFAULT_RESUME_SECONDS,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_workers: int = 4
+    ):
+        self.path = path
+        self.poll_min_seconds = poll_min_seconds
+        self.poll_initial_seconds = poll_initial_seconds
+        self.poll_max_seconds = poll_max_seconds
+        self.poll_backoff = poll_backoff
+        self.timeout_seconds = timeout_seconds
+        self.resume_seconds = resume_seconds
+        self.lease_seconds = lease_seconds
+        self.submitted = 0
+        self.resumed = 0
+        self.joined = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self.polls = 0
+        # Moving average of how long jobs take, to time the first poll
+        self.expected_seconds: Optional[float] = None
+        self._jobs: Dict[JobKey, ExtractJob] = {}
+        self._leases: Dict[str, float] = {}
+        # Threads currently inside owned_by per owner; an owner waiting on its jobs keeps them alive
+        self._waiting: Dict[str, int] = {}
+        # Owners holding a group's jobs (see shared_by) and how many ownerless callers wait on each group
+        self._holders: Dict[str, Set[str]] = {}
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # The SDK calls are blocking; they run here so the event loop only schedules them
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract-job")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS extract_jobs (
+                    account TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    job_id TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    PRIMARY KEY (account, key)
+                )"""
+            )
+
+    @contextmanager
+    def owned_by(self, owner: Optional[str]) -> Iterator[None]:
+        """Attribute the jobs submitted in this block (on this thread) to owner, e.g. a user session.
+
+        The owner counts as live for as long as the block runs, however long
+        it waits on its jobs; the lease runs from when the block ends.
+        """
+        if owner:
+            self.touch(owner)
+            with self._lock:
+                self._waiting[owner] = self._waiting.get(owner, 0) + 1
+        token = _current_owner.set(owner)
+        try:
+            yield
+        finally:
+            _current_owner.reset(token)
+            if owner:
+                with self._lock:
+                    self._waiting[owner] -= 1
+                    if not self._waiting[owner]:
+                        del self._waiting[owner]
+                    self._leases[owner] = time.time()
+
+    @contextmanager
+    def shared_by(self, group: str) -> Iterator[None]:
+        """Hold group's jobs for the current owner while the block runs, and attribute jobs submitted in it to group.
+
+        Identical searches are coalesced into one run, so its jobs are owned by
+        the run (the group) and kept alive as long as any owner waiting on it
+        is; an ownerless caller keeps them alive for good.
+        """
+        owner = _current_owner.get()
+        with self._lock:
+            if owner:
+                self._holders.setdefault(group, set()).add(owner)
+                self._leases[owner] = time.time()
+            else:
+                self._pins[group] = self._pins.get(group, 0) + 1
+                for job in self._jobs.values():
+                    if group in job.owners:
+                        job.pinned = True
+        token = _current_owner.set(group)
+        try:
+            yield
+        finally:
+            _current_owner.reset(token)
+            if not owner:
+                with self._lock:
+                    self._pins[group] -= 1
+                    if not self._pins[group]:
+                        del self._pins[group]
+
+    def touch(self, owner: str) -> None:
+        """Renew owner's lease, keeping its jobs polled"""
+        now = time.time()
+        with self._lock:
+            self._leases[owner] = now
+            # Forget owners long gone, so sessions that never came back do not pile up
+            cutoff = now - 2 * self.lease_seconds
+            for stale in [o for o, seen in self._leases.items() if seen < cutoff and not self._waiting.get(o)]:
+                del self._leases[stale]
+                self._drop_holder(stale)
+
+    def release(self, owner: str) -> int:
+        """Stop waiting on owner's jobs; jobs nobody else waits on are cancelled. Returns the number cancelled"""
+        with self._lock:
+            self._leases.pop(owner, None)
+            self._drop_holder(owner)
+            abandoned = []
+            for job in self._jobs.values():
+                if owner in job.owners:
+                    job.owners.discard(owner)
+                    if self._abandoned_locked(job):
+                        abandoned.append(job)
+                elif self._abandoned_locked(job):
+                    abandoned.append(job)
+        for job in abandoned:
+            self._cancel(job)
+        return len(abandoned)
+
+    def job_ids(self, owner: str) -> List[str]:
+        """Firecrawl ids of the jobs owner is waiting on, directly or through a group it joined"""
+        with self._lock:
+            return [
+                job.job_id for job in self._jobs.values()
+                if job.job_id and any(o == owner or owner in self._holders.get(o, ()) for o in job.owners)
+            ]
+
+    def submit(self, app: Any, account: str, urls: List[str], prompt: str, schema: Dict[str, Any]) -> Future:
+        """Future of the completed extract payload; joins or resumes a job for the same request when there is one.
+
+        account identifies the Firecrawl account (a fingerprint of its key),
+        since job ids are only valid for the account that started them.
+        """
+        key = (account, make_extract_key(urls, prompt, schema))
+        owner = _current_owner.get()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.future.done():
+                self.joined += 1
+            else:
+                job = self._jobs[key] = ExtractJob(app, urls, prompt, schema, self._stored_job_id(key))
+                job.task = asyncio.run_coroutine_threadsafe(self._run(key, job), self._event_loop())
+                job.task.add_done_callback(partial(self._forget, key, job))
+            if owner:
+                job.owners.add(owner)
+            if not owner or self._pins.get(owner):
+                job.pinned = True
+        return job.future
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="extract-jobs", daemon=True).start()
+        return self._loop
+
+    def _stored_job_id(self, key: JobKey) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT job_id, started_at FROM extract_jobs WHERE account = ? AND key = ?", key
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.resume_seconds:
+            return None
+        return row[0]
+
+    def _store_job_id(self, key: JobKey, job_id: Optional[str]) -> None:
+        with self._lock, self._conn:
+            if job_id:
+                self._conn.execute("INSERT OR REPLACE INTO extract_jobs VALUES (?, ?, ?, ?)", (*key, job_id, time.time()))
+            else:
+                self._conn.execute("DELETE FROM extract_jobs WHERE account = ? AND key = ?", key)
+
+    def _drop_holder(self, owner: str) -> None:
+        for group in [g for g, holders in self._holders.items() if owner in holders]:
+            self._holders[group].discard(owner)
+            if not self._holders[group]:
+                del self._holders[group]
+
+    def _abandoned_locked(self, job: ExtractJob) -> bool:
+        if job.pinned:
+            return False
+        cutoff = time.time() - self.lease_seconds
+        live = [o for owner in job.owners for o in (owner, *self._holders.get(owner, ()))]
+        return all(not self._waiting.get(o) and self._leases.get(o, 0.0) < cutoff for o in live)
+
+    def _abandoned(self, job: ExtractJob) -> bool:
+        with self._lock:
+            return self._abandoned_locked(job)
+
+    def _cancel(self, job: ExtractJob) -> None:
+        if job.task is not None:
+            job.task.cancel()
+
+    def _forget(self, key: JobKey, job: ExtractJob, _: Future) -> None:
+        with self._lock:
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+        # A job cancelled before its coroutine ran never resolved its future
+        job.future.cancel()
+
+    def _first_wait(self) -> float:
+        expected = self.expected_seconds
+        wait = self.poll_initial_seconds if expected is None else 0.8 * expected
+        return min(max(wait, self.poll_min_seconds), self.poll_max_seconds)
+
+    async def _call(self, fn: Any, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return _payload(await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs)))
+
+    async def _start(self, key: JobKey, job: ExtractJob) -> Dict[str, Any]:
+        payload = await self._call(job.app.start_extract, job.urls, prompt=job.prompt, schema=job.schema)
+        job.job_id = payload.get("id")
+        with self._lock:
+            self.submitted += 1
+        if job.job_id:
+            self._store_job_id(key, job.job_id)
+        return payload
+
+    async def _run(self, key: JobKey, job: ExtractJob) -> None:
+        started = time.time()
+        with TRACER.span("firecrawl_extract", urls=len(job.urls), cache_hit=False) as span:
+            try:
+                payload = await self._wait(key, job, started)
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                with self._lock:
+                    self.cancelled += 1
+                span.set(job_id=job.job_id, resumed=job.resumed, polls=job.polls, status=job.status)
+                job.future.cancel()
+                return
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                span.set(job_id=job.job_id, resumed=job.resumed, polls=job.polls, status=job.status, error=type(e).__name__)
+                job.future.set_exception(e)
+                return
+            span.set(job_id=job.job_id, resumed=job.resumed, polls=job.polls, status=job.status)
+        # The job finished at some point during the last wait, on average halfway through it
+        duration = time.time() - started - job.last_wait / 2
+        with self._lock:
+            self.completed += 1
+            if not job.resumed:
+                previous = self.expected_seconds
+                self.expected_seconds = duration if previous is None else 0.7 * previous + 0.3 * duration
+        job.future.set_result(payload)
+
+    async def _wait(self, key: JobKey, job: ExtractJob, started: float) -> Dict[str, Any]:
+        if job.resumed:
+            with self._lock:
+                self.resumed += 1
+            payload = None
+        else:
+            payload = await self._start(key, job)
+        step = max(self.poll_min_seconds, 0.25 * (self.expected_seconds or self.poll_initial_seconds))
+        wait = self._first_wait()
+        errors = 0
+        while True:
+            if payload is not None:
+                job.status = payload.get("status") or ("completed" if payload.get("success") else "failed")
+                # Without a job id the response already carries the finished extract
+                if job.status in TERMINAL_STATUSES or not job.job_id:
+                    break
+            if self._abandoned(job):
+                raise asyncio.CancelledError()
+            if time.time() - started > self.timeout_seconds:
+                with self._lock:
+                    self.timed_out += 1
+                raise TimeoutError(f"Extract job {job.job_id} still {job.status} after {self.timeout_seconds:g}s")
+            job.last_wait = wait
+            await asyncio.sleep(wait)
+            wait = min(step, self.poll_max_seconds)
+            step *= self.poll_backoff
+            try:
+                payload = await self._call(job.app.get_extract_status, job.job_id)
+                errors = 0
+            except Exception as e:
+                errors += 1
+                if job.resumed and job.polls == 0:
+                    # The stored job expired or belongs to another deployment; start a new one
+                    print("Error resuming extract job, submitting it again:", e)
+                    job.resumed = False
+                    payload = await self._start(key, job)
+                    continue
+                if errors >= MAX_POLL_ERRORS:
+                    raise
+                payload = None
+            finally:
+                job.polls += 1
+                with self._lock:
+                    self.polls += 1
+        # A finished job's payload lands in the extract cache, so its id is not needed again
+        self._store_job_id(key, None)
+        if job.status != "completed":
+            raise RuntimeError(f"Extract job {job.job_id} {job.status}: {payload.get('error') or 'no details'}")
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        """Return job counters, the number of jobs being polled and the expected job duration"""
+        with self._lock:
+            active = len(self._jobs)
+        return {
+            "active": active,
+            "submitted": self.submitted,
+            "resumed": self.resumed,
+            "joined": self.joined,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "timed_out": self.timed_out,
+            "polls": self.polls,
+            "expected_seconds": self.expected_seconds,
+        }
+
+def get_default_extract_jobs() -> ExtractJobManager:
+    """Return the process-wide extract job manager shared by every agent and session"""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = ExtractJobManager()
+        return _default_manager
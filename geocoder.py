@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from extract_cache import DEFAULT_CACHE_DIR
+from tracing import TRACER
+
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+DEFAULT_GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "geocode.sqlite3"))
+
+_default_geocoder = None
+_default_geocoder_lock = threading.Lock()
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+def normalize_address(address: str) -> str:
+    """Normalize an address so equivalent queries share a cache entry"""
+    return " ".join(address.lower().replace(",", " ").split())
+
+class Geocoder:
+    """Cached, rate-limited Nominatim client shared by the map and heatmap views"""
+
+    def __init__(
+        self,
+        cache_path: str = DEFAULT_GEOCODE_CACHE_PATH,
+        base_url: str = NOMINATIM_URL,
+        min_interval: float = 1.0,
+        max_workers: int = 2,
+        timeout: float = 10,
+        negative_ttl_seconds: float = 24 * 3600,
+        user_agent: str = "AI-Real-Estate-Agent/1.0"
+    ):
+        self.base_url = base_url
+        # Nominatim's usage policy allows at most one request per second
+        self.min_interval = min_interval
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+        self._db_lock = threading.Lock()
+        if cache_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS geocode_cache (
+                    address TEXT PRIMARY KEY,
+                    lat REAL,
+                    lon REAL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+
+    def _cached(self, key: str) -> Optional[Coordinates]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, created_at FROM geocode_cache WHERE address = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        lat, lon, created_at = row
+        # Positive results never change; misses are retried once they expire
+        if lat is None and time.time() - created_at > self.negative_ttl_seconds:
+            return None
+        return lat, lon
+
+    def _store(self, key: str, coords: Coordinates) -> None:
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (address, lat, lon, created_at) VALUES (?, ?, ?, ?)",
+                (key, coords[0], coords[1], time.time())
+            )
+
+    def _wait_for_slot(self) -> None:
+        with self._rate_lock:
+            delay = self._last_request + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_request = time.monotonic()
+
+    def geocode(self, address: str) -> Coordinates:
+        """Return (lat, lon) for an address, or (None, None) if it cannot be found"""
+        key = normalize_address(address or "")
+        if not key:
+            return None, None
+        with TRACER.span("geocode") as span:
+            cached = self._cached(key)
+            span.set(cache_hit=cached is not None)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            self._wait_for_slot()
+            try:
+                resp = self._session.get(
+                    self.base_url, params={"format": "json", "limit": 1, "q": address}, timeout=self.timeout
+                )
+                resp.raise_for_status()
+                data = resp.json()
+            except Exception as e:
+                # Transient failures are not cached so the next search retries them
+                print("Error in geocode:", e)
+                span.set(error=type(e).__name__)
+                return None, None
+            coords = (float(data[0]['lat']), float(data[0]['lon'])) if data else (None, None)
+            self._store(key, coords)
+            return coords
+
+    def lookup(self, address: str) -> Optional[Coordinates]:
+        """Return cached coordinates for an address without querying Nominatim, or None if unknown"""
+        key = normalize_address(address or "")
+        return self._cached(key) if key else None
+
+    def geocode_many(self, addresses: Iterable[str]) -> Dict[str, Coordinates]:
+        """Geocode several addresses with bounded concurrency, skipping duplicates"""
+        unique = list(dict.fromkeys(a for a in addresses if a))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(unique, executor.map(self.geocode, unique)))
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache hit/miss counters"""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+def get_default_geocoder() -> Geocoder:
+    """Return the process-wide geocoder shared by every session"""
+    global _default_geocoder
+    with _default_geocoder_lock:
+        if _default_geocoder is None:
+            _default_geocoder = Geocoder()
+            TRACER.register_stats("geocode", _default_geocoder.stats)
+        return _default_geocoder
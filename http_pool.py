@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from firecrawl.v2.utils.http_client import HttpClient
+
+DEFAULT_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+_default_session: Optional[requests.Session] = None
+_default_session_lock = threading.Lock()
+
+def make_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Session whose keep-alive connection pool is sized for pool_size concurrent requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_default_http_session() -> requests.Session:
+    """Return the process-wide session shared by every Firecrawl client"""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = make_session()
+        return _default_session
+
+class PooledHttpClient(HttpClient):
+    """Firecrawl v2 HTTP client that sends requests through a shared session.
+
+    The SDK client opens a new connection (and TLS handshake) per request;
+    this keeps the SDK's retry behaviour but reuses pooled connections.
+    """
+
+    def __init__(self, base: HttpClient, session: requests.Session):
+        super().__init__(
+            api_key=base.api_key,
+            api_url=base.api_url,
+            timeout=base.timeout,
+            max_retries=base.max_retries,
+            backoff_factor=base.backoff_factor,
+            origin=base.origin
+        )
+        self.session = session
+
+    def _send(self, method: str, url: str, retries: int, backoff_factor: float, **kwargs: Any) -> requests.Response:
+        attempts = max(1, retries)
+        for attempt in range(attempts):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                if attempt == attempts - 1:
+                    raise
+            else:
+                if response.status_code != 502 or attempt == attempts - 1:
+                    return response
+            time.sleep(backoff_factor * (2 ** attempt))
+        raise RuntimeError(f"Unexpected error in {method} request")
+
+    def post(
+        self,
+        endpoint: str,
+        data: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None
+    ) -> requests.Response:
+        payload = dict(data)
+        payload['origin'] = payload.get('origin') or self.origin
+        return self._send(
+            "POST", self._build_url(endpoint),
+            retries if retries is not None else self.max_retries,
+            backoff_factor if backoff_factor is not None else self.backoff_factor,
+            headers=headers if headers is not None else self._prepare_headers(),
+            json=payload,
+            timeout=timeout if timeout is not None else self.timeout
+        )
+
+    def get(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None
+    ) -> requests.Response:
+        return self._send(
+            "GET", self._build_url(endpoint),
+            retries if retries is not None else self.max_retries,
+            backoff_factor if backoff_factor is not None else self.backoff_factor,
+            headers=headers if headers is not None else self._prepare_headers(),
+            timeout=timeout if timeout is not None else self.timeout
+        )
+
+def use_session(firecrawl_app: Any, session: requests.Session) -> bool:
+    """Route a FirecrawlApp's v2 requests through session; False if the SDK layout is unknown"""
+    client = getattr(firecrawl_app, "_v2_client", None)
+    base = getattr(client, "http_client", None)
+    if not isinstance(base, HttpClient):
+        return False
+    if not isinstance(base, PooledHttpClient):
+        client.http_client = PooledHttpClient(base, session)
+    else:
+        base.session = session
+    return True
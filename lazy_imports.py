@@ -0,0 +1,44 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+_warming = set()
+_warming_lock = threading.Lock()
+
+def warm_up(*modules: LazyModule) -> None:
+    """Import the given modules on a background thread so the first use does not wait"""
+    with _warming_lock:
+        modules = tuple(m for m in modules if m._name not in _warming)
+        _warming.update(m._name for m in modules)
+    if not modules:
+        return
+
+    def load():
+        for module in modules:
+            try:
+                module._load()
+            except ImportError as e:
+                print(f"Could not preload {module._name}:", e)
+    threading.Thread(target=load, name="lazy-import-warm-up", daemon=True).start()
+
+folium = LazyModule("folium")
+folium_plugins = LazyModule("folium.plugins")
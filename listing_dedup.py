@@ -0,0 +1,158 @@
+import hashlib
+import math
+import os
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlparse
+from tracing import TRACER
+
+# MinHash signature length and LSH banding (16 bands of 2 rows): pairs with
+# token Jaccard similarity of 0.5 become candidates ~99% of the time
+NUM_PERMUTATIONS = 32
+LSH_BANDS = 16
+# Minimum name-token Jaccard similarity for two listings to be the same project
+DEFAULT_NAME_THRESHOLD = float(os.getenv("DEDUP_NAME_THRESHOLD", "0.5"))
+# Listings whose cached coordinates are further apart than this are never merged
+DEFAULT_MAX_DISTANCE_METERS = float(os.getenv("DEDUP_MAX_DISTANCE_METERS", "300"))
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+_ABBREVIATIONS = {
+    "rd": "road", "st": "street", "sec": "sector", "ph": "phase", "apt": "apartments", "apts": "apartments",
+    "apartment": "apartments", "bldg": "building", "twr": "tower", "towers": "tower", "hts": "heights",
+    "nr": "near", "opp": "opposite", "e": "east", "w": "west", "n": "north", "s": "south",
+}
+# Words that every listing site sprinkles into names and addresses without identifying a project
+_STOPWORDS = {
+    "the", "by", "in", "at", "of", "and", "near", "opposite", "behind", "next", "to", "off",
+    "apartments", "flat", "flats", "bhk", "for", "sale", "new", "project", "residential", "india",
+}
+
+def source_name(url: str) -> str:
+    """Short name of a listing source, e.g. 99acres.com"""
+    netloc = urlparse(url).netloc
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+def source_link(url: str) -> str:
+    """Browsable form of a listing source URL (without the extract wildcard)"""
+    return url.rstrip("/*")
+
+def normalize_tokens(text: str, ignore: Set[str] = frozenset()) -> Set[str]:
+    """Lowercase word tokens with common abbreviations expanded and filler words dropped"""
+    tokens = (_ABBREVIATIONS.get(t, t) for t in re.findall(r"[a-z0-9]+", (text or "").lower()))
+    return {t for t in tokens if t not in _STOPWORDS and t not in ignore}
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def _numbers(tokens: Set[str]) -> Set[str]:
+    return {t for t in tokens if t.isdigit()}
+
+def _minhash(tokens: Set[str]) -> List[int]:
+    # One blake2b digest per token, split into NUM_PERMUTATIONS 16-bit hashes
+    signature = [1 << 16] * NUM_PERMUTATIONS
+    for token in tokens:
+        digest = hashlib.blake2b(token.encode(), digest_size=2 * NUM_PERMUTATIONS).digest()
+        for i in range(NUM_PERMUTATIONS):
+            signature[i] = min(signature[i], int.from_bytes(digest[2 * i:2 * i + 2], "big"))
+    return signature
+
+def _distance_meters(a: Coordinates, b: Coordinates) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+def cluster_listings(
+    listings: Sequence[Any],
+    city: str = "",
+    locate: Optional[Callable[[str], Optional[Coordinates]]] = None,
+    name_threshold: float = DEFAULT_NAME_THRESHOLD,
+    max_distance_meters: float = DEFAULT_MAX_DISTANCE_METERS
+) -> List[List[int]]:
+    """Group the indexes of listings that describe the same project, in order of first appearance.
+
+    Candidate pairs come from LSH buckets over the MinHash of the normalized
+    name and address tokens. A candidate is a duplicate when the names are
+    similar enough and either the addresses overlap or, when locate knows
+    both addresses, they are within max_distance_meters. Listings from the
+    same source are only merged when identical, since a site lists each
+    project once. locate should only consult a cache, so deduplication
+    never waits on the geocoding rate limit.
+    """
+    ignore = normalize_tokens(city)
+    names = [normalize_tokens(l.building_name, ignore) for l in listings]
+    addresses = [normalize_tokens(l.location_address, ignore) for l in listings]
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    for i in range(len(listings)):
+        tokens = {f"n:{t}" for t in names[i]} | {f"a:{t}" for t in addresses[i]}
+        if not tokens:
+            continue
+        signature = _minhash(tokens)
+        for band in range(LSH_BANDS):
+            buckets[(band, tuple(signature[band * rows:(band + 1) * rows]))].append(i)
+    candidates = sorted({(a, b) for bucket in buckets.values() for a in bucket for b in bucket if a < b})
+
+    coordinates: Dict[int, Optional[Coordinates]] = {}
+
+    def coords(i: int) -> Optional[Coordinates]:
+        if i not in coordinates:
+            found = locate(listings[i].location_address) if locate else None
+            coordinates[i] = found if found and found[0] is not None else None
+        return coordinates[i]
+
+    parent = list(range(len(listings)))
+    members_sources = [set(getattr(l, "sources", None) or []) for l in listings]
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in candidates:
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        identical = names[a] == names[b] and addresses[a] == addresses[b]
+        if not identical and members_sources[root_a] & members_sources[root_b]:
+            continue
+        # Numbers tell phases, towers and sectors apart ("Hillside" vs "Hillside Phase 2")
+        if _jaccard(names[a], names[b]) < name_threshold or _numbers(names[a]) != _numbers(names[b]):
+            continue
+        where_a, where_b = (None, None) if identical else (coords(a), coords(b))
+        if identical:
+            duplicate = True
+        elif where_a and where_b:
+            duplicate = _distance_meters(where_a, where_b) <= max_distance_meters
+        else:
+            duplicate = not addresses[a] or not addresses[b] or _jaccard(addresses[a], addresses[b]) >= 0.3
+        if duplicate:
+            # The earlier listing stays the root, so clusters keep the sources' priority order
+            root, child = min(root_a, root_b), max(root_a, root_b)
+            parent[child] = root
+            members_sources[root] |= members_sources[child]
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(listings)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+def merge_cluster(listings: Sequence[Any]) -> Any:
+    """Canonical listing of a cluster: the first listing, with the longest description and every source"""
+    canonical = listings[0]
+    sources = list(dict.fromkeys(s for l in listings for s in (getattr(l, "sources", None) or [])))
+    description = max((l.description for l in listings), key=lambda d: len(d or ""))
+    return canonical.model_copy(update={"sources": sources, "description": description})
+
+def dedup_listings(
+    listings: Sequence[Any],
+    city: str = "",
+    locate: Optional[Callable[[str], Optional[Coordinates]]] = None
+) -> List[Any]:
+    """Collapse listings of the same project (usually from different sources) into canonical ones"""
+    with TRACER.span("listing_dedup", listings=len(listings)) as span:
+        merged = [merge_cluster([listings[i] for i in cluster]) for cluster in cluster_listings(listings, city, locate)]
+        span.set(canonical=len(merged))
+        return merged
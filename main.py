@@ -1,8 +1,5 @@
-from typing import Dict, List
-from pydantic import BaseModel, Field
-from agno.agent import Agent 
-from agno.models.openai import OpenAIChat
-from firecrawl import FirecrawlApp
+from concurrent.futures import as_completed
+from agent_pool import get_default_agent_pool
 import streamlit as st 
 import os
 from dotenv import load_dotenv 
@@ -10,111 +7,14 @@ from dotenv import load_dotenv
 # Load environment variables from .env file if it exists 
 load_dotenv()
 
-class PropertyData(BaseModel):
-    """Schema for property data extraction"""
-    building_name: str = Field(description="Name of the building/property", alias="Building_name")
-    property_type: str = Field(description="Type of property (commercial, residential, etc)", alias="Property_type")
-    location_address: str = Field(description="Complete address of the property")
-    price: str = Field(description="Price of the property", alias="Price")
-    description: str = Field(description="Detailed description of the property", alias="Description")
-
-class PropertiesResponse(BaseModel):
-    """Schema for multiple properties response"""
-    properties: List[PropertyData] = Field(description="List of property details")
-
-class LocationData(BaseModel):
-    """Schema for location price trends"""
-    location: str
-    price_per_sqft: float
-    percent_increase: float
-    rental_yield: float
-
-class LocationsResponse(BaseModel):
-    """Schema for multiple locations response"""
-    locations: List[LocationData] = Field(description="List of location data points")
-
-class FirecrawlResponse(BaseModel):
-    """Schema for Firecrawl API response"""
-    success: bool
-    data: Dict
-    status: str
-    expiresAt: str
-
-class PropertyFindingAgent:
-    """Agent responsible for finding properties and providing recommendations"""
-    
-    def __init__(self, firecrawl_api_key: str, openai_api_key: str, model_id: str = "gpt-3.5-turbo"):
-        self.agent = Agent(
-            model=OpenAIChat(id=model_id, api_key=openai_api_key),
-            markdown=True,
-            description="I am a real estate expert who helps find and analyze properties based on user preferences."
-        )
-        self.firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
-
-    def find_properties(
-        self,
-        city: str,
-        max_price: float,
-        property_category: str = "Residential",
-        property_type: str = "Flat"
-    ) -> str:
-        """Find and analyze properties based on user preferences (optimized for low token usage)"""
-        formatted_location = city.lower()
-        urls = [
-            f"https://www.squareyards.com/sale/property-for-sale-in-{formatted_location}/*",
-            f"https://www.99acres.com/property-in-{formatted_location}-ffid/*",
-            f"https://housing.com/in/buy/{formatted_location}/{formatted_location}",
-        ]
-        property_type_prompt = "Flats" if property_type == "Flat" else "Individual Houses"
-        raw_response = self.firecrawl.extract(
-            urls=urls,
-            prompt=f"Extract up to 5 {property_category} {property_type_prompt} in {city} under {max_price} crores. Return only essential details: name, location, price, key features. Format as a list.",
-            schema=PropertiesResponse.model_json_schema()
-        )
-        if isinstance(raw_response, dict) and raw_response.get('success'):
-            properties = raw_response['data'].get('properties', [])
-        else:
-            properties = []
-        # Short, focused analysis prompt
-        analysis = self.agent.run(
-            f"""Analyze these properties for a buyer:
-Properties: {properties}
-1. List 3-5 best matches with name, location, price, and 1-2 key features each.
-2. Which is best value and why?
-3. Top 2 recommendations for investment.
-4. One negotiation tip for each.
-Keep response short and structured."""
-        )
-        return analysis.content
-
-    def get_location_trends(self, city: str) -> str:
-        """Get price trends for different localities in the city (optimized for low token usage)"""
-        raw_response = self.firecrawl.extract(
-            urls=[f"https://www.99acres.com/property-rates-and-price-trends-in-{city.lower()}-prffid/*"],
-            prompt="Extract price trends for up to 5 key localities in the city. Return only: name, price per sqft, percent increase, rental yield.",
-            schema=LocationsResponse.model_json_schema()
-        )
-        if isinstance(raw_response, dict) and raw_response.get('success'):
-            locations = raw_response['data'].get('locations', [])
-            analysis = self.agent.run(
-                f"""Summarize price trends for these locations in {city}:
-Locations: {locations}
-1. List 3-5 locations with price per sqft and percent increase.
-2. Which is best for investment and why?
-3. One tip for investors.
-Keep response short."""
-            )
-            return analysis.content
-        return "No price trends data available"
-
 def create_property_agent():
-    """Create PropertyFindingAgent with API keys from session state"""
-    if 'property_agent' not in st.session_state:
-        st.session_state.property_agent = PropertyFindingAgent(
-            firecrawl_api_key=st.session_state.firecrawl_key,
-            openai_api_key=st.session_state.openai_key,
-            model_id=st.session_state.model_id
-        )
+    """Attach the shared PropertyFindingAgent for the API keys and model in session state"""
+    # Agents and their clients are pooled per process, so sessions with the same keys share one
+    st.session_state.property_agent = get_default_agent_pool().get(
+        firecrawl_api_key=st.session_state.firecrawl_key,
+        openai_api_key=st.session_state.openai_key,
+        model_id=st.session_state.model_id
+    )
 
 def main():
     st.set_page_config(
@@ -222,28 +122,32 @@ def main():
             return
             
         try:
-            with st.spinner("🔍 Searching for properties..."):
-                property_results = st.session_state.property_agent.find_properties(
+            with st.spinner("🔍 Searching for properties and analyzing location trends..."):
+                futures = st.session_state.property_agent.search(
                     city=city,
                     max_price=max_price,
                     property_category=property_category,
                     property_type=property_type
                 )
+                sections = {future: name for name, future in futures.items()}
+                property_section = st.container()
+                trends_section = st.container()
                 
-                st.success("✅ Property search completed!")
-                
-                st.subheader("🏘️ Property Recommendations")
-                st.markdown(property_results)
-                
-                st.divider()
-                
-                with st.spinner("📊 Analyzing location trends..."):
-                    location_trends = st.session_state.property_agent.get_location_trends(city)
-                    
-                    st.success("✅ Location analysis completed!")
-                    
-                    with st.expander("📈 Location Trends Analysis of the city"):
-                        st.markdown(location_trends)
+                for future in as_completed(sections):
+                    if sections[future] == "properties":
+                        with property_section:
+                            st.success("✅ Property search completed!")
+                            
+                            st.subheader("🏘️ Property Recommendations")
+                            st.markdown(future.result().analysis)
+                            
+                            st.divider()
+                    else:
+                        with trends_section:
+                            st.success("✅ Location analysis completed!")
+                            
+                            with st.expander("📈 Location Trends Analysis of the city"):
+                                st.markdown(future.result().analysis)
                 
         except Exception as e:
             st.error(f"❌ An error occurred: {str(e)}")
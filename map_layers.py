@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from extract_cache import DEFAULT_CACHE_DIR
+from lazy_imports import folium, folium_plugins
+from listing_dedup import source_link, source_name
+from tracing import TRACER
+
+DEFAULT_MAP_CACHE_DIR = os.getenv("MAP_CACHE_DIR", os.path.join(DEFAULT_CACHE_DIR, "map_layers"))
+DEFAULT_MAP_CACHE_SIZE = int(os.getenv("MAP_CACHE_MAX_ENTRIES", "128"))
+DEFAULT_MAP_CACHE_FILES = int(os.getenv("MAP_CACHE_MAX_FILES", "2000"))
+# Fallback centre (India) when the city cannot be geocoded
+DEFAULT_CENTER = (20.5937, 78.9629)
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+def _content_key(kind: str, payload: Any) -> str:
+    return hashlib.sha256(json.dumps({"kind": kind, "payload": payload}, sort_keys=True, default=str).encode()).hexdigest()
+
+def _center(center: Coordinates) -> List[float]:
+    lat, lon = center
+    if not lat or not lon:
+        lat, lon = DEFAULT_CENTER
+    return [round(lat, 5), round(lon, 5)]
+
+def heat_points(city: str, locations: Sequence[Any], coordinates: Dict[str, Coordinates]) -> List[Dict[str, Any]]:
+    """Heatmap points for localities geocoded as "<locality> <city>"; unknown localities are skipped"""
+    points = []
+    for l in locations:
+        lat, lon = coordinates.get(f"{l.location} {city}", (None, None))
+        if lat and lon:
+            points.append({
+                "Location": l.location, "lat": lat, "lon": lon,
+                "Price": l.price_per_sqft, "Increase": l.percent_increase, "Yield": l.rental_yield,
+            })
+    return points
+
+class MapLayerService:
+    """Builds the property and heatmap maps once per distinct content and reuses the HTML.
+
+    Rendered maps are keyed by a hash of their inputs and kept in a small
+    in-memory LRU backed by files in cache_dir, so every session (and the
+    trend snapshot job, which pre-renders city heatmaps) shares them.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = DEFAULT_MAP_CACHE_DIR,
+        max_entries: int = DEFAULT_MAP_CACHE_SIZE,
+        max_files: int = DEFAULT_MAP_CACHE_FILES
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self._html: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{key}.html") if self.cache_dir else None
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            html = self._html.get(key)
+            if html is not None:
+                self._html.move_to_end(key)
+                self.hits += 1
+                return html
+        path = self._path(key)
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+            self._remember(key, html)
+            with self._lock:
+                self.hits += 1
+            return html
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, html: str) -> None:
+        with self._lock:
+            self._html[key] = html
+            self._html.move_to_end(key)
+            while len(self._html) > self.max_entries:
+                self._html.popitem(last=False)
+
+    def _put(self, key: str, html: str) -> None:
+        self._remember(key, html)
+        path = self._path(key)
+        if path:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+            self._prune_files()
+
+    def _prune_files(self) -> None:
+        files = [e for e in os.scandir(self.cache_dir) if e.name.endswith(".html")]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=lambda e: e.stat().st_mtime)
+        for entry in files[:len(files) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def property_map(self, center: Coordinates, properties: Sequence[Any], coordinates: Dict[str, Coordinates]) -> str:
+        """HTML of the dark map with a marker per geocoded property"""
+        markers = []
+        for p in properties:
+            lat, lon = coordinates.get(p.location_address, (None, None))
+            if lat and lon:
+                markers.append({
+                    "lat": round(lat, 6), "lon": round(lon, 6),
+                    "name": p.building_name, "address": p.location_address, "price": p.price,
+                    "sources": list(getattr(p, "sources", None) or []),
+                })
+        key = _content_key("properties", {"center": _center(center), "markers": markers})
+        with TRACER.span("map_layer", map="properties", markers=len(markers)) as span:
+            html = self._get(key)
+            span.set(cache_hit=html is not None)
+            if html is None:
+                m = folium.Map(location=_center(center), zoom_start=12, tiles="CartoDB dark_matter")
+                for marker in markers:
+                    links = " · ".join(
+                        f"<a href='{source_link(url)}' target='_blank'>{source_name(url)}</a>" for url in marker["sources"]
+                    )
+                    folium.Marker(
+                        location=[marker["lat"], marker["lon"]],
+                        popup=f"<b>{marker['name']}</b><br>{marker['address']}<br>Price: {marker['price']}" + (f"<br>{links}" if links else ""),
+                        tooltip=marker["name"],
+                        icon=folium.Icon(color="pink", icon="home", prefix="fa")
+                    ).add_to(m)
+                html = m.get_root().render()
+                self._put(key, html)
+            return html
+
+    def heatmap(self, center: Coordinates, points: Sequence[Dict[str, Any]]) -> str:
+        """HTML of the price-per-sqft heatmap with a circle marker per locality"""
+        key = _content_key("heatmap", {"center": _center(center), "points": list(points)})
+        with TRACER.span("map_layer", map="heatmap", markers=len(points)) as span:
+            html = self._get(key)
+            span.set(cache_hit=html is not None)
+            if html is None:
+                m = folium.Map(location=_center(center), zoom_start=12, tiles="CartoDB dark_matter")
+                folium_plugins.HeatMap(
+                    [[p["lat"], p["lon"], p["Price"]] for p in points], radius=18, blur=12, min_opacity=0.5, max_zoom=1
+                ).add_to(m)
+                for p in points:
+                    folium.CircleMarker(
+                        location=[p["lat"], p["lon"]],
+                        radius=8,
+                        color="#dd2476",
+                        fill=True,
+                        fill_color="#ff512f",
+                        popup=f"{p['Location']}<br>Price/sqft: ₹{p['Price']}<br>Yield: {p['Yield']}%",
+                    ).add_to(m)
+                html = m.get_root().render()
+                self._put(key, html)
+            return html
+
+    def city_heatmap(self, city: str, locations: Sequence[Any], geocoder) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Geocode a city's localities and return its heat points and heatmap HTML (None without points)"""
+        center = geocoder.geocode(city)
+        coordinates = geocoder.geocode_many(f"{l.location} {city}" for l in locations)
+        points = heat_points(city, locations, coordinates)
+        return points, self.heatmap(center, points) if points else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of maps held in memory"""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "entries": len(self._html)}
+
+def get_default_map_layers() -> MapLayerService:
+    """Return the process-wide map layer service shared by every session"""
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = MapLayerService()
+            TRACER.register_stats("map_layers", _default_service.stats)
+        return _default_service
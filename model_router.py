@@ -0,0 +1,158 @@
+import os
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+from pricing import parse_price
+from property_store import AMENITIES
+
+# Model for the subjective part of routine analyses; the user's model is the escalation target
+DEFAULT_ROUTER_SMALL_MODEL = os.getenv("ROUTER_SMALL_MODEL", "gpt-3.5-turbo")
+DEFAULT_ROUTING_ENABLED = os.getenv("ANALYSIS_ROUTING", "1").lower() not in ("0", "false", "no")
+# Top listings scoring closer than this are a judgement call worth the larger model
+DEFAULT_ESCALATION_MARGIN = float(os.getenv("ROUTER_ESCALATION_MARGIN", "0.02"))
+# Top localities whose yield plus growth differ by fewer percentage points than this are a close call too
+DEFAULT_ESCALATION_RETURN_MARGIN = float(os.getenv("ROUTER_ESCALATION_RETURN_MARGIN", "0.5"))
+# Escalate when fewer listings than this share have a known price per sqft
+DEFAULT_ESCALATION_MIN_COVERAGE = float(os.getenv("ROUTER_ESCALATION_MIN_COVERAGE", "0.5"))
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+class RoutingDecision(NamedTuple):
+    """Model chosen for the subjective part of an analysis and why"""
+    model_id: str
+    escalated: bool
+    reason: str
+
+def _rupees(value: Optional[float]) -> str:
+    return f"₹{value:,.0f}"
+
+def _features(description: Optional[str], limit: int = 2) -> str:
+    text = (description or "").lower()
+    found = [a for a in AMENITIES if a.lower() in text][:limit]
+    return ", ".join(found) + "." if found else ""
+
+def properties_summary(records: Sequence[Dict[str, Any]], top_n: int = 5) -> str:
+    """Markdown for the mechanical part of a property analysis: the matches, cheapest and best price per sqft"""
+    if not records:
+        return "No listings matched this search. Try a higher budget or fewer filters.\n"
+    lines = ["### Best Matches"]
+    for i, r in enumerate(records[:top_n], 1):
+        lines.append(f"{i}. **{r['building_name']}**, {r['location_address']}: {r['price']}. {_features(r.get('description'))}".rstrip())
+    priced = [(parse_price(r.get("price")), r) for r in records]
+    priced = [(rupees, r) for rupees, r in priced if rupees is not None]
+    per_sqft = [r for r in records if r.get("price_per_sqft")]
+    lines += ["", "### Best Value"]
+    if priced:
+        rupees, cheapest = min(priced, key=lambda p: p[0])
+        lines.append(f"- **Cheapest:** {cheapest['building_name']} at {cheapest['price']}")
+    if per_sqft:
+        best = min(per_sqft, key=lambda r: r["price_per_sqft"])
+        lines.append(f"- **Best price per sq ft:** {best['building_name']} at {_rupees(best['price_per_sqft'])}/sq ft")
+    if not priced and not per_sqft:
+        lines.append("- Prices could not be compared for these listings.")
+    return "\n".join(lines) + "\n\n"
+
+def locations_summary(city: str, records: Sequence[Dict[str, Any]], top_n: int = 5) -> str:
+    """Markdown for the mechanical part of a trend analysis: the localities and their standout figures"""
+    if not records:
+        return f"No locality price trends were found for {city}.\n"
+    lines = [f"### Localities in {city.title()}"]
+    for i, r in enumerate(records[:top_n], 1):
+        lines.append(
+            f"{i}. **{r['location']}**: {_rupees(r['price_per_sqft'])}/sq ft, "
+            f"{r['percent_increase']:+.1f}% growth, {r['rental_yield']:.1f}% rental yield"
+        )
+    yield_best = max(records, key=lambda r: r["rental_yield"])
+    growth_best = max(records, key=lambda r: r["percent_increase"])
+    cheapest = min(records, key=lambda r: r["price_per_sqft"])
+    lines += [
+        "",
+        "### Highlights",
+        f"- **Highest rental yield:** {yield_best['location']} ({yield_best['rental_yield']:.1f}%)",
+        f"- **Fastest appreciation:** {growth_best['location']} ({growth_best['percent_increase']:+.1f}%)",
+        f"- **Most affordable:** {cheapest['location']} ({_rupees(cheapest['price_per_sqft'])}/sq ft)",
+    ]
+    return "\n".join(lines) + "\n\n"
+
+class ModelRouter:
+    """Splits analyses into templated facts and a short model-written judgement.
+
+    The facts (matches, cheapest, best price per sqft, standout localities)
+    are rendered from the ranked records. Only the investment reasoning and
+    tips go to a model: the small one for routine result sets, escalating to
+    the user's chosen model when the records leave a real judgement call.
+    """
+
+    def __init__(
+        self,
+        small_model: str = DEFAULT_ROUTER_SMALL_MODEL,
+        enabled: bool = DEFAULT_ROUTING_ENABLED,
+        escalation_margin: float = DEFAULT_ESCALATION_MARGIN,
+        min_coverage: float = DEFAULT_ESCALATION_MIN_COVERAGE,
+        return_margin: float = DEFAULT_ESCALATION_RETURN_MARGIN
+    ):
+        self.small_model = small_model
+        self.enabled = enabled
+        self.escalation_margin = escalation_margin
+        self.min_coverage = min_coverage
+        self.return_margin = return_margin
+        self.routed = 0
+        self.escalated = 0
+        self.templated_only = 0
+        self._lock = threading.Lock()
+
+    def _decide(self, large_model: str, reason: Optional[str]) -> RoutingDecision:
+        escalate = reason is not None and large_model != self.small_model
+        with self._lock:
+            self.routed += 1
+            if escalate:
+                self.escalated += 1
+        if escalate:
+            return RoutingDecision(large_model, True, reason)
+        return RoutingDecision(self.small_model, False, reason or "routine")
+
+    def route_properties(self, records: Sequence[Dict[str, Any]], large_model: str) -> Optional[RoutingDecision]:
+        """Pick the model for the property judgement; None when the records need no model at all"""
+        if not records:
+            with self._lock:
+                self.templated_only += 1
+            return None
+        reason = None
+        scores = sorted((r["score"] for r in records if r.get("score") is not None), reverse=True)
+        coverage = sum(1 for r in records if r.get("price_per_sqft")) / len(records)
+        if len(scores) >= 2 and scores[0] - scores[1] < self.escalation_margin:
+            reason = "close_scores"
+        elif coverage < self.min_coverage:
+            reason = "sparse_prices"
+        return self._decide(large_model, reason)
+
+    def route_locations(self, records: Sequence[Dict[str, Any]], large_model: str) -> Optional[RoutingDecision]:
+        """Pick the model for the locality judgement; None when the records need no model at all"""
+        if not records:
+            with self._lock:
+                self.templated_only += 1
+            return None
+        reason = None
+        # Rental yield plus appreciation approximates a locality's total annual return
+        returns = sorted((r["rental_yield"] + r["percent_increase"] for r in records), reverse=True)
+        if len(returns) >= 2 and returns[0] - returns[1] < self.return_margin:
+            reason = "close_returns"
+        return self._decide(large_model, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many analyses were routed, escalated or answered from templates alone"""
+        total = self.routed + self.templated_only
+        return {
+            "routed": self.routed,
+            "escalated": self.escalated,
+            "templated_only": self.templated_only,
+            "escalation_rate": self.escalated / total if total else 0.0,
+        }
+
+def get_default_model_router() -> ModelRouter:
+    """Return the process-wide model router shared by every agent"""
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = ModelRouter()
+        return _default_router
@@ -0,0 +1,75 @@
+import re
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+CRORE = 10_000_000
+LAKH = 100_000
+
+_UNITS = {
+    "cr": CRORE, "crore": CRORE, "crores": CRORE,
+    "l": LAKH, "lac": LAKH, "lacs": LAKH, "lakh": LAKH, "lakhs": LAKH,
+    "k": 1_000, "thousand": 1_000,
+}
+_UNIT = r"(?:crores?|cr|lakhs?|lacs?|lac|l|thousand|k)"
+# Bare numbers smaller than this ("3 BHK") are not prices unless marked with ₹/Rs or a unit
+MIN_BARE_PRICE = 10_000
+# Areas ("1450 sq ft") and rates ("₹4,500/sq ft") that follow a number, which is then not a price
+_AREA_SUFFIX = r"(?:/|per)?\s*(?:sq\.?\s*(?:ft|feet|yds?|yards?|m)\b|sqft|square\s*(?:feet|foot|yards?|met(?:er|re)s?)|psf\b|acres?\b)"
+# "₹1.2 Cr", "85 Lakh", "9500000" and ranges such as "1.2 - 1.5 Cr", which share the last unit
+_PRICE_PATTERN = (
+    rf"(?P<currency>₹|\brs\.?|\binr)?\s*"
+    rf"(?P<low>\d+(?:\.\d+)?)\s*(?P<low_unit>{_UNIT})?\b"
+    rf"(?:\s*(?:-|–|to)\s*(?P<high>\d+(?:\.\d+)?)\s*(?P<high_unit>{_UNIT})?\b)?"
+    rf"(?P<area>\s*{_AREA_SUFFIX})?"
+)
+_AREA_PATTERN = r"(?P<area>\d+(?:\.\d+)?)\s*(?:sq\.?\s*ft\.?|sqft|sq\.?\s*feet|square\s*feet)"
+_PRICE_RE = re.compile(_PRICE_PATTERN)
+_AREA_RE = re.compile(_AREA_PATTERN)
+
+def _clean(text: str) -> str:
+    return str(text).lower().replace(",", "")
+
+def parse_price(price: Optional[str]) -> Optional[float]:
+    """Parse an Indian price notation ("1.2 Cr", "₹85 Lakh", "95,00,000") into rupees.
+
+    Ranges resolve to their lower bound, the "starting from" price. Areas
+    and per-sq-ft rates are skipped, and the first amount marked with a
+    currency or unit wins over bare numbers, such as the 3 of "3 BHK ₹1.5 Cr".
+    """
+    if not price:
+        return None
+    bare = None
+    for match in _PRICE_RE.finditer(_clean(price)):
+        if match.group("area"):
+            continue
+        unit = match.group("low_unit") or match.group("high_unit")
+        low = float(match.group("low"))
+        if unit or match.group("currency"):
+            return low * _UNITS.get(unit or "", 1)
+        if bare is None and low >= MIN_BARE_PRICE:
+            bare = low
+    return bare
+
+def parse_prices(prices: Iterable[Optional[str]]) -> pd.Series:
+    """Vectorized parse_price over a batch of price strings; unparseable prices become NaN"""
+    text = pd.Series(list(prices), dtype="object").fillna("").map(_clean)
+    parts = text.str.extractall(_PRICE_PATTERN)
+    unit = parts["low_unit"].fillna(parts["high_unit"])
+    low = pd.to_numeric(parts["low"], errors="coerce")
+    # Same rule as parse_price: the first amount with a currency or unit, else the first large bare number
+    marked = unit.notna() | parts["currency"].notna()
+    valid = parts["area"].isna() & (marked | (low >= MIN_BARE_PRICE))
+    candidates = pd.DataFrame({"rupees": low * unit.map(_UNITS).fillna(1.0), "bare": ~marked})[valid]
+    # A stable sort keeps the text order within marked and bare amounts
+    first = candidates.sort_values("bare", kind="stable").groupby(level=0)["rupees"].first()
+    return first.reindex(text.index)
+
+def parse_areas(texts: Iterable[Optional[str]]) -> pd.Series:
+    """Vectorized extraction of the first built-up area in square feet from listing text"""
+    text = pd.Series(list(texts), dtype="object").fillna("").map(_clean)
+    area = pd.to_numeric(text.str.extract(_AREA_PATTERN)["area"], errors="coerce")
+    return area.where(area > 0, np.nan)
+
+def crores_to_rupees(crores: float) -> float:
+    return crores * CRORE
@@ -0,0 +1,107 @@
+import json
+import math
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to a character heuristic
+    tiktoken = None
+
+# Prompt token budget per call, matched by model id prefix (longest first)
+MODEL_PROMPT_BUDGETS = {
+    "gpt-3.5-turbo": 1500,
+    "gpt-4-turbo": 4000,
+    "gpt-4o": 4000,
+    "gpt-4": 2500,
+}
+DEFAULT_PROMPT_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+# Descriptions are cut to this many words before any budget is applied
+DEFAULT_DESCRIPTION_WORDS = int(os.getenv("PROMPT_DESCRIPTION_WORDS", "30"))
+
+_encoding_lock = threading.Lock()
+
+def prompt_budget(model_id: str) -> int:
+    """Prompt token budget for a model; PROMPT_TOKEN_BUDGET_<MODEL> overrides it"""
+    env_key = "PROMPT_TOKEN_BUDGET_" + "".join(c if c.isalnum() else "_" for c in model_id.upper())
+    if os.getenv(env_key):
+        return int(os.environ[env_key])
+    for prefix in sorted(MODEL_PROMPT_BUDGETS, key=len, reverse=True):
+        if model_id.startswith(prefix):
+            return MODEL_PROMPT_BUDGETS[prefix]
+    return DEFAULT_PROMPT_BUDGET
+
+@lru_cache(maxsize=8)
+def _encoding(model_id: str):
+    if tiktoken is None:
+        return None
+    with _encoding_lock:
+        try:
+            try:
+                return tiktoken.encoding_for_model(model_id)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # The BPE files are downloaded on first use, which fails offline
+            print("Could not load tokenizer, estimating token counts:", e)
+            return None
+
+def count_tokens(text: str, model_id: str = "gpt-3.5-turbo") -> int:
+    """Token count of text for the model, with tiktoken if installed, else about four characters per token"""
+    encoding = _encoding(model_id)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+def truncate_words(text: str, max_words: int) -> str:
+    words = text.split()
+    if len(words) <= max_words:
+        return " ".join(words)
+    return " ".join(words[:max_words]) + "…"
+
+def compact_records(records: Sequence[Dict[str, Any]], description_words: int = DEFAULT_DESCRIPTION_WORDS) -> List[Dict[str, Any]]:
+    """Drop empty fields and shorten descriptions"""
+    compacted = []
+    for record in records:
+        item = {}
+        for field, value in record.items():
+            if value is None or value == "":
+                continue
+            if field == "description" and isinstance(value, str):
+                value = truncate_words(value, description_words)
+            item[field] = value
+        compacted.append(item)
+    return compacted
+
+def serialize_records(records: Sequence[Dict[str, Any]]) -> str:
+    """Compact JSON for a prompt; fewer tokens than the Python repr of the same dicts"""
+    return json.dumps(list(records), ensure_ascii=False, separators=(",", ":"), default=str)
+
+def fit_records(
+    records: Sequence[Dict[str, Any]],
+    render: Callable[[str], str],
+    model_id: str,
+    budget: Optional[int] = None,
+    description_words: int = DEFAULT_DESCRIPTION_WORDS
+) -> Tuple[str, int]:
+    """Render a prompt from records within the model's token budget.
+
+    Records are compacted first; while the prompt is over budget the
+    descriptions are halved and then the last (lowest ranked) records are
+    dropped, always keeping at least one. Returns the prompt and how many
+    records it includes.
+    """
+    budget = budget or prompt_budget(model_id)
+    kept = compact_records(records, description_words)
+    prompt = render(serialize_records(kept))
+    words = description_words
+    while count_tokens(prompt, model_id) > budget and words > 5:
+        words //= 2
+        kept = compact_records(kept, words)
+        prompt = render(serialize_records(kept))
+    while count_tokens(prompt, model_id) > budget and len(kept) > 1:
+        kept = kept[:-1]
+        prompt = render(serialize_records(kept))
+    return prompt, len(kept)
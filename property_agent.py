@@ -0,0 +1,936 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Type, TypeVar, Union
+import requests
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from pydantic.json_schema import SkipJsonSchema
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from agno.run.agent import RunCompletedEvent, RunContentEvent, RunErrorEvent, RunStatus
+from firecrawl import FirecrawlApp
+from analysis_cache import AnalysisCache, AnalysisKey, get_default_analysis_cache, make_analysis_key
+from crawl_state import CrawlState, get_default_crawl_state, listing_key
+from extract_cache import ExtractCache, get_default_extract_cache, make_extract_key
+from extract_jobs import ExtractJobManager, get_default_extract_jobs
+from geocoder import Geocoder, get_default_geocoder
+from http_pool import get_default_http_session, use_session
+from listing_dedup import cluster_listings, dedup_listings, merge_cluster, source_name
+from model_router import ModelRouter, get_default_model_router, locations_summary, properties_summary
+from prompt_budget import count_tokens, fit_records, prompt_budget
+from property_store import PropertyFilters, PropertyStore, get_default_property_store
+from ranking import rank_properties, summarize_top
+from single_flight import SingleFlight, get_default_single_flight
+from tracing import TRACER, Span
+from trend_snapshots import TrendSnapshotStore, get_default_trend_snapshots
+
+# Shared pool for the blocking Firecrawl/OpenAI calls so that the property
+# search and the location trend analysis run side by side
+SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="property-search")
+# Separate pool for parsing and storing each source's extract once its job completes
+SOURCE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="source-extract")
+# A source still extracting after this long is served from its last known listings
+SOURCE_DEADLINE_SECONDS = float(os.getenv("SOURCE_DEADLINE_SECONDS", "60"))
+
+RecordT = TypeVar("RecordT", bound=BaseModel)
+
+# Upper bound on the stored listings passed to one analysis
+MAX_ANALYZED_PROPERTIES = 10
+# Number of top-ranked listings summarized in the analysis prompt
+ANALYSIS_TOP_N = 5
+# Bump when a prompt template changes so cached analyses of the old one are not reused
+PROPERTIES_PROMPT_VERSION = "properties-v2"
+LOCATIONS_PROMPT_VERSION = "locations-v2"
+# Prompts that only ask for the judgement, the facts being templated (see model_router)
+ROUTED_PROPERTIES_PROMPT_VERSION = "properties-judgement-v1"
+ROUTED_LOCATIONS_PROMPT_VERSION = "locations-judgement-v1"
+
+AGENT_DESCRIPTIONS = {
+    "properties": "I am a real estate expert who helps find and analyze properties based on user preferences.",
+    "trends": "I am a real estate expert who analyzes locality price trends and rental yields.",
+}
+
+class PropertyData(BaseModel):
+    """Schema for property data extraction"""
+    model_config = ConfigDict(populate_by_name=True)
+    building_name: str = Field(description="Name of the building/property", alias="Building_name")
+    property_type: str = Field(description="Type of property (commercial, residential, etc)", alias="Property_type")
+    location_address: str = Field(description="Complete address of the property")
+    price: str = Field(description="Price of the property", alias="Price")
+    description: str = Field(description="Detailed description of the property", alias="Description")
+    # Source URLs the listing was found on; filled in after extraction, so not part of the extract schema
+    sources: SkipJsonSchema[List[str]] = Field(default_factory=list)
+
+class PropertiesResponse(BaseModel):
+    """Schema for multiple properties response"""
+    properties: List[PropertyData] = Field(description="List of property details")
+
+class LocationData(BaseModel):
+    """Schema for location price trends"""
+    location: str
+    price_per_sqft: float
+    percent_increase: float
+    rental_yield: float
+
+class LocationsResponse(BaseModel):
+    """Schema for multiple locations response"""
+    locations: List[LocationData] = Field(description="List of location data points")
+
+class FirecrawlResponse(BaseModel):
+    """Schema for Firecrawl API response"""
+    success: bool
+    data: Dict
+    status: str
+    expiresAt: str
+
+class PropertySearchResult(BaseModel):
+    """Analysis text together with the structured property records it is based on"""
+    analysis: str
+    data: PropertiesResponse = Field(default_factory=lambda: PropertiesResponse(properties=[]))
+    # Crawl outcome per listing source ("extracted", "unchanged", "empty", "late" or "failed");
+    # empty when the listings were served from the property store
+    sources: Dict[str, str] = Field(default_factory=dict)
+    # Set when the search failed; analysis then holds the message shown to users
+    error: Optional[str] = None
+
+    @property
+    def degraded_sources(self) -> List[str]:
+        """Sources that were late or failed and contributed only their last known listings"""
+        return [source for source, status in self.sources.items() if status in ("late", "failed")]
+
+class LocationTrendsResult(BaseModel):
+    """Analysis text together with the structured location trends it is based on"""
+    analysis: str
+    data: LocationsResponse = Field(default_factory=lambda: LocationsResponse(locations=[]))
+    # Set when the trends come from a precomputed snapshot rather than a live crawl
+    snapshot_at: Optional[float] = None
+    stale: bool = False
+    # Set when the trends could not be fetched or analysed
+    error: Optional[str] = None
+
+class AnalysisPlan(NamedTuple):
+    """How to produce one analysis: templated text, followed by a model run when agent is set"""
+    prefix: str
+    agent: Optional[Agent]
+    prompt: Optional[str]
+    key: Optional[AnalysisKey]
+
+class SearchInputError(ValueError):
+    """Raised when the search criteria cannot be turned into listing URLs"""
+
+class AnalysisError(RuntimeError):
+    """Raised when the model run behind an analysis fails"""
+
+def parse_records(raw_response: Any, key: str, model: Type[RecordT]) -> List[RecordT]:
+    """Validate the records under data[key] of an extract response, skipping malformed ones"""
+    if not (isinstance(raw_response, dict) and raw_response.get('success')):
+        return []
+    records = []
+    for item in (raw_response.get('data') or {}).get(key) or []:
+        try:
+            records.append(model.model_validate(item))
+        except ValidationError as e:
+            print(f"Skipping malformed {model.__name__}:", e)
+    return records
+
+def _record_usage(span: Span, model_id: str, metrics: Any) -> None:
+    input_tokens = getattr(metrics, "input_tokens", 0) or 0
+    output_tokens = getattr(metrics, "output_tokens", 0) or 0
+    span.set(input_tokens=input_tokens, output_tokens=output_tokens)
+    TRACER.record_tokens(model_id, input_tokens, output_tokens)
+
+def run_agent(agent: Agent, prompt: str, stage: str = "llm_analysis") -> Any:
+    """Run an agent, tracing wall time, model and token usage; raises AnalysisError if the run fails"""
+    with TRACER.span(stage, model=agent.model.id, prompt_chars=len(prompt)) as span:
+        output = agent.run(prompt)
+        _record_usage(span, agent.model.id, output.metrics)
+        # agno reports model failures through the run status, with the error message as the content
+        if output.status == RunStatus.error:
+            raise AnalysisError(output.content or "The analysis model failed")
+        return output
+
+def stream_agent_run(
+    agent: Agent,
+    prompt: str,
+    stage: str = "llm_analysis",
+    on_complete: Optional[Callable[[str], None]] = None
+) -> Iterator[str]:
+    """Yield the content chunks of a streaming agent run; on_complete gets the full text of a successful run"""
+    with TRACER.span(stage, model=agent.model.id, prompt_chars=len(prompt), stream=True) as span:
+        try:
+            text = ""
+            for event in agent.run(prompt, stream=True):
+                if isinstance(event, RunContentEvent) and isinstance(event.content, str) and event.content:
+                    text += event.content
+                    yield event.content
+                elif isinstance(event, RunCompletedEvent):
+                    _record_usage(span, agent.model.id, event.metrics)
+                elif isinstance(event, RunErrorEvent):
+                    # Model failures arrive as an event rather than an exception; the partial text is not cached
+                    print("Error in streaming analysis:", event.content)
+                    span.set(error=event.error_type or "RunError")
+                    yield f"\n\nError: {event.content or 'The analysis model failed'}"
+                    return
+            if on_complete is not None and text:
+                on_complete(text)
+        except Exception as e:
+            print("Error in streaming analysis:", e)
+            span.set(error=type(e).__name__)
+            yield f"\n\nError: {str(e)}"
+
+class AnalysisStream:
+    """Iterable over analysis chunks that keeps the structured data, full text and timings.
+
+    The chunks are pulled on SEARCH_EXECUTOR as soon as the stream is created,
+    so several analyses progress in parallel while the UI renders one of them.
+    Every iteration replays the stream from the start, so one stream can be
+    shared by several sessions. The templated prefix goes out first, so
+    time_to_first_token is when the reader first sees text and
+    time_to_first_model_token is when the model's own output starts.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterator[str],
+        data: BaseModel,
+        started: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        prefix: str = ""
+    ):
+        self.data = data
+        # Extra result fields, e.g. the trend snapshot time or the listing source outcomes
+        self.metadata = metadata or {}
+        self.text = ""
+        self.started = started if started is not None else time.perf_counter()
+        self.time_to_first_token: Optional[float] = None
+        self.time_to_first_model_token: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self._chunks: List[str] = []
+        self._done = False
+        self._cond = threading.Condition()
+        SEARCH_EXECUTOR.submit(self._pump, prefix, chunks)
+
+    def _append(self, chunk: str) -> None:
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self.started
+            print(f"Time to first token: {self.time_to_first_token:.2f}s")
+        with self._cond:
+            self._chunks.append(chunk)
+            self.text += chunk
+            self._cond.notify_all()
+
+    def _pump(self, prefix: str, chunks: Iterator[str]) -> None:
+        try:
+            if prefix:
+                self._append(prefix)
+            for chunk in chunks:
+                if self.time_to_first_model_token is None:
+                    self.time_to_first_model_token = time.perf_counter() - self.started
+                    print(f"Time to first model token: {self.time_to_first_model_token:.2f}s")
+                self._append(chunk)
+        finally:
+            with self._cond:
+                self.total_time = time.perf_counter() - self.started
+                self._done = True
+                self._cond.notify_all()
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                pending = self._chunks[index:]
+                if not pending:
+                    return
+            index += len(pending)
+            yield from pending
+
+    def result(self) -> Union[PropertySearchResult, LocationTrendsResult]:
+        """Wait for the rest of the stream and return the matching search result"""
+        with self._cond:
+            while not self._done:
+                self._cond.wait()
+        if isinstance(self.data, LocationsResponse):
+            return LocationTrendsResult(analysis=self.text, data=self.data, **self.metadata)
+        return PropertySearchResult(analysis=self.text, data=self.data, **self.metadata)
+
+class PropertyFindingAgent:
+    """Agent responsible for finding properties and providing recommendations"""
+
+    def __init__(
+        self,
+        firecrawl_api_key: str,
+        openai_api_key: str,
+        model_id: str = "gpt-3.5-turbo",
+        extract_cache: Optional[ExtractCache] = None,
+        property_store: Optional[PropertyStore] = None,
+        analysis_cache: Optional[AnalysisCache] = None,
+        crawl_state: Optional[CrawlState] = None,
+        trend_snapshots: Optional[TrendSnapshotStore] = None,
+        firecrawl_api_url: Optional[str] = None,
+        openai_base_url: Optional[str] = None,
+        http_session: Optional[requests.Session] = None,
+        single_flight: Optional[SingleFlight] = None,
+        source_deadline_seconds: float = SOURCE_DEADLINE_SECONDS,
+        geocoder: Optional[Geocoder] = None,
+        model_router: Optional[ModelRouter] = None,
+        extract_jobs: Optional[ExtractJobManager] = None
+    ):
+        # The endpoint overrides point the clients at local stand-ins (see benchmarks/)
+        self.model_id = model_id
+        self._openai_api_key = openai_api_key
+        self._openai_base_url = openai_base_url
+        model = OpenAIChat(id=model_id, api_key=openai_api_key, base_url=openai_base_url)
+        self.agent = Agent(model=model, markdown=True, description=AGENT_DESCRIPTIONS["properties"])
+        # Separate agent for the trend analysis so both analyses can run at the same time
+        self.trends_agent = Agent(model=model, markdown=True, description=AGENT_DESCRIPTIONS["trends"])
+        # Agents on the router's small model, built on first use
+        self._routed_agents: Dict[Tuple[str, str], Agent] = {}
+        self._routed_agents_lock = threading.Lock()
+        if firecrawl_api_url:
+            self.firecrawl = FirecrawlApp(api_key=firecrawl_api_key, api_url=firecrawl_api_url)
+        else:
+            self.firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
+        # Reuse keep-alive connections across extracts instead of one connection per call
+        use_session(self.firecrawl, http_session if http_session is not None else get_default_http_session())
+        # Extract job ids belong to a Firecrawl account; jobs are shared and resumed per account
+        self._firecrawl_account = hashlib.sha256(f"{firecrawl_api_url or ''}|{firecrawl_api_key}".encode()).hexdigest()[:16]
+        self.extract_jobs = extract_jobs if extract_jobs is not None else get_default_extract_jobs()
+        self.extract_cache = extract_cache if extract_cache is not None else get_default_extract_cache()
+        self.property_store = property_store if property_store is not None else get_default_property_store()
+        self.crawl_state = crawl_state if crawl_state is not None else get_default_crawl_state()
+        self.trend_snapshots = trend_snapshots if trend_snapshots is not None else get_default_trend_snapshots()
+        self.analysis_cache = analysis_cache if analysis_cache is not None else get_default_analysis_cache()
+        self.single_flight = single_flight if single_flight is not None else get_default_single_flight()
+        self.source_deadline_seconds = source_deadline_seconds
+        # Only its cache is consulted, to tell apart same-named projects in different places
+        self.geocoder = geocoder if geocoder is not None else get_default_geocoder()
+        self.model_router = model_router if model_router is not None else get_default_model_router()
+        TRACER.register_stats("firecrawl_extract", self.extract_cache.stats)
+        TRACER.register_stats("crawl_state", self.crawl_state.stats)
+        TRACER.register_stats("trend_snapshots", self.trend_snapshots.stats)
+        TRACER.register_stats("llm_analysis", self.analysis_cache.stats)
+        TRACER.register_stats("single_flight", self.single_flight.stats)
+        TRACER.register_stats("model_routing", self.model_router.stats)
+        TRACER.register_stats("extract_jobs", self.extract_jobs.stats)
+        # Latest locality trends per city, used to rank listings by price per sqft
+        self._known_locations: Dict[str, List[LocationData]] = {}
+        # Cities whose stale trend snapshot is being re-crawled in the background
+        self._refreshing_trends: Set[str] = set()
+        self._refreshing_trends_lock = threading.Lock()
+
+    def _agent_for(self, purpose: str, model_id: str) -> Agent:
+        """The "properties" or "trends" agent running on model_id"""
+        if model_id == self.model_id:
+            return self.agent if purpose == "properties" else self.trends_agent
+        with self._routed_agents_lock:
+            agent = self._routed_agents.get((purpose, model_id))
+            if agent is None:
+                model = OpenAIChat(id=model_id, api_key=self._openai_api_key, base_url=self._openai_base_url)
+                agent = Agent(model=model, markdown=True, description=AGENT_DESCRIPTIONS[purpose])
+                self._routed_agents[(purpose, model_id)] = agent
+            return agent
+
+    def _submit_extract(self, urls: List[str], prompt: str, schema: Dict[str, Any]) -> Future:
+        """Start a Firecrawl extract job and return a future of its response, served from the extract cache when possible"""
+        key = make_extract_key(urls, prompt, schema)
+        cached = self.extract_cache.get(key)
+        if cached is not None:
+            # Misses are traced by the job manager, under the same stage, for as long as the job runs
+            with TRACER.span("firecrawl_extract", urls=len(urls), cache_hit=True):
+                future: Future = Future()
+                future.set_result(cached)
+            return future
+        future = self.extract_jobs.submit(self.firecrawl, self._firecrawl_account, urls, prompt, schema)
+        future.add_done_callback(partial(self._cache_extract, key))
+        return future
+
+    def _cache_extract(self, key: str, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None and future.result().get('success'):
+            self.extract_cache.set(key, future.result())
+
+    def _extract(self, urls: List[str], prompt: str, schema: Dict[str, Any]) -> Any:
+        """Run a Firecrawl extract and wait for its response"""
+        return self._submit_extract(urls, prompt, schema).result()
+
+    def listing_urls(self, city: str) -> List[str]:
+        """Listing source URLs for a city; raises SearchInputError for an invalid city"""
+        formatted_location = city.lower().strip()
+        # Validate city input
+        if not city or not formatted_location or len(formatted_location) < 2:
+            raise SearchInputError("No valid city name provided. Please enter a valid city name.")
+        urls = [
+            f"https://www.squareyards.com/sale/property-for-sale-in-{formatted_location}/*",
+            f"https://www.99acres.com/property-in-{formatted_location}-ffid/*",
+            f"https://housing.com/in/buy/{formatted_location}/{formatted_location}",
+        ]
+        # Remove URLs if city is empty or contains invalid characters
+        urls = [url for url in urls if city and formatted_location and '*' not in city and formatted_location.isalpha()]
+        if not urls:
+            raise SearchInputError("No valid property listing URLs found for this city. Please check the city name or try a different one.")
+        return urls
+
+    def crawl_properties(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat"
+    ) -> List[PropertyData]:
+        """Extract listings from the sources and record new or changed ones in the property store.
+
+        Each source is extracted separately and only when the crawl state says
+        it is due; stable sources are served from their known listings.
+        """
+        return self._crawl(city, max_price, property_category, property_type)[0]
+
+    def crawl_listing_sources(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        deadline_seconds: Optional[float] = None
+    ) -> Tuple[List[PropertyData], Dict[str, str]]:
+        """Like crawl_properties, but also return each source's outcome ("extracted", "late", "failed", ...).
+
+        deadline_seconds replaces the agent's source deadline, e.g. for batch
+        runs that would rather wait for slow sources than answer quickly.
+        """
+        return self._crawl(city, max_price, property_category, property_type, deadline_seconds)
+
+    def _crawl(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str,
+        property_type: str,
+        deadline_seconds: Optional[float] = None
+    ) -> Tuple[List[PropertyData], Dict[str, str]]:
+        """Crawl the sources in parallel and return the merged listings and each source's outcome.
+
+        Sources that fail or miss the deadline contribute their last known
+        listings. A late extract job keeps being polled, and whatever it
+        finds is stored for the next search.
+        """
+        urls = self.listing_urls(city)
+        with TRACER.span("crawl_sources", sources=len(urls)) as span:
+            futures = {
+                self._crawl_source(url, city, max_price, property_category, property_type): url
+                for url in urls
+            }
+            done, _ = wait(futures, timeout=self.source_deadline_seconds if deadline_seconds is None else deadline_seconds)
+            found: List[PropertyData] = []
+            changed_keys = set()
+            extracted_urls = set()
+            sources: Dict[str, str] = {}
+            for future, url in futures.items():
+                if future not in done:
+                    future.add_done_callback(partial(self._store_late_source, city, max_price, property_category, property_type))
+                    listings, changed, status = self._known_listings(url, city, property_category, property_type), [], "late"
+                else:
+                    try:
+                        listings, changed, status = future.result()
+                    except Exception as e:
+                        print(f"Error extracting {source_name(url)}:", e)
+                        listings, changed, status = self._known_listings(url, city, property_category, property_type), [], "failed"
+                sources[source_name(url)] = status
+                if status == "extracted":
+                    extracted_urls.add(url)
+                found.extend(listings)
+                changed_keys.update((url, listing_key(listing)) for listing in changed)
+            # Sources are merged in order, so a project listed on several keeps the first source's record
+            crawled: List[PropertyData] = []
+            modified: List[PropertyData] = []
+            # Unchanged listings a fresh extract found again, so the store does not expire them
+            seen: List[PropertyData] = []
+            for cluster in cluster_listings(found, city, self.geocoder.lookup):
+                canonical = merge_cluster([found[i] for i in cluster])
+                crawled.append(canonical)
+                if any((found[i].sources[0], listing_key(found[i])) in changed_keys for i in cluster):
+                    modified.append(canonical)
+                elif any(found[i].sources[0] in extracted_urls for i in cluster):
+                    seen.append(canonical)
+            span.set(
+                late=sum(status == "late" for status in sources.values()),
+                failed=sum(status == "failed" for status in sources.values()),
+                listings=len(found),
+                canonical=len(crawled)
+            )
+        if crawled:
+            # Unchanged listings are already stored; this also marks the search as freshly crawled
+            self.property_store.add(city, property_category, property_type, max_price, modified, seen=seen)
+        return crawled, sources
+
+    def _store_late_source(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str,
+        property_type: str,
+        future: Future
+    ) -> None:
+        """Store the new listings of a source extract that finished after the search moved on"""
+        try:
+            listings, changed, status = future.result()
+        except Exception as e:
+            print("Error in late source extract:", e)
+            return
+        if status == "extracted":
+            self.property_store.add(city, property_category, property_type, max_price, changed, seen=listings)
+
+    def _crawl_source(
+        self,
+        url: str,
+        city: str,
+        max_price: float,
+        property_category: str,
+        property_type: str
+    ) -> Future:
+        """Future of a source's current listings, the ones new or changed since its last crawl, and the outcome"""
+        future: Future = Future()
+        try:
+            if not self.crawl_state.due(url, city, property_category, property_type, max_price):
+                with TRACER.span("crawl_source", source=url) as span:
+                    known = self._known_listings(url, city, property_category, property_type)
+                    span.set(skipped=True, known=len(known))
+                future.set_result((known, [], "unchanged"))
+                return future
+            property_type_prompt = "Flats" if property_type == "Flat" else "Individual Houses"
+            extract = self._submit_extract(
+                urls=[url],
+                prompt=f"Extract up to 5 {property_category} {property_type_prompt} in {city} under {max_price} crores. Return only essential details: name, location, price, key features. Format as a list.",
+                schema=PropertiesResponse.model_json_schema()
+            )
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        # No thread waits on the job; the listings are parsed and stored once it completes
+        extract.add_done_callback(lambda _: SOURCE_EXECUTOR.submit(
+            self._finish_source, extract, future, url, city, max_price, property_category, property_type
+        ))
+        return future
+
+    def _finish_source(
+        self,
+        extract: Future,
+        future: Future,
+        url: str,
+        city: str,
+        max_price: float,
+        property_category: str,
+        property_type: str
+    ) -> None:
+        try:
+            future.set_result(self._source_listings(extract.result(), url, city, max_price, property_category, property_type))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _source_listings(
+        self,
+        raw_response: Any,
+        url: str,
+        city: str,
+        max_price: float,
+        property_category: str,
+        property_type: str
+    ) -> Tuple[List[PropertyData], List[PropertyData], str]:
+        """Parse a source's extract and merge it into the crawl state"""
+        with TRACER.span("crawl_source", source=url) as span:
+            print("Raw Firecrawl Response:", raw_response)
+            listings = [
+                listing.model_copy(update={"sources": [url]})
+                for listing in parse_records(raw_response, 'properties', PropertyData)
+            ]
+            if not listings:
+                # A failed or empty extract keeps the last known listings instead of dropping them
+                known = self._known_listings(url, city, property_category, property_type)
+                span.set(skipped=False, empty=True, known=len(known))
+                return known, [], "empty"
+            delta = self.crawl_state.merge(url, city, property_category, property_type, max_price, listings)
+            span.set(
+                skipped=False, new=len(delta.new), changed=len(delta.changed), unchanged=delta.unchanged, removed=delta.removed
+            )
+            changed = set(delta.new) | set(delta.changed)
+            return listings, [l for l in listings if listing_key(l) in changed], "extracted"
+
+    def _known_listings(self, url: str, city: str, property_category: str, property_type: str) -> List[PropertyData]:
+        return [
+            PropertyData.model_validate({**record, "sources": [url]})
+            for record in self.crawl_state.known(url, city, property_category, property_type)
+        ]
+
+    def _fetch_properties(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        filters: Optional[PropertyFilters] = None
+    ) -> Tuple[PropertiesResponse, Dict[str, Any]]:
+        """Return listings for the search criteria, crawling only when the local store is stale, and the source outcomes"""
+        metadata: Dict[str, Any] = {}
+        if not self.property_store.is_fresh(city, property_category, property_type, max_price):
+            listings, metadata["sources"] = self._crawl(city, max_price, property_category, property_type)
+            if not listings:
+                return PropertiesResponse(properties=[]), metadata
+        filters = filters or PropertyFilters()
+        stored = self.property_store.query(
+            city, property_category, property_type,
+            max_price=max_price,
+            min_price=filters.min_price,
+            amenities=filters.amenities,
+            sort_by=filters.sort_by,
+            # Room for listings stored before cross-source deduplication, collapsed below
+            limit=MAX_ANALYZED_PROPERTIES * 3
+        )
+        listings = dedup_listings([
+            PropertyData(
+                building_name=p.building_name,
+                property_type=p.listing_type,
+                location_address=p.location_address,
+                price=p.price,
+                description=p.description,
+                sources=p.sources
+            )
+            for p in stored
+        ], city, self.geocoder.lookup)
+        data = PropertiesResponse(properties=listings[:MAX_ANALYZED_PROPERTIES])
+        print("Properties:", [p.model_dump() for p in data.properties])
+        return data, metadata
+
+    def _analyze(self, agent: Agent, prompt: str, key: AnalysisKey) -> str:
+        """Run the analysis, reusing a cached one for equivalent records; failed runs are not cached"""
+        with TRACER.span("analysis_cache") as span:
+            cached = self.analysis_cache.get(key)
+            span.set(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+        content = run_agent(agent, prompt).content
+        if content:
+            self.analysis_cache.set(key, content)
+        return content
+
+    def _analyze_stream(self, agent: Agent, prompt: str, key: AnalysisKey) -> Iterator[str]:
+        """Stream the analysis, or replay a cached one for equivalent records as a single chunk"""
+        with TRACER.span("analysis_cache", stream=True) as span:
+            cached = self.analysis_cache.get(key)
+            span.set(cache_hit=cached is not None)
+        if cached is not None:
+            return iter([cached])
+        return stream_agent_run(agent, prompt, on_complete=lambda text: self.analysis_cache.set(key, text))
+
+    def _run_plan(self, plan: AnalysisPlan) -> str:
+        if plan.agent is None:
+            return plan.prefix
+        return plan.prefix + (self._analyze(plan.agent, plan.prompt, plan.key) or "")
+
+    def _stream_plan(
+        self,
+        plan: AnalysisPlan,
+        data: BaseModel,
+        started: float,
+        metadata: Dict[str, Any]
+    ) -> AnalysisStream:
+        # The templated facts go out as the first chunk, before the model starts
+        chunks = self._analyze_stream(plan.agent, plan.prompt, plan.key) if plan.agent is not None else iter(())
+        return AnalysisStream(chunks, data, started, metadata, prefix=plan.prefix)
+
+    def _properties_records(
+        self,
+        data: PropertiesResponse,
+        city: str,
+        max_price: float,
+        filters: Optional[PropertyFilters] = None
+    ) -> List[Dict]:
+        """Compact records of the locally ranked top listings"""
+        ranked = rank_properties(
+            data.properties,
+            max_price,
+            locations=self._known_locations.get(city.lower().strip()),
+            amenities=filters.amenities if filters else None
+        )
+        return summarize_top(ranked, ANALYSIS_TOP_N)
+
+    def _fit_prompt(
+        self,
+        records: List[Dict],
+        render: Callable[[str], str],
+        stage: str,
+        model_id: Optional[str] = None
+    ) -> str:
+        """Render a prompt from compacted records within the model's token budget"""
+        model_id = model_id or self.model_id
+        with TRACER.span("prompt_compaction", prompt=stage, records=len(records)) as span:
+            prompt, kept = fit_records(records, render, model_id)
+            span.set(records_kept=kept, prompt_tokens=count_tokens(prompt, model_id), budget=prompt_budget(model_id))
+            return prompt
+
+    def _properties_prompt(self, properties: List[Dict]) -> str:
+        """Short, focused analysis prompt summarizing the locally ranked top listings"""
+        return self._fit_prompt(properties, lambda records: f"""Analyze these properties for a buyer (ranked best value first by score):
+Properties: {records}
+1. List 3-5 best matches with name, location, price, and 1-2 key features each.
+2. Which is best value and why?
+3. Top 2 recommendations for investment.
+4. One negotiation tip for each.
+Keep response short and structured.""", "properties")
+
+    def _properties_plan(self, properties: List[Dict]) -> AnalysisPlan:
+        """Template the matches and best value, and route the investment judgement to a model"""
+        if not self.model_router.enabled:
+            key = make_analysis_key(self.model_id, PROPERTIES_PROMPT_VERSION, properties)
+            return AnalysisPlan("", self.agent, self._properties_prompt(properties), key)
+        with TRACER.span("model_routing", analysis="properties", records=len(properties)) as span:
+            decision = self.model_router.route_properties(properties, self.model_id)
+            span.set(model=decision.model_id if decision else None, escalated=bool(decision and decision.escalated),
+                     reason=decision.reason if decision else "templated")
+        prefix = properties_summary(properties)
+        if decision is None:
+            return AnalysisPlan(prefix, None, None, None)
+        prompt = self._fit_prompt(properties, lambda records: f"""Advise a buyer on these properties (ranked best value first by score):
+Properties: {records}
+Reply with exactly these two sections and do not list the properties again:
+### Investment Picks
+Top 2 for investment, one line each on why.
+### Negotiation Tips
+One negotiation tip for each.""", "properties_judgement", decision.model_id)
+        key = make_analysis_key(decision.model_id, ROUTED_PROPERTIES_PROMPT_VERSION, properties)
+        return AnalysisPlan(prefix, self._agent_for("properties", decision.model_id), prompt, key)
+
+    def _properties_error(self, e: Exception) -> str:
+        if isinstance(e, SearchInputError):
+            return str(e)
+        if "No valid URLs found to scrape" in str(e):
+            return "No valid property listings found for this city. Please check the city name or try a different one."
+        print("Error in find_properties:", e)
+        return f"Error: {str(e)}"
+
+    def crawl_locations(self, city: str) -> LocationsResponse:
+        """Extract locality price trends for the city and store them as its snapshot"""
+        raw_response = self._extract(
+            urls=[f"https://www.99acres.com/property-rates-and-price-trends-in-{city.lower()}-prffid/*"],
+            prompt="Extract price trends for up to 5 key localities in the city. Return only: name, price per sqft, percent increase, rental yield.",
+            schema=LocationsResponse.model_json_schema()
+        )
+        print("Raw Firecrawl Location Response:", raw_response)
+        data = LocationsResponse(locations=parse_records(raw_response, 'locations', LocationData))
+        self.trend_snapshots.put(city, [l.model_dump() for l in data.locations])
+        print("Locations:", [l.model_dump() for l in data.locations])
+        return data
+
+    def fetch_locations(self, city: str) -> LocationsResponse:
+        """Locality trends for the city from its snapshot, crawling only cities without one"""
+        return self._fetch_locations(city)[0]
+
+    def _fetch_locations(self, city: str) -> Tuple[LocationsResponse, Dict[str, Any]]:
+        """Locality trends for the city from its snapshot, crawling only cities without one.
+
+        Also returns the LocationTrendsResult metadata describing where the trends came from.
+        """
+        snapshot = self.trend_snapshots.get(city)
+        metadata: Dict[str, Any] = {}
+        data = None
+        if snapshot is not None:
+            try:
+                data = LocationsResponse(locations=[LocationData.model_validate(l) for l in snapshot.locations])
+                metadata = {"snapshot_at": snapshot.refreshed_at, "stale": snapshot.stale}
+                if snapshot.stale:
+                    self._queue_trend_refresh(city)
+            except ValidationError as e:
+                print("Ignoring malformed trend snapshot:", e)
+        if data is None:
+            data = self.crawl_locations(city)
+        if data.locations:
+            self._known_locations[city.lower().strip()] = data.locations
+        return data, metadata
+
+    def _queue_trend_refresh(self, city: str) -> None:
+        """Re-crawl the city's trends in the background, so the next search gets a fresh snapshot"""
+        key = city.lower().strip()
+        with self._refreshing_trends_lock:
+            if key in self._refreshing_trends:
+                return
+            self._refreshing_trends.add(key)
+
+        def refresh() -> None:
+            try:
+                self.crawl_locations(city)
+            except Exception as e:
+                print("Error refreshing trends:", e)
+            finally:
+                with self._refreshing_trends_lock:
+                    self._refreshing_trends.discard(key)
+        SEARCH_EXECUTOR.submit(refresh)
+
+    def _locations_prompt(self, city: str, locations: List[Dict]) -> str:
+        return self._fit_prompt(locations, lambda records: f"""Summarize price trends for these locations in {city}:
+Locations: {records}
+1. List 3-5 locations with price per sqft and percent increase.
+2. Which is best for investment and why?
+3. One tip for investors.
+Keep response short.""", "locations")
+
+    def _locations_plan(self, city: str, locations: List[Dict]) -> AnalysisPlan:
+        """Template the locality figures, and route the investment judgement to a model"""
+        if not self.model_router.enabled:
+            key = make_analysis_key(self.model_id, LOCATIONS_PROMPT_VERSION, locations, {"city": city})
+            return AnalysisPlan("", self.trends_agent, self._locations_prompt(city, locations), key)
+        with TRACER.span("model_routing", analysis="locations", records=len(locations)) as span:
+            decision = self.model_router.route_locations(locations, self.model_id)
+            span.set(model=decision.model_id if decision else None, escalated=bool(decision and decision.escalated),
+                     reason=decision.reason if decision else "templated")
+        prefix = locations_summary(city, locations)
+        if decision is None:
+            return AnalysisPlan(prefix, None, None, None)
+        prompt = self._fit_prompt(locations, lambda records: f"""Advise investors on these locations in {city}:
+Locations: {records}
+Reply with exactly these two sections and do not list the locations again:
+### Investment Outlook
+Which location is best for investment and why, in 2-3 sentences.
+### Investor Tip
+One tip for investors.""", "locations_judgement", decision.model_id)
+        key = make_analysis_key(decision.model_id, ROUTED_LOCATIONS_PROMPT_VERSION, locations, {"city": city})
+        return AnalysisPlan(prefix, self._agent_for("trends", decision.model_id), prompt, key)
+
+    def _flight_key(self, operation: str, city: str, *args: Any, filters: Optional[PropertyFilters] = None) -> tuple:
+        # Scoped to this agent (its keys and model); the pool shares one agent across sessions
+        return (operation, id(self), " ".join(city.lower().split()), *args, filters.model_dump_json() if filters else None)
+
+    def _coalesced(self, key: tuple, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn once for identical concurrent calls; every caller's owner holds the extract jobs the run starts"""
+        group = "flight:" + hashlib.sha1(repr(key).encode()).hexdigest()
+        with self.extract_jobs.shared_by(group):
+            return self.single_flight.do(key, fn, *args)
+
+    def find_properties(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        filters: Optional[PropertyFilters] = None
+    ) -> PropertySearchResult:
+        """Find and analyze properties based on user preferences; identical concurrent searches share one run"""
+        key = self._flight_key("find_properties", city, max_price, property_category, property_type, filters=filters)
+        return self._coalesced(key, self._find_properties, city, max_price, property_category, property_type, filters)
+
+    def _find_properties(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        filters: Optional[PropertyFilters] = None
+    ) -> PropertySearchResult:
+        """Find and analyze properties based on user preferences (optimized for low token usage)"""
+        try:
+            data, metadata = self._fetch_properties(city, max_price, property_category, property_type, filters)
+            properties = self._properties_records(data, city, max_price, filters)
+            analysis = self._run_plan(self._properties_plan(properties))
+            print("AI Analysis:", analysis)
+            return PropertySearchResult(analysis=analysis, data=data, **metadata)
+        except Exception as e:
+            return PropertySearchResult(analysis=self._properties_error(e), error=str(e))
+
+    def find_properties_stream(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        filters: Optional[PropertyFilters] = None
+    ) -> AnalysisStream:
+        """Like find_properties, but streams the analysis tokens as they arrive"""
+        key = self._flight_key("find_properties_stream", city, max_price, property_category, property_type, filters=filters)
+        return self._coalesced(key, self._find_properties_stream, city, max_price, property_category, property_type, filters)
+
+    def _find_properties_stream(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        filters: Optional[PropertyFilters] = None
+    ) -> AnalysisStream:
+        """Fetch the listings, then start streaming their analysis"""
+        started = time.perf_counter()
+        try:
+            data, metadata = self._fetch_properties(city, max_price, property_category, property_type, filters)
+        except Exception as e:
+            return AnalysisStream(
+                iter([self._properties_error(e)]), PropertiesResponse(properties=[]), started, {"error": str(e)}
+            )
+        properties = self._properties_records(data, city, max_price, filters)
+        return self._stream_plan(self._properties_plan(properties), data, started, metadata)
+
+    def get_location_trends(self, city: str) -> LocationTrendsResult:
+        """Get price trends for different localities in the city; identical concurrent requests share one run"""
+        return self._coalesced(self._flight_key("get_location_trends", city), self._get_location_trends, city)
+
+    def _get_location_trends(self, city: str) -> LocationTrendsResult:
+        """Get price trends for different localities in the city (optimized for low token usage)"""
+        try:
+            data, metadata = self._fetch_locations(city)
+            locations = [l.model_dump() for l in data.locations]
+            analysis = self._run_plan(self._locations_plan(city, locations))
+            print("AI Location Analysis:", analysis)
+            return LocationTrendsResult(analysis=analysis, data=data, **metadata)
+        except Exception as e:
+            print("Error in get_location_trends:", e)
+            return LocationTrendsResult(analysis=f"Error: {str(e)}", error=str(e))
+
+    def get_location_trends_stream(self, city: str) -> AnalysisStream:
+        """Like get_location_trends, but streams the analysis tokens as they arrive"""
+        return self._coalesced(self._flight_key("get_location_trends_stream", city), self._get_location_trends_stream, city)
+
+    def _get_location_trends_stream(self, city: str) -> AnalysisStream:
+        started = time.perf_counter()
+        try:
+            data, metadata = self._fetch_locations(city)
+        except Exception as e:
+            print("Error in get_location_trends:", e)
+            return AnalysisStream(iter([f"Error: {str(e)}"]), LocationsResponse(locations=[]), started, {"error": str(e)})
+        locations = [l.model_dump() for l in data.locations]
+        return self._stream_plan(self._locations_plan(city, locations), data, started, metadata)
+
+    def search(
+        self,
+        city: str,
+        max_price: float,
+        property_category: str = "Residential",
+        property_type: str = "Flat",
+        filters: Optional[PropertyFilters] = None,
+        stream: bool = False,
+        owner: Optional[str] = None
+    ) -> Dict[str, Future]:
+        """Start the property search and the location trend analysis concurrently.
+
+        Returns a future per section ("properties", "trends") so callers can
+        render whichever finishes first with concurrent.futures.as_completed.
+        With stream=True the futures resolve to AnalysisStream objects as soon
+        as the extracts finish, while both analyses keep streaming in the background.
+        The extract jobs started for an owner (e.g. a user session) stop being
+        polled when extract_jobs.release(owner) is called.
+        """
+        if stream:
+            return {
+                "properties": SEARCH_EXECUTOR.submit(
+                    self._as_owner, owner, self.find_properties_stream, city, max_price, property_category, property_type, filters
+                ),
+                "trends": SEARCH_EXECUTOR.submit(self._as_owner, owner, self.get_location_trends_stream, city),
+            }
+        return {
+            "properties": SEARCH_EXECUTOR.submit(
+                self._as_owner, owner, self.find_properties, city, max_price, property_category, property_type, filters
+            ),
+            "trends": SEARCH_EXECUTOR.submit(self._as_owner, owner, self.get_location_trends, city),
+        }
+
+    def _as_owner(self, owner: Optional[str], fn: Callable[..., Any], *args: Any) -> Any:
+        with self.extract_jobs.owned_by(owner):
+            return fn(*args)
@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence
+from pydantic import BaseModel, Field
+from crawl_state import DEFAULT_LISTING_TTL_SECONDS
+from extract_cache import DEFAULT_CACHE_DIR
+from pricing import crores_to_rupees, parse_price
+
+DEFAULT_PROPERTY_STORE_PATH = os.getenv("PROPERTY_STORE_PATH", os.path.join(DEFAULT_CACHE_DIR, "properties.sqlite3"))
+DEFAULT_PROPERTY_STORE_MAX_AGE = float(os.getenv("PROPERTY_STORE_MAX_AGE_SECONDS", str(6 * 3600)))
+
+AMENITIES = ["Gym", "Pool", "Parking", "Security", "Garden", "Lift", "Clubhouse"]
+
+SORT_ORDERS = {
+    "Price: Low to High": "price_rupees IS NULL, price_rupees ASC",
+    "Price: High to Low": "price_rupees IS NULL, price_rupees DESC",
+    "Newest": "first_seen DESC",
+    "Best Amenities": "amenity_score DESC, price_rupees IS NULL, price_rupees ASC",
+}
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+class PropertyFilters(BaseModel):
+    """Sidebar filters answered from the local store; prices are in crores"""
+    min_price: float = 0.0
+    amenities: List[str] = Field(default_factory=list)
+    sort_by: str = "Price: Low to High"
+
+class StoredProperty(BaseModel):
+    """Property record kept in the local store, with its numeric price"""
+    city: str
+    property_category: str
+    property_type: str
+    building_name: str
+    listing_type: str = ""
+    location_address: str
+    price: str
+    price_rupees: Optional[float] = None
+    description: str = ""
+    first_seen: float = Field(default_factory=time.time)
+    last_seen: float = Field(default_factory=time.time)
+    # Source URLs the listing was found on (several once duplicates across sites are merged)
+    sources: List[str] = Field(default_factory=list)
+
+def _key(value: str) -> str:
+    return " ".join(value.lower().split())
+
+class PropertyStore:
+    """SQLite store that accumulates extracted listings per city and answers filters locally.
+
+    Listings that no crawl has seen for listing_ttl_seconds are treated as
+    delisted: queries skip them and the next crawl of their city deletes them.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PROPERTY_STORE_PATH,
+        max_age_seconds: float = DEFAULT_PROPERTY_STORE_MAX_AGE,
+        listing_ttl_seconds: float = DEFAULT_LISTING_TTL_SECONDS
+    ):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.listing_ttl_seconds = listing_ttl_seconds
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS properties (
+                    city TEXT NOT NULL,
+                    property_category TEXT NOT NULL,
+                    property_type TEXT NOT NULL,
+                    building_name TEXT NOT NULL,
+                    listing_type TEXT NOT NULL,
+                    location_address TEXT NOT NULL,
+                    price TEXT NOT NULL,
+                    price_rupees REAL,
+                    description TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    sources TEXT NOT NULL DEFAULT '[]',
+                    PRIMARY KEY (city, property_category, property_type, building_name, location_address)
+                );
+                CREATE INDEX IF NOT EXISTS idx_properties_price
+                    ON properties (city, property_category, property_type, price_rupees);
+                CREATE TABLE IF NOT EXISTS crawls (
+                    city TEXT NOT NULL,
+                    property_category TEXT NOT NULL,
+                    property_type TEXT NOT NULL,
+                    max_price_rupees REAL NOT NULL,
+                    crawled_at REAL NOT NULL,
+                    PRIMARY KEY (city, property_category, property_type)
+                );
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(properties)")}
+            if "sources" not in columns:
+                # Stores created before listings carried their sources
+                self._conn.execute("ALTER TABLE properties ADD COLUMN sources TEXT NOT NULL DEFAULT '[]'")
+
+    def add(
+        self,
+        city: str,
+        property_category: str,
+        property_type: str,
+        max_price: float,
+        properties: Sequence,
+        seen: Sequence = ()
+    ) -> int:
+        """Upsert PropertyData records from a crawl with a budget of max_price crores.
+
+        seen are unchanged listings the crawl found again; only their last_seen is updated.
+        """
+        now = time.time()
+        rows = [
+            (
+                _key(city), property_category, property_type,
+                p.building_name, p.property_type, p.location_address,
+                p.price, parse_price(p.price), p.description, now, now, json.dumps(p.sources)
+            )
+            for p in properties
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (city, property_category, property_type, building_name, location_address)
+                DO UPDATE SET listing_type = excluded.listing_type, price = excluded.price, price_rupees = excluded.price_rupees,
+                    description = excluded.description, last_seen = excluded.last_seen, sources = excluded.sources""",
+                rows
+            )
+            self._conn.executemany(
+                """UPDATE properties SET last_seen = ?
+                WHERE city = ? AND property_category = ? AND property_type = ? AND building_name = ? AND location_address = ?""",
+                [(now, _key(city), property_category, property_type, p.building_name, p.location_address) for p in seen]
+            )
+            self._conn.execute(
+                "DELETE FROM properties WHERE city = ? AND property_category = ? AND property_type = ? AND last_seen < ?",
+                (_key(city), property_category, property_type, now - self.listing_ttl_seconds)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawls VALUES (?, ?, ?, ?, ?)",
+                (_key(city), property_category, property_type, crores_to_rupees(max_price), now)
+            )
+        return len(rows)
+
+    def is_fresh(self, city: str, property_category: str, property_type: str, max_price: float) -> bool:
+        """Whether a recent crawl covered this city, category, type and budget"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT max_price_rupees, crawled_at FROM crawls WHERE city = ? AND property_category = ? AND property_type = ?",
+                (_key(city), property_category, property_type)
+            ).fetchone()
+        return (
+            row is not None
+            and time.time() - row["crawled_at"] <= self.max_age_seconds
+            and row["max_price_rupees"] >= crores_to_rupees(max_price)
+        )
+
+    def query(
+        self,
+        city: str,
+        property_category: str,
+        property_type: str,
+        max_price: Optional[float] = None,
+        min_price: float = 0.0,
+        amenities: Optional[List[str]] = None,
+        sort_by: str = "Price: Low to High",
+        limit: Optional[int] = None
+    ) -> List[StoredProperty]:
+        """Return stored listings matching the filters; prices are in crores"""
+        amenities = amenities or []
+        # Amenities are only known from the listing text, so match them there
+        score = " + ".join(["(description LIKE ?)"] * len(AMENITIES))
+        sql = f"""SELECT *, ({score}) AS amenity_score FROM properties
+            WHERE city = ? AND property_category = ? AND property_type = ? AND last_seen >= ?"""
+        params: list = [f"%{a}%" for a in AMENITIES] + [
+            _key(city), property_category, property_type, time.time() - self.listing_ttl_seconds
+        ]
+        if min_price > 0:
+            sql += " AND price_rupees >= ?"
+            params.append(crores_to_rupees(min_price))
+        if max_price is not None:
+            sql += " AND (price_rupees IS NULL OR price_rupees <= ?)"
+            params.append(crores_to_rupees(max_price))
+        for amenity in amenities:
+            sql += " AND description LIKE ?"
+            params.append(f"%{amenity}%")
+        sql += f" ORDER BY {SORT_ORDERS.get(sort_by, SORT_ORDERS['Price: Low to High'])}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            StoredProperty(**{k: json.loads(row[k]) if k == "sources" else row[k] for k in row.keys() if k != "amenity_score"})
+            for row in rows
+        ]
+
+def get_default_property_store() -> PropertyStore:
+    """Return the process-wide property store shared by every session"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PropertyStore()
+        return _default_store
@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from pricing import crores_to_rupees, parse_areas, parse_prices
+from property_store import AMENITIES
+
+DEFAULT_WEIGHTS = {"budget": 0.4, "value": 0.4, "amenities": 0.2}
+
+def locality_values(addresses: pd.Series, locations: Sequence, field: str = "price_per_sqft") -> pd.Series:
+    """A LocationData field (price per sqft by default) for each address whose text names a known locality"""
+    result = pd.Series(np.nan, index=addresses.index)
+    lowered = addresses.str.lower()
+    # Longest names first so "Baner Road" wins over "Baner"
+    for loc in sorted(locations, key=lambda l: len(l.location), reverse=True):
+        name = loc.location.lower().strip()
+        if name:
+            hit = result.isna() & lowered.str.contains(name, regex=False)
+            result[hit] = getattr(loc, field)
+    return result
+
+def rank_properties(
+    properties: Sequence,
+    max_price: float,
+    locations: Optional[Sequence] = None,
+    amenities: Optional[List[str]] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """Score a batch of PropertyData records and return them best first.
+
+    budget_score rewards headroom under max_price (crores) and is 0 over budget,
+    value_score compares the listing's price per sqft with its locality's trend
+    from LocationsResponse (0.5 when unknown), and amenity_score is the share of
+    requested (or all known) amenities mentioned in the listing. Listings
+    without a parseable price score 0 on budget and value and rank last.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    df = pd.DataFrame({
+        "building_name": [p.building_name for p in properties],
+        "location_address": [p.location_address for p in properties],
+        "price": [p.price for p in properties],
+        "description": [p.description for p in properties],
+    })
+    if df.empty:
+        return df.assign(price_rupees=[], area_sqft=[], price_per_sqft=[], score=[])
+    df["price_rupees"] = parse_prices(df["price"])
+    df["area_sqft"] = parse_areas(df["description"])
+    df["price_per_sqft"] = df["price_rupees"] / df["area_sqft"]
+
+    budget = crores_to_rupees(max_price)
+    df["budget_score"] = np.clip(1 - df["price_rupees"] / budget, 0, 1)
+    df.loc[df["price_rupees"] > budget, "budget_score"] = 0.0
+    priced = df["price_rupees"].notna()
+    df["budget_score"] = df["budget_score"].fillna(0.0)
+
+    df["locality_price_per_sqft"] = locality_values(df["location_address"], locations or [])
+    ratio = df["locality_price_per_sqft"] / df["price_per_sqft"]
+    df["value_score"] = (np.clip(ratio, 0, 2) / 2).fillna(0.5).where(priced, 0.0)
+
+    wanted = amenities or AMENITIES
+    text = df["description"].str.lower()
+    hits = np.column_stack([text.str.contains(a.lower(), regex=False).to_numpy() for a in wanted])
+    df["amenity_score"] = hits.mean(axis=1)
+
+    df["score"] = (
+        weights["budget"] * df["budget_score"]
+        + weights["value"] * df["value_score"]
+        + weights["amenities"] * df["amenity_score"]
+    )
+    df["_priced"] = priced
+    ranked = df.sort_values(["_priced", "score"], ascending=False, kind="stable").drop(columns="_priced")
+    return ranked.reset_index(drop=True)
+
+def summarize_top(ranked: pd.DataFrame, top_n: int = 5) -> List[Dict]:
+    """Compact records of the top-N ranked listings for the analysis prompt"""
+    columns = ["building_name", "location_address", "price", "price_per_sqft", "score", "description"]
+    top = ranked.head(top_n)[columns].copy()
+    top["price_per_sqft"] = top["price_per_sqft"].round(0)
+    top["score"] = top["score"].round(2)
+    return top.replace({np.nan: None}).to_dict("records")
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_default_group = None
+_default_group_lock = threading.Lock()
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception). Nothing is
+    kept once the call finishes, so later calls run again.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                self.leaders += 1
+                future = self._calls[key] = Future()
+            else:
+                self.followers += 1
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many calls ran and how many shared an in-flight call"""
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "coalesced_rate": self.followers / total if total else 0.0,
+        }
+
+def get_default_single_flight() -> SingleFlight:
+    """Return the process-wide group shared by every agent and session"""
+    global _default_group
+    with _default_group_lock:
+        if _default_group is None:
+            _default_group = SingleFlight()
+        return _default_group
@@ -0,0 +1,43 @@
+import pytest
+from alerts_worker import AlertSink, SnapshotStore, listing_id, run_once
+from property_agent import PropertyData
+
+def _listing(name, price):
+    return PropertyData(building_name=name, property_type="Flat", location_address="Baner, Pune", price=price, description="")
+
+class RecordingSink(AlertSink):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, search, listings, price_changes=()):
+        self.sent.append((search.email, [l.building_name for l in listings], [(c.previous_price, c.listing.price) for c in price_changes]))
+
+class StubAgent:
+    def __init__(self):
+        self.listings = []
+
+    def crawl_properties(self, city, max_price, property_category, property_type):
+        return self.listings
+
+@pytest.fixture
+def searches(tmp_path):
+    path = tmp_path / "saved_searches.txt"
+    path.write_text("a@example.com,pune,Residential,Flat,2.0\n")
+    return str(path)
+
+def test_listing_id_ignores_price():
+    assert listing_id(_listing("Godrej Hillside", "₹89 Lac")) == listing_id(_listing("Godrej Hillside", "₹85 Lac"))
+
+def test_price_change_is_alerted_as_a_change_not_a_new_listing(tmp_path, searches):
+    agent, sink = StubAgent(), RecordingSink()
+    snapshots = SnapshotStore(str(tmp_path / "snapshots.json"))
+    agent.listings = [_listing("Godrej Hillside", "₹89 Lac")]
+    assert run_once(agent, sink, searches, snapshots) == 0
+    agent.listings = [_listing("Godrej Hillside", "₹85 Lac"), _listing("Kumar Palmcrest", "₹1.2 Cr")]
+    assert run_once(agent, sink, searches, snapshots) == 1
+    assert sink.sent == [("a@example.com", ["Kumar Palmcrest"], [("₹89 Lac", "₹85 Lac")])]
+    assert run_once(agent, sink, searches, snapshots) == 0
+
+def test_alert_sink_is_abstract():
+    with pytest.raises(TypeError):
+        AlertSink()
@@ -0,0 +1,39 @@
+import pytest
+from analysis_cache import AnalysisCache
+from property_agent import PropertyFindingAgent
+from tracing import TRACER
+from trend_snapshots import TrendSnapshotStore
+
+# Nothing listens on the discard port, so every model call fails to connect
+UNREACHABLE_OPENAI_URL = "http://127.0.0.1:9/v1"
+LOCATIONS = [{"location": "Baner", "price_per_sqft": 9000.0, "percent_increase": 4.0, "rental_yield": 3.1}]
+
+@pytest.fixture
+def agent():
+    agent = PropertyFindingAgent(
+        firecrawl_api_key="fc-test",
+        openai_api_key="sk-test",
+        analysis_cache=AnalysisCache(":memory:"),
+        trend_snapshots=TrendSnapshotStore(":memory:"),
+        openai_base_url=UNREACHABLE_OPENAI_URL
+    )
+    agent.trend_snapshots.put("pune", LOCATIONS)
+    return agent
+
+def _analysis_errors():
+    return sum(row["errors"] for row in TRACER.stage_summary() if row["stage"] == "llm_analysis")
+
+def test_failed_model_runs_are_reported_and_not_cached(agent):
+    for _ in range(2):
+        result = agent.get_location_trends("pune")
+        assert result.analysis.startswith("Error")
+        assert "Connection error" in result.analysis
+    assert agent.analysis_cache.stats()["entries"] == 0
+
+def test_failed_streamed_runs_end_with_an_error_chunk(agent):
+    errors = _analysis_errors()
+    for _ in range(2):
+        result = agent.get_location_trends_stream("pune").result()
+        assert "Error: Connection error" in result.analysis
+    assert agent.analysis_cache.stats()["entries"] == 0
+    assert _analysis_errors() == errors + 2
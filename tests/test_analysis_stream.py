@@ -0,0 +1,19 @@
+import time
+import pytest
+from property_agent import AnalysisStream, LocationsResponse
+
+def _model_chunks():
+    time.sleep(0.2)
+    yield "Baner is the best pick"
+
+def test_time_to_first_model_token_excludes_the_templated_prefix():
+    stream = AnalysisStream(_model_chunks(), LocationsResponse(locations=[]), prefix="### Localities in Pune\n")
+    result = stream.result()
+    assert result.analysis == "### Localities in Pune\nBaner is the best pick"
+    assert stream.time_to_first_token < 0.1
+    assert stream.time_to_first_model_token >= 0.2
+
+def test_streams_without_a_prefix_report_the_same_first_token():
+    stream = AnalysisStream(_model_chunks(), LocationsResponse(locations=[]))
+    stream.result()
+    assert stream.time_to_first_token == pytest.approx(stream.time_to_first_model_token, abs=0.01)
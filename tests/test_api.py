@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+import pytest
+from starlette.testclient import TestClient
+import api
+from analysis_cache import AnalysisCache
+from extract_cache import ExtractCache
+from extract_jobs import ExtractJobManager
+from property_agent import AnalysisStream, PropertiesResponse, PropertyFindingAgent
+from trend_snapshots import TrendSnapshotStore
+
+QUERY = {"city": "pune", "max_price": 1}
+
+class StreamingAgent:
+    def __init__(self, workers):
+        self.workers = workers
+        self.in_flight = []
+
+    def listing_urls(self, city):
+        return [f"https://housing.com/in/buy/{city}/{city}"]
+
+    def find_properties_stream(self, *args):
+        def chunks():
+            for chunk in ("Top picks", " in Pune"):
+                self.in_flight.append(self.workers.stats()["in_flight"])
+                yield chunk
+        return AnalysisStream(chunks(), PropertiesResponse(properties=[]))
+
+def test_streamed_search_holds_its_slot_until_the_stream_ends():
+    workers = api.WorkerPool(1, 0)
+    agent = StreamingAgent(workers)
+    client = TestClient(api.create_app(workers=workers, agent_factory=lambda request: agent))
+    response = client.post("/search?stream=true", json=QUERY)
+    assert response.text == "Top picks in Pune"
+    assert agent.in_flight == [1, 1]
+    assert workers.stats()["in_flight"] == 0
+
+def test_batches_use_their_own_pool_and_timeout(monkeypatch):
+    monkeypatch.setattr(api, "run_batch", lambda *args, **kwargs: time.sleep(0.3))
+    workers, batch_workers = api.WorkerPool(1, 0), api.WorkerPool(1, 0)
+    client = TestClient(api.create_app(
+        workers=workers, agent_factory=lambda request: None, batch_workers=batch_workers, batch_timeout=0.05
+    ))
+    response = client.post("/batch", json={"queries": [QUERY]})
+    assert response.status_code == 504
+    # The timed-out batch still runs on the batch pool; searches keep their own capacity
+    assert client.post("/batch", json={"queries": [QUERY]}).status_code == 429
+    assert client.get("/health").json()["in_flight"] == 0
+
+@pytest.fixture
+def unreachable_agent():
+    # Nothing listens on the discard port, so every Firecrawl and OpenAI call fails
+    return PropertyFindingAgent(
+        firecrawl_api_key="fc-test",
+        openai_api_key="sk-test",
+        extract_cache=ExtractCache(":memory:"),
+        extract_jobs=ExtractJobManager(":memory:"),
+        analysis_cache=AnalysisCache(":memory:"),
+        trend_snapshots=TrendSnapshotStore(":memory:"),
+        firecrawl_api_url="http://127.0.0.1:9",
+        openai_base_url="http://127.0.0.1:9/v1"
+    )
+
+def test_invalid_cities_are_rejected_with_400(unreachable_agent):
+    client = TestClient(api.create_app(agent_factory=lambda request: unreachable_agent))
+    response = client.post("/search", json={"city": "x", "max_price": 1})
+    assert response.status_code == 400
+    assert "valid city" in response.json()["error"]
+    assert client.get("/trends", params={"city": "pune-1"}).status_code == 400
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_upstream_failures_are_reported_as_502(unreachable_agent):
+    client = TestClient(api.create_app(agent_factory=lambda request: unreachable_agent))
+    response = client.get("/trends", params={"city": "pune"})
+    assert response.status_code == 502
+    assert response.json()["error"].startswith("Search failed")
+
+def test_streamed_search_releases_its_slot_when_the_client_leaves_early():
+    workers = api.WorkerPool(1, 0)
+    app = api.create_app(workers=workers, agent_factory=lambda request: StreamingAgent(workers))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/search", "raw_path": b"/search",
+        "query_string": b"stream=true", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    body = json.dumps(QUERY).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        # The client is gone before the response headers go out
+        raise OSError("connection reset")
+
+    with pytest.raises(Exception):
+        asyncio.run(app(scope, receive, send))
+    assert workers.stats()["in_flight"] == 0
@@ -0,0 +1,27 @@
+import pytest
+from batch_search import BatchQuery, run_batch
+from benchmarks.bench_search import Pipeline
+from benchmarks.fake_services import FakeServices, Latency
+
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+QUERIES = [BatchQuery(city="pune", max_price=5.0), BatchQuery(city="x", max_price=1.0)]
+
+@pytest.fixture
+def agent():
+    with FakeServices(firecrawl_latency=Latency(1.0, 0)) as services:
+        agent = Pipeline(services, stream=False, geocode_interval=0).agent
+        # Interactive searches would give up on every source
+        agent.source_deadline_seconds = 0.1
+        yield agent
+
+def test_batch_waits_for_sources_past_the_interactive_deadline(agent):
+    result = run_batch(agent, QUERIES)
+    assert set(result.listings["city"]) == {"pune"}
+    assert len(result.listings) == 5
+    assert list(result.errors) == ["x / Residential / Flat / 1.0 Cr"]
+
+def test_sources_missing_the_batch_deadline_are_reported(agent):
+    result = run_batch(agent, QUERIES, source_deadline_seconds=0.1)
+    assert result.errors["pune / Residential / Flat / 5.0 Cr"].startswith("Incomplete: ")
+    assert "(late)" in result.errors["pune / Residential / Flat / 5.0 Cr"]
@@ -0,0 +1,29 @@
+import time
+from crawl_state import CrawlState
+from property_agent import PropertyData
+
+SOURCE = "https://www.99acres.com/property-in-pune-ffid/*"
+
+def _listing(name):
+    return PropertyData(building_name=name, property_type="Flat", location_address="Baner, Pune", price="₹95 Lac", description="")
+
+def _merge(state, names):
+    return state.merge(SOURCE, "Pune", "Residential", "Flat", 1.0, [_listing(name) for name in names])
+
+def _known_names(state):
+    return [record["building_name"] for record in state.known(SOURCE, "Pune", "Residential", "Flat")]
+
+def test_listings_missing_from_extracts_past_the_ttl_are_dropped():
+    state = CrawlState(":memory:", listing_ttl_seconds=0.05)
+    _merge(state, ["Sobha Orion", "Kolte Patil Western Avenue"])
+    time.sleep(0.1)
+    delta = _merge(state, ["Sobha Orion"])
+    assert delta.removed == 1
+    assert _known_names(state) == ["Sobha Orion"]
+
+def test_listings_within_the_ttl_are_kept():
+    state = CrawlState(":memory:")
+    _merge(state, ["Sobha Orion", "Kolte Patil Western Avenue"])
+    delta = _merge(state, ["Sobha Orion"])
+    assert delta.removed == 0
+    assert sorted(_known_names(state)) == ["Kolte Patil Western Avenue", "Sobha Orion"]
@@ -0,0 +1,67 @@
+import time
+import pytest
+from benchmarks.bench_search import Pipeline
+from benchmarks.fake_services import FakeServices, Latency
+
+# The SDK flags the extract endpoint as in maintenance mode on every call
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+@pytest.fixture
+def services():
+    with FakeServices(firecrawl_latency=Latency(1.0, 0)) as services:
+        yield services
+
+def _search(agent, owner):
+    return agent.search("pune", 1.5, "Residential", "Flat", owner=owner)
+
+def test_follower_keeps_shared_jobs_when_leader_releases(services):
+    agent = Pipeline(services, stream=False, geocode_interval=0).agent
+    leader = _search(agent, "sessionA:pune")
+    time.sleep(0.1)
+    follower = _search(agent, "sessionB:pune")
+    time.sleep(0.3)
+    assert agent.extract_jobs.job_ids("sessionB:pune")
+    agent.extract_jobs.release("sessionA:pune")
+
+    properties = follower["properties"].result(timeout=30)
+    trends = follower["trends"].result(timeout=30)
+    assert set(properties.sources.values()) == {"extracted"}
+    assert properties.data.properties
+    assert trends.data.locations
+    assert not trends.analysis.startswith("Error")
+    assert leader["properties"].result(timeout=30).data.properties
+    assert agent.extract_jobs.stats()["cancelled"] == 0
+
+def test_jobs_are_cancelled_once_every_owner_releases(services):
+    agent = Pipeline(services, stream=False, geocode_interval=0).agent
+    first = _search(agent, "sessionA:pune")
+    time.sleep(0.1)
+    _search(agent, "sessionB:pune")
+    time.sleep(0.3)
+    agent.extract_jobs.release("sessionA:pune")
+    agent.extract_jobs.release("sessionB:pune")
+
+    properties = first["properties"].result(timeout=30)
+    assert set(properties.sources.values()) == {"failed"}
+    assert agent.extract_jobs.stats()["cancelled"] > 0
+
+def test_ownerless_caller_pins_shared_jobs(services):
+    agent = Pipeline(services, stream=False, geocode_interval=0).agent
+    _search(agent, "sessionA:pune")
+    time.sleep(0.1)
+    ownerless = _search(agent, None)
+    time.sleep(0.3)
+    assert agent.extract_jobs.release("sessionA:pune") == 0
+    assert set(ownerless["properties"].result(timeout=30).sources.values()) == {"extracted"}
+
+def test_owner_waiting_on_its_jobs_outlives_its_lease():
+    with FakeServices(firecrawl_latency=Latency(2.0, 0)) as services:
+        agent = Pipeline(services, stream=False, geocode_interval=0).agent
+        agent.extract_jobs.lease_seconds = 0.5
+        futures = _search(agent, "sessionA:pune")
+
+        properties = futures["properties"].result(timeout=30)
+        trends = futures["trends"].result(timeout=30)
+        assert set(properties.sources.values()) == {"extracted"}
+        assert not trends.analysis.startswith("Error")
+        assert agent.extract_jobs.stats()["cancelled"] == 0
@@ -0,0 +1,19 @@
+import socket
+import struct
+import time
+from benchmarks.fake_services import FakeServices, Latency
+
+def test_clients_hanging_up_do_not_print_tracebacks(capfd):
+    with FakeServices(openai_latency=Latency(0.2, 0)) as services:
+        host, port = services._server.server_address[:2]
+        body = b'{"model": "gpt-3.5-turbo", "stream": true, "messages": []}'
+        client = socket.create_connection((host, port))
+        client.sendall(
+            b"POST /v1/chat/completions HTTP/1.1\r\nHost: local\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        # Reset the connection instead of closing it cleanly, while the response is being delayed
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        client.close()
+        time.sleep(0.5)
+    assert "Traceback" not in capfd.readouterr().err
@@ -0,0 +1,10 @@
+from model_router import properties_summary
+
+def test_properties_summary_keeps_amenity_names_capitalised():
+    summary = properties_summary([{
+        "building_name": "Kumar Palmcrest",
+        "location_address": "Baner, Pune",
+        "price": "₹1.25 Cr",
+        "description": "3 BHK with gym, swimming pool and covered parking",
+    }])
+    assert "**Kumar Palmcrest**, Baner, Pune: ₹1.25 Cr. Gym, Pool." in summary
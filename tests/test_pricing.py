@@ -0,0 +1,29 @@
+import math
+import pytest
+from pricing import parse_areas, parse_price, parse_prices
+
+@pytest.mark.parametrize("text, rupees", [
+    ("₹1.2 Cr", 12_000_000),
+    ("₹85 Lakh", 8_500_000),
+    ("95,00,000", 9_500_000),
+    ("₹72 Lac - 95 Lac", 7_200_000),
+    ("1.2 - 1.5 Cr", 12_000_000),
+    ("3 BHK ₹1.5 Cr", 15_000_000),
+    ("2 BHK Flat, 85 Lakh onwards", 8_500_000),
+    ("1450 sq ft for Rs. 72 Lac", 7_200_000),
+    ("3 BHK, 1450 sq ft", None),
+    ("Plot 12000 sq ft, 3 Cr", 30_000_000),
+    ("₹ 4,500/sq ft, 1.2 Cr", 12_000_000),
+    ("Rate 6500 per sq ft, total 95,00,000", 9_500_000),
+    ("1000 - 1200 sq ft, 9500000 or ₹1.1 Cr", 11_000_000),
+    ("Price on request", None),
+    (None, None),
+])
+def test_parse_price(text, rupees):
+    assert parse_price(text) == rupees
+    vectorized = parse_prices([text]).iloc[0]
+    assert (math.isnan(vectorized) if rupees is None else vectorized == rupees)
+
+def test_parse_areas_reads_sq_ft_text():
+    areas = parse_areas(["3 BHK, 1450 sq ft", "Spacious 1,020 sqft flat", "No area given"])
+    assert areas.iloc[0] == 1450 and areas.iloc[1] == 1020 and math.isnan(areas.iloc[2])
@@ -0,0 +1,29 @@
+import time
+import pytest
+from benchmarks.bench_search import Pipeline
+from benchmarks.fake_services import FakeServices
+
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+def _names(agent):
+    return {p.building_name for p in agent._fetch_properties("pune", 5.0)[0].properties}
+
+def test_delisted_listings_drop_out_of_searches():
+    with FakeServices() as services:
+        agent = Pipeline(services, stream=False, geocode_interval=0).agent
+        # Every search re-extracts every source, and listings expire quickly
+        agent.extract_cache.ttl_seconds = 0
+        agent.property_store.max_age_seconds = 0
+        agent.crawl_state.recrawl_seconds = 0
+        agent.crawl_state.listing_ttl_seconds = agent.property_store.listing_ttl_seconds = 0.5
+
+        listed = services._properties["properties"]
+        delisted = listed[0]["Building_name"]
+        assert delisted in _names(agent)
+
+        services._properties = {"properties": listed[1:]}
+        time.sleep(0.6)
+        names = _names(agent)
+        assert delisted not in names
+        # Unchanged listings found again are kept, though their records were not rewritten
+        assert {p["Building_name"] for p in listed[1:]} <= names
@@ -0,0 +1,21 @@
+from property_agent import PropertyData
+from ranking import rank_properties
+
+def _listing(name, price, description=""):
+    return PropertyData(building_name=name, property_type="Flat", location_address="Mahalunge, Pune", price=price, description=description)
+
+def test_unpriced_listings_rank_below_priced_ones_in_budget():
+    ranked = rank_properties([
+        _listing("Price On Request Towers", "Price on request", "Gym, pool and clubhouse"),
+        _listing("Godrej Hill Side", "₹89 Lac", "1020 sq ft"),
+    ], max_price=1.0)
+    assert list(ranked["building_name"]) == ["Godrej Hill Side", "Price On Request Towers"]
+    unpriced = ranked.iloc[1]
+    assert unpriced["budget_score"] == 0 and unpriced["value_score"] == 0
+
+def test_unpriced_listings_rank_below_over_budget_ones():
+    ranked = rank_properties([
+        _listing("Price On Request Towers", "Price on request"),
+        _listing("Kumar Palmcrest", "₹1.25 Cr"),
+    ], max_price=1.0)
+    assert ranked.iloc[-1]["building_name"] == "Price On Request Towers"
@@ -0,0 +1,24 @@
+import time
+import pytest
+from benchmarks.bench_search import Pipeline
+from benchmarks.fake_services import FakeServices
+
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+OLD_LOCATIONS = [{"location": "Baner", "price_per_sqft": 9000.0, "percent_increase": 4.0, "rental_yield": 3.1}]
+
+def test_serving_a_stale_snapshot_queues_a_refresh():
+    with FakeServices() as services:
+        agent = Pipeline(services, stream=False, geocode_interval=0).agent
+        agent.trend_snapshots.stale_seconds = 0
+        agent.trend_snapshots.put("pune", OLD_LOCATIONS)
+        served_at = agent.trend_snapshots.get("pune").refreshed_at
+
+        result = agent.get_location_trends("pune")
+        assert result.stale and result.snapshot_at == served_at
+        assert [l.location for l in result.data.locations] == ["Baner"]
+
+        deadline = time.monotonic() + 30
+        while agent.trend_snapshots.get("pune").refreshed_at == served_at and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert agent.trend_snapshots.get("pune").locations != OLD_LOCATIONS
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")
+
+class Span:
+    """One timed pipeline stage; attributes can be added while it is open"""
+
+    def __init__(self, stage: str, attrs: Dict[str, Any]):
+        self.stage = stage
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stage": self.stage, "started_at": self.started_at, "duration": self.duration, **self.attrs}
+
+class Tracer:
+    """Collects per-stage wall times, LLM token usage and cache statistics for the search pipeline"""
+
+    def __init__(self, max_spans: int = 500, log_path: Optional[str] = TRACE_LOG_PATH):
+        self.log_path = log_path
+        self._spans: deque = deque(maxlen=max_spans)
+        self._stage_count: Dict[str, int] = defaultdict(int)
+        self._stage_seconds: Dict[str, float] = defaultdict(float)
+        self._stage_errors: Dict[str, int] = defaultdict(int)
+        self._tokens: Dict[tuple, int] = defaultdict(int)
+        self._stats_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, **attrs: Any) -> Iterator[Span]:
+        """Time a stage: `with TRACER.span("firecrawl_extract", urls=3) as span: ...`"""
+        span = Span(stage, attrs)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            self._record(span)
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            self._stage_count[span.stage] += 1
+            self._stage_seconds[span.stage] += span.duration or 0.0
+            if "error" in span.attrs:
+                self._stage_errors[span.stage] += 1
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def record_tokens(self, model: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self._tokens[(model, "input")] += input_tokens or 0
+            self._tokens[(model, "output")] += output_tokens or 0
+
+    def register_stats(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Expose a cache's stats() (hits, misses, hit_rate, ...) under name"""
+        with self._lock:
+            self._stats_sources[name] = source
+
+    def recent_spans(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            spans = list(self._spans)[-limit:]
+        return [s.to_dict() for s in reversed(spans)]
+
+    def stage_summary(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "stage": stage,
+                    "count": count,
+                    "total_seconds": round(self._stage_seconds[stage], 3),
+                    "avg_seconds": round(self._stage_seconds[stage] / count, 3),
+                    "errors": self._stage_errors[stage],
+                }
+                for stage, count in sorted(self._stage_count.items())
+            ]
+
+    def token_usage(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"model": m, "direction": d, "tokens": n} for (m, d), n in sorted(self._tokens.items())]
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            sources = dict(self._stats_sources)
+        stats = {}
+        for name, source in sources.items():
+            try:
+                stats[name] = source()
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+        return stats
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP property_agent_stage_seconds Wall time spent per pipeline stage",
+            "# TYPE property_agent_stage_seconds summary",
+        ]
+        for row in self.stage_summary():
+            lines.append(f'property_agent_stage_seconds_count{{stage="{row["stage"]}"}} {row["count"]}')
+            lines.append(f'property_agent_stage_seconds_sum{{stage="{row["stage"]}"}} {row["total_seconds"]}')
+        lines += ["# HELP property_agent_stage_errors_total Failed stage executions", "# TYPE property_agent_stage_errors_total counter"]
+        for row in self.stage_summary():
+            lines.append(f'property_agent_stage_errors_total{{stage="{row["stage"]}"}} {row["errors"]}')
+        lines += ["# HELP property_agent_llm_tokens_total LLM tokens used per model", "# TYPE property_agent_llm_tokens_total counter"]
+        for row in self.token_usage():
+            lines.append(f'property_agent_llm_tokens_total{{model="{row["model"]}",direction="{row["direction"]}"}} {row["tokens"]}')
+        lines += ["# HELP property_agent_cache Cache counters by cache name", "# TYPE property_agent_cache gauge"]
+        for name, stats in self.cache_stats().items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'property_agent_cache{{cache="{name}",stat="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+TRACER = Tracer()
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_lock = threading.Lock()
+
+def start_metrics_server(port: int, tracer: Tracer = TRACER) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics (Prometheus text) and /traces (JSON) on a background thread, once per process"""
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics"):
+                    body, content_type = tracer.prometheus_text(), "text/plain; version=0.0.4"
+                elif self.path.startswith("/traces"):
+                    body = json.dumps({
+                        "stages": tracer.stage_summary(),
+                        "tokens": tracer.token_usage(),
+                        "caches": tracer.cache_stats(),
+                        "spans": tracer.recent_spans(),
+                    }, default=str)
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        except OSError as e:
+            print(f"Could not start metrics server on port {port}:", e)
+            return None
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _metrics_server
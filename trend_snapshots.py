@@ -0,0 +1,165 @@
+"""Precomputed locality price-trend snapshots per city.
+
+Locality prices per sqft and rental yields change monthly at most, so
+get_location_trends serves them from these snapshots and only crawls
+99acres for cities without a usable one. This job keeps the snapshots of
+the configured cities fresh.
+
+Usage:
+    python trend_snapshots.py --once
+    python trend_snapshots.py --cities pune,mumbai,bangalore --interval 86400
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from extract_cache import DEFAULT_CACHE_DIR
+from geocoder import get_default_geocoder
+from map_layers import get_default_map_layers
+
+DEFAULT_TREND_SNAPSHOT_PATH = os.getenv("TREND_SNAPSHOT_PATH", os.path.join(DEFAULT_CACHE_DIR, "trend_snapshots.sqlite3"))
+# Snapshots older than this are flagged stale but still served
+DEFAULT_TREND_STALE_SECONDS = float(os.getenv("TREND_SNAPSHOT_STALE_SECONDS", str(30 * 24 * 3600)))
+# Snapshots older than this are ignored and the city is crawled live
+DEFAULT_TREND_MAX_AGE_SECONDS = float(os.getenv("TREND_SNAPSHOT_MAX_AGE_SECONDS", str(90 * 24 * 3600)))
+DEFAULT_TREND_CITIES = os.getenv(
+    "TREND_SNAPSHOT_CITIES", "mumbai,delhi,bangalore,hyderabad,chennai,pune,kolkata,ahmedabad,gurgaon,noida"
+)
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def _key(city: str) -> str:
+    return " ".join(city.lower().split())
+
+class TrendSnapshot(BaseModel):
+    """Locality trend records of a city as of refreshed_at"""
+    city: str
+    locations: List[Dict[str, Any]]
+    refreshed_at: float
+    stale: bool = False
+
+class TrendSnapshotStore:
+    """SQLite store with one LocationsResponse snapshot per city"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_TREND_SNAPSHOT_PATH,
+        stale_seconds: float = DEFAULT_TREND_STALE_SECONDS,
+        max_age_seconds: float = DEFAULT_TREND_MAX_AGE_SECONDS
+    ):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS trend_snapshots (
+                    city TEXT PRIMARY KEY,
+                    locations TEXT NOT NULL,
+                    refreshed_at REAL NOT NULL
+                )"""
+            )
+
+    def get(self, city: str) -> Optional[TrendSnapshot]:
+        """Return the city's snapshot, or None if there is none younger than max_age_seconds"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT locations, refreshed_at FROM trend_snapshots WHERE city = ?", (_key(city),)
+            ).fetchone()
+        age = time.time() - row[1] if row is not None else None
+        if age is None or age > self.max_age_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return TrendSnapshot(city=_key(city), locations=json.loads(row[0]), refreshed_at=row[1], stale=age > self.stale_seconds)
+
+    def put(self, city: str, locations: List[Dict[str, Any]]) -> None:
+        """Replace the city's snapshot; empty results never overwrite a usable one"""
+        if not locations:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO trend_snapshots VALUES (?, ?, ?)",
+                (_key(city), json.dumps(locations), time.time())
+            )
+
+    def cities(self) -> Dict[str, float]:
+        """Refresh time of every stored city"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT city, refreshed_at FROM trend_snapshots").fetchall())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of stored cities"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM trend_snapshots").fetchone()[0]
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "cities": size}
+
+def get_default_trend_snapshots() -> TrendSnapshotStore:
+    """Return the process-wide snapshot store shared by every agent"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TrendSnapshotStore()
+        return _default_store
+
+def refresh_snapshots(agent, cities: List[str], min_age_seconds: float = 0.0) -> int:
+    """Crawl and store trends for each city whose snapshot is older than min_age_seconds; returns the count"""
+    refreshed = 0
+    existing = agent.trend_snapshots.cities()
+    for city in cities:
+        if time.time() - existing.get(_key(city), 0.0) < min_age_seconds:
+            continue
+        try:
+            data = agent.crawl_locations(city)
+        except Exception as e:
+            print(f"Error refreshing trends for {city}:", e)
+            continue
+        if data.locations:
+            refreshed += 1
+            # Render the city heatmap now so the first session after a refresh gets it from cache
+            try:
+                get_default_map_layers().city_heatmap(city, data.locations, get_default_geocoder())
+            except Exception as e:
+                print(f"Error pre-rendering the heatmap for {city}:", e)
+        else:
+            print(f"No trends extracted for {city}; keeping the previous snapshot")
+    return refreshed
+
+def main():
+    load_dotenv()
+    from property_agent import PropertyFindingAgent
+
+    parser = argparse.ArgumentParser(description="Refresh the precomputed city price-trend snapshots")
+    parser.add_argument("--cities", default=DEFAULT_TREND_CITIES, help="Comma-separated cities to keep fresh")
+    parser.add_argument("--min-age", type=float, default=7 * 24 * 3600, help="Skip cities refreshed more recently than this (seconds)")
+    parser.add_argument("--interval", type=float, default=24 * 3600, help="Seconds between runs")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+
+    agent = PropertyFindingAgent(
+        firecrawl_api_key=os.getenv("FIRECRAWL_API_KEY", ""),
+        openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+        model_id=os.getenv("OPENAI_MODEL_ID", "gpt-3.5-turbo")
+    )
+    cities = [c.strip() for c in args.cities.split(",") if c.strip()]
+    while True:
+        refreshed = refresh_snapshots(agent, cities, args.min_age)
+        print(f"Refreshed {refreshed} of {len(cities)} city snapshot(s)")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()